@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+
+import aiohttp
+
+import health
+import metrics
+import tv_scanner
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CHUNK_SIZE = 100
+MAX_CONCURRENCY = 8
+MAX_ATTEMPTS = 4
+REQUEST_TIMEOUT = 10
+REFRESH_DEADLINE = 30
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+# `missing` holds symbols absent from a successful response, i.e. unknown to TradingView;
+# `errors` counts the symbols in chunks that failed, by cause.
+RefreshResult = namedtuple("RefreshResult", ["results", "stale", "elapsed", "missing", "errors"])
+
+class RetryableStatus(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+def backoff_delay(attempt, retry_after=None):
+    # Full jitter keeps concurrent dashboards from retrying in lockstep after a 429.
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+def _retry_after(headers):
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+async def _post_chunk(session, semaphore, url, data, indicators, request_timeout, max_attempts):
+    # Returns (results, None) on success or ({}, cause of the last failure).
+    timeout = aiohttp.ClientTimeout(total=request_timeout)
+    symbol_count = len(data["symbols"]["tickers"])
+    cause = None
+    for attempt in range(max_attempts):
+        retry_after = None
+        retryable = True
+        queued = time.perf_counter()
+        async with semaphore:
+            started = time.perf_counter()
+            metrics.observe("queue_wait_seconds", started - queued, pool="scanner")
+            try:
+                async with session.post(url, json=data, timeout=timeout) as response:
+                    if response.status in tv_scanner.RETRY_STATUSES:
+                        raise RetryableStatus(response.status, _retry_after(response.headers))
+                    response.raise_for_status()
+                    payload = await response.json(content_type=None)
+                    results = tv_scanner.parse_scan_response(payload, indicators)
+                    metrics.observe("fetch_seconds", time.perf_counter() - started, source="scanner", outcome="ok")
+                    metrics.inc("fetched_symbols_total", symbol_count, source="scanner", outcome="ok")
+                    return results, None
+            except RetryableStatus as e:
+                retry_after = e.retry_after
+                cause = health.classify(e)
+                logger.info("Scanner returned %s (attempt %d/%d)", e.status, attempt + 1, max_attempts)
+            except aiohttp.ClientResponseError as e:
+                # Any other HTTP error (400, 401, 404, ...) would fail the same way again.
+                cause = health.classify(e)
+                retryable = False
+                logger.warning("Scanner rejected the request with %s: %s", e.status, e.message)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                cause = health.classify(e)
+                logger.info("Scanner request failed (attempt %d/%d): %r", attempt + 1, max_attempts, e)
+            metrics.observe("fetch_seconds", time.perf_counter() - started, source="scanner", outcome=cause)
+        if not retryable:
+            break
+        # Sleep outside the semaphore so a backing-off chunk does not hold a slot.
+        if attempt + 1 < max_attempts:
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+    metrics.inc("fetched_symbols_total", symbol_count, source="scanner", outcome=cause)
+    return {}, cause
+
+def open_session(max_concurrency=MAX_CONCURRENCY):
+    """Keep-alive scanner session; must be called with the event loop that will use it running."""
+    return aiohttp.ClientSession(headers=tv_scanner.HEADERS, connector=aiohttp.TCPConnector(limit=max_concurrency))
+
+async def refresh(symbols, exchange, screener, interval, indicators, chunk_size=CHUNK_SIZE,
+                  max_concurrency=MAX_CONCURRENCY, request_timeout=REQUEST_TIMEOUT,
+                  deadline=REFRESH_DEADLINE, max_attempts=MAX_ATTEMPTS, base_url=None, session=None):
+    """Fetch `indicators` for the universe within `deadline` seconds.
+
+    `interval` may be a list of intervals, in which case every chunk requests all of them
+    at once and results are keyed like "4h RSI" (see tv_scanner.scan_columns). Whatever
+    has arrived when the deadline hits is returned; every symbol without data (unknown,
+    failed or still in flight) is listed in `stale`. Without a `session` one is opened
+    for this call only; pass ScannerSession's to reuse connections across refreshes.
+    """
+    if session is None:
+        async with open_session(max_concurrency) as session:
+            return await refresh(symbols, exchange, screener, interval, indicators, chunk_size, max_concurrency,
+                                 request_timeout, deadline, max_attempts, base_url, session)
+
+    started = time.monotonic()
+    unique_symbols = list(dict.fromkeys(symbols))
+    url = tv_scanner.scan_url(screener, base_url)
+    columns, keys = tv_scanner.scan_columns(indicators, interval)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = {}
+    missing = []
+    errors = Counter()
+
+    tasks = {
+        asyncio.create_task(_post_chunk(
+            session, semaphore, url,
+            tv_scanner.scan_payload([f"{exchange}:{symbol}" for symbol in chunk], columns),
+            keys, request_timeout, max_attempts
+        )): chunk
+        for chunk in tv_scanner.chunked(unique_symbols, chunk_size)
+    }
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+            errors["deadline"] += len(tasks[task])
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if task.cancelled() or task.exception() is not None:
+                errors["api_error"] += len(tasks[task])
+                continue
+            chunk_results, cause = task.result()
+            if cause is not None:
+                errors[cause] += len(tasks[task])
+                continue
+            results.update(chunk_results)
+            missing.extend(symbol for symbol in tasks[task] if symbol not in chunk_results)
+        if pending:
+            logger.warning("Refresh deadline of %ss hit with %d chunks in flight", deadline, len(pending))
+
+    stale = [symbol for symbol in unique_symbols if symbol not in results]
+    elapsed = time.monotonic() - started
+    metrics.observe("refresh_seconds", elapsed)
+    return RefreshResult(results, stale, elapsed, missing, dict(errors))
+
+def run_refresh(*args, **kwargs):
+    return asyncio.run(refresh(*args, **kwargs))
+
+class ScannerSession:
+    """One keep-alive connection pool for every refresh of a process.
+
+    An aiohttp session belongs to the event loop it was opened on, and run_refresh starts a
+    new loop per call, so the session and its loop live on a daemon thread instead and
+    refresh() may be called from any thread. Close it on shutdown.
+    """
+    def __init__(self, max_concurrency=MAX_CONCURRENCY):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="scanner-session", daemon=True)
+        self._thread.start()
+        self.session = self._call(self._open(max_concurrency))
+
+    @staticmethod
+    async def _open(max_concurrency):
+        return open_session(max_concurrency)
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def refresh(self, *args, **kwargs):
+        """run_refresh on the shared session."""
+        return self._call(refresh(*args, session=self.session, **kwargs))
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._call(self.session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,33 @@
+"""Atomic file replacement for caches, snapshots and state files.
+
+Content is written to a temporary file in the target's directory and renamed over the
+target only once it is complete, so readers see the previous file or the new one, never
+a partial write. Temporary names start with a dot, which the archive and other directory
+scans skip.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+@contextmanager
+def replacing(path):
+    """Yield a temporary path that replaces `path` when the block exits cleanly and is
+    removed when it raises."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+@contextmanager
+def open_replacing(path, mode="w", **kwargs):
+    """`open()` for writing, with `path` replaced atomically on a clean exit."""
+    with replacing(path) as tmp_path:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
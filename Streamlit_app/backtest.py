@@ -0,0 +1,170 @@
+"""Grid bot backtester over historical OHLCV.
+
+Replays candles through one or many grids at once. Every grid parameter may be a scalar or
+an array with one entry per combination, so thousands of settings for the same symbol are
+evaluated in a single pass over the bars.
+
+Fill model, per bar and per combination:
+  * Levels run from entry_point towards take_profit every grid_size, at most num_grids.
+    A LONG grid buys at a level and sells one grid_size higher; a SHORT grid mirrors it.
+  * The adverse side of the bar is processed first: resting orders fill at their level, or
+    at the open if the bar gapped through it, then the stop loss closes everything.
+  * The favourable side is processed next: positions opened before this bar take profit
+    at level +/- grid_size, then take_profit closes everything.
+  * Every fill pays fee_rate on its notional. Each level trades capital / num_grids.
+"""
+import numpy as np
+
+import grid_engine
+
+# Configuration
+CAPITAL = 1000.0
+FEE_RATE = 0.00055
+MAX_LEVELS = 100
+
+def _broadcast(value, combos, dtype=np.float64):
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (combos,)).copy()
+
+def _close_all(mask, exit_price, holding, qty, entry_px, realized, fees, fills, position_qty, position_cost, fee_rate):
+    # Flatten every open level of the combinations in `mask` at `exit_price`, in place.
+    rows, cols = np.nonzero(holding & mask[:, None])
+    if len(rows):
+        combos = len(mask)
+        exit_px = exit_price[rows]
+        size = qty[rows, cols]
+        realized += np.bincount(rows, size * (exit_px - entry_px[rows, cols]), combos)
+        fees += np.bincount(rows, size * np.abs(exit_px), combos) * fee_rate
+        fills += np.bincount(rows, minlength=combos)
+        holding[rows, cols] = False
+    position_qty[mask] = 0.0
+    position_cost[mask] = 0.0
+
+def backtest_grid(open_, high, low, close, entry_point, grid_size, num_grids, stop_loss, take_profit,
+                  direction=grid_engine.LONG, capital=CAPITAL, fee_rate=FEE_RATE, record_equity=False):
+    open_, high, low, close = (np.asarray(values, dtype=np.float64) for values in (open_, high, low, close))
+    combos = max(np.size(value) for value in (entry_point, grid_size, num_grids, stop_loss, take_profit, direction, capital))
+
+    direction = _broadcast(direction, combos, np.int8)
+    sign = np.where(direction == grid_engine.SHORT, -1.0, 1.0)
+    is_long = sign > 0
+    # Work in "signed price" space where a SHORT grid behaves exactly like a LONG one.
+    entry = sign * _broadcast(entry_point, combos)
+    step = _broadcast(grid_size, combos)
+    count = np.nan_to_num(_broadcast(num_grids, combos), nan=0).astype(np.int64)
+    stop = sign * _broadcast(stop_loss, combos)
+    target = sign * _broadcast(take_profit, combos)
+    notional = _broadcast(capital, combos) / np.maximum(count, 1)
+
+    max_levels = int(min(MAX_LEVELS, count.max(initial=0)))
+    k = np.arange(max_levels)
+    levels = entry[:, None] + k[None, :] * step[:, None]
+    targets = levels + step[:, None]
+    valid = (k[None, :] < count[:, None]) & (levels <= target[:, None]) & (step[:, None] > 0)
+    valid &= ~np.isnan(levels)
+
+    holding = np.zeros((combos, max_levels), dtype=bool)
+    entry_px = np.zeros((combos, max_levels))
+    qty = np.zeros((combos, max_levels))
+    active = valid.any(axis=1) & (direction != grid_engine.NEUTRAL)
+    stopped = np.zeros(combos, dtype=bool)
+    finished_at = np.full(combos, -1, dtype=np.int64)
+    realized = np.zeros(combos)
+    fees = np.zeros(combos)
+    fills = np.zeros(combos, dtype=np.int64)
+    round_trips = np.zeros(combos, dtype=np.int64)
+    # Running totals of the open levels so marking to market each bar is O(combos).
+    position_qty = np.zeros(combos)
+    position_cost = np.zeros(combos)
+    peak = np.zeros(combos)
+    max_drawdown = np.zeros(combos)
+    equity_curve = np.empty((combos, len(close))) if record_equity else None
+
+    for t in range(len(close)):
+        o = sign * open_[t]
+        adverse = np.where(is_long, low[t], -high[t])
+        favourable = np.where(is_long, high[t], -low[t])
+
+        # Adverse move: resting entry orders fill. Only the few cells that trade are touched.
+        opened = valid & ~holding & (adverse[:, None] <= levels) & active[:, None]
+        rows, cols = np.nonzero(opened)
+        if len(rows):
+            fill = np.minimum(levels[rows, cols], o[rows])
+            size = notional[rows] / np.abs(fill)
+            entry_px[rows, cols] = fill
+            qty[rows, cols] = size
+            fees += np.bincount(rows, size * np.abs(fill), combos) * fee_rate
+            position_qty += np.bincount(rows, size, combos)
+            position_cost += np.bincount(rows, size * fill, combos)
+            fills += np.bincount(rows, minlength=combos)
+            holding[rows, cols] = True
+
+        # Stop loss closes every open level at once.
+        hit = active & (adverse <= stop)
+        if hit.any():
+            _close_all(hit, np.minimum(stop, o), holding, qty, entry_px, realized, fees, fills, position_qty, position_cost, fee_rate)
+            active &= ~hit
+            stopped |= hit
+            finished_at[hit] = t
+
+        # Favourable move: levels held from earlier bars take their grid profit.
+        closing = holding & (favourable[:, None] >= targets) & active[:, None]
+        closing[rows, cols] = False
+        rows, cols = np.nonzero(closing)
+        if len(rows):
+            exit_px = np.maximum(targets[rows, cols], o[rows])
+            size = qty[rows, cols]
+            realized += np.bincount(rows, size * (exit_px - entry_px[rows, cols]), combos)
+            fees += np.bincount(rows, size * np.abs(exit_px), combos) * fee_rate
+            position_qty -= np.bincount(rows, size, combos)
+            position_cost -= np.bincount(rows, size * entry_px[rows, cols], combos)
+            closed = np.bincount(rows, minlength=combos)
+            fills += closed
+            round_trips += closed
+            holding[rows, cols] = False
+
+        # Take profit closes whatever is still open and ends the grid.
+        done = active & (favourable >= target)
+        if done.any():
+            _close_all(done, np.maximum(target, o), holding, qty, entry_px, realized, fees, fills, position_qty, position_cost, fee_rate)
+            active &= ~done
+            finished_at[done] = t
+
+        equity = realized - fees + position_qty * (sign * close[t]) - position_cost
+        np.maximum(peak, equity, out=peak)
+        np.maximum(max_drawdown, peak - equity, out=max_drawdown)
+        if record_equity:
+            equity_curve[:, t] = equity
+
+    last_close = sign * close[-1] if len(close) else sign * 0.0
+    unrealized = np.where(holding, qty * (last_close[:, None] - entry_px), 0.0).sum(axis=1)
+    net_profit = realized - fees + unrealized
+    capital = _broadcast(capital, combos)
+
+    result = {
+        "fills": fills,
+        "round_trips": round_trips,
+        "realized_profit": realized,
+        "fees": fees,
+        "unrealized_profit": unrealized,
+        "net_profit": net_profit,
+        "return_pct": net_profit / capital * 100.0,
+        "max_drawdown": max_drawdown,
+        "max_drawdown_pct": max_drawdown / capital * 100.0,
+        "stopped": stopped,
+        "finished_at": finished_at,
+        "open_levels": holding.sum(axis=1),
+    }
+    if record_equity:
+        result["equity"] = equity_curve
+    return result
+
+def backtest_settings(candles, settings, direction, capital=CAPITAL, fee_rate=FEE_RATE, record_equity=False):
+    """Backtest one optimize_grid_settings result (Decimal or float values) over `candles`."""
+    signal = {"LONG": grid_engine.LONG, "SHORT": grid_engine.SHORT}.get(direction, direction)
+    result = backtest_grid(
+        candles["open"], candles["high"], candles["low"], candles["close"],
+        float(settings["entry_point"]), float(settings["grid_size"]), int(settings["num_grids"]),
+        float(settings["stop_loss"]), float(settings["take_profit"]),
+        direction=signal, capital=capital, fee_rate=fee_rate, record_equity=record_equity
+    )
+    return {key: value[0] for key, value in result.items()}
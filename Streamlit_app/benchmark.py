@@ -0,0 +1,260 @@
+"""Reproducible benchmarks for the fetch and compute paths.
+
+Everything runs offline: refreshes go to an in-process stub_server (synthetic values, or
+responses recorded with `stub_server.py --record`) and candles are a seeded random walk,
+so two runs on the same machine differ only by the code under test. Results are written
+as JSON with p50/p99 latency and throughput per case:
+
+    python benchmark.py --output before.json
+    python benchmark.py --only indicators --bars 1000 1000000
+    python benchmark.py --latency 0.05 --error-rate 0.05 --fixtures fixtures/
+    python benchmark.py --compare before.json after.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+import async_scanner
+import candle_store
+import collector
+import grid_engine
+import indicator_cache
+import indicators
+import metrics
+import stub_server
+from universe import symbols as universe_symbols
+
+# Configuration
+REPEATS = 5
+WARMUP = 1
+# Fast cases keep sampling until this much time is spent, so p99 is more than the max of five runs.
+MIN_SAMPLE_SECONDS = 1.0
+MAX_SAMPLES = 1000
+SEED = 42
+UNIVERSE_SIZE = 700
+BAR_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SCREEN_BARS = 500
+SUITES = ("refresh", "indicators", "screen")
+
+def bench_symbols(count):
+    """The first `count` universe symbols, padded with synthetic ones for larger universes."""
+    unique = list(dict.fromkeys(universe_symbols))[:count]
+    return unique + [f"SYN{i:04d}USDT.P" for i in range(count - len(unique))]
+
+def synthetic_candles(rows, bars, seed=SEED, step_ms=4 * 60 * 60 * 1000):
+    """Seeded geometric random walk as {column: (rows, bars) array}, like CandleStore.load_matrix."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.01, 1000, size=(rows, 1))
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.01, size=(rows, bars)), axis=1))
+    open_ = np.concatenate([base, close[:, :-1]], axis=1)
+    spread = np.abs(rng.normal(0, 0.005, size=(rows, bars)))
+    return {
+        "timestamp": np.arange(bars, dtype=np.int64) * step_ms + 1_600_000_000_000,
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": rng.uniform(1_000, 1_000_000, size=(rows, bars)),
+    }
+
+def measure(name, func, items, unit, repeats=REPEATS, warmup=WARMUP, **params):
+    """Time `func` at least `repeats` times and report latency percentiles and `items` per
+    second at the median."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    while len(samples) < repeats or (sum(samples) < MIN_SAMPLE_SECONDS and len(samples) < MAX_SAMPLES):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    samples = np.array(samples)
+    p50 = float(np.percentile(samples, 50))
+    result = {
+        "name": name,
+        "params": params,
+        "samples": len(samples),
+        "p50_ms": p50 * 1000,
+        "p99_ms": float(np.percentile(samples, 99)) * 1000,
+        "mean_ms": float(samples.mean()) * 1000,
+        "min_ms": float(samples.min()) * 1000,
+        "throughput": items / p50 if p50 > 0 else None,
+        "unit": unit,
+    }
+    logging.info("%-28s %-40s p50 %9.2f ms  p99 %9.2f ms", name, json.dumps(params), result["p50_ms"], result["p99_ms"])
+    return result
+
+def bench_refresh(repeats, universe_size, latency=0.0, error_rate=0.0, fixtures=None):
+    """Full-universe collect_snapshot against the stub, with a cold and a warm indicator cache."""
+    server = stub_server.start_server(
+        latency=latency, error_rate=error_rate,
+        fixtures=stub_server.load_fixtures(fixtures) if fixtures else None
+    )
+    base_url = f"http://127.0.0.1:{server.server_port}/"
+    symbols = bench_symbols(universe_size)
+    params = {"symbols": universe_size, "latency": latency, "error_rate": error_rate, "fixtures": bool(fixtures)}
+    # One session for every run, as the collector keeps it across refreshes.
+    scanner = async_scanner.ScannerSession()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            runs = itertools.count()
+
+            def cold():
+                cache = indicator_cache.IndicatorCache(os.path.join(directory, f"cold-{next(runs)}.db"))
+                collector.collect_snapshot(cache, universe_symbols=symbols, base_url=base_url, scanner=scanner)
+
+            warm_cache = indicator_cache.IndicatorCache(os.path.join(directory, "warm.db"))
+            collector.collect_snapshot(warm_cache, universe_symbols=symbols, base_url=base_url, scanner=scanner)
+            return [
+                measure("refresh_cold", cold, universe_size, "symbols/s", repeats, **params),
+                measure("refresh_warm", lambda: collector.collect_snapshot(warm_cache, universe_symbols=symbols, base_url=base_url,
+                                                                           scanner=scanner),
+                        universe_size, "symbols/s", repeats, **params),
+            ]
+    finally:
+        scanner.close()
+        server.shutdown()
+        server.server_close()
+
+def bench_indicators(repeats, bar_sizes):
+    """Indicator kernels and calculate_weighted_atr on one symbol with `bars` candles."""
+    import mavbook
+
+    results = []
+    for bars in bar_sizes:
+        candles = {column: values[0] if np.ndim(values) == 2 else values for column, values in synthetic_candles(1, bars).items()}
+        high, low, close, volume = candles["high"], candles["low"], candles["close"], candles["volume"]
+        frame = pd.DataFrame({column: candles[column] for column in ("open", "high", "low", "close", "volume")})
+        cases = {
+            "rsi": lambda: indicators.rsi(close),
+            "atr": lambda: indicators.atr(high, low, close),
+            "volume_weighted_atr": lambda: indicators.volume_weighted_atr(high, low, close, volume),
+            "calculate_weighted_atr": lambda: mavbook.calculate_weighted_atr({"1d": frame, "4h": frame}),
+        }
+        for name, func in cases.items():
+            results.append(measure(name, func, bars, "bars/s", repeats, bars=bars))
+    return results
+
+def bench_screen(repeats, universe_size, bars=SCREEN_BARS):
+    """Pivot/grid screening of the universe: vectorized, from the candle store, and per symbol."""
+    import mavbook
+
+    symbols = bench_symbols(universe_size)
+    daily = synthetic_candles(universe_size, bars, SEED, 24 * 60 * 60 * 1000)
+    four_hour = synthetic_candles(universe_size, bars, SEED + 1)
+    atr = indicators.volume_weighted_atr(four_hour["high"], four_hour["low"], four_hour["close"], four_hour["volume"], grid_engine.ATR_WINDOW)
+    high, low, close = daily["high"][:, -1], daily["low"][:, -1], daily["close"][:, -1]
+    price = four_hour["close"][:, -1]
+    decimals = [
+        tuple(Decimal(str(value)) for value in row)
+        for row in zip(high, low, close, price, atr)
+    ]
+
+    def per_symbol():
+        # The Decimal path mavbook's grid_optimization_page runs for one symbol at a time.
+        for h, l, c, p, a in decimals:
+            pivots = mavbook.calculate_pivot_points(h, l, c)
+            recommendation = mavbook.get_recommendation(p, pivots['r1'], pivots['s1'])
+            mavbook.optimize_grid_settings(p, a, recommendation, pivots['s1'], pivots['r1'])
+
+    params = {"symbols": universe_size, "bars": bars}
+    results = [
+        measure("screen_vectorized", lambda: grid_engine.screen(symbols, high, low, close, price, atr),
+                universe_size, "symbols/s", repeats, **params),
+        measure("screen_per_symbol", per_symbol, universe_size, "symbols/s", repeats, **params),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        store = candle_store.CandleStore(directory)
+        for row, symbol in enumerate(symbols):
+            for interval, candles in (("1d", daily), ("4h", four_hour)):
+                store.append(symbol, interval, {
+                    column: values if column == "timestamp" else values[row] for column, values in candles.items()
+                })
+        results.append(measure("screen_store", lambda: grid_engine.screen_store(store, symbols),
+                               universe_size, "symbols/s", repeats, **params))
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def run(suites=SUITES, repeats=REPEATS, universe_size=UNIVERSE_SIZE, bar_sizes=BAR_SIZES,
+        latency=0.0, error_rate=0.0, fixtures=None):
+    results = []
+    if "refresh" in suites:
+        results += bench_refresh(repeats, universe_size, latency, error_rate, fixtures)
+    if "indicators" in suites:
+        results += bench_indicators(repeats, bar_sizes)
+    if "screen" in suites:
+        results += bench_screen(repeats, universe_size)
+    return {"environment": environment(), "results": results}
+
+def _case_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+def compare(before, after):
+    """Rows of (name, params, p50 before, p50 after, after/before) for cases in both reports."""
+    previous = {_case_key(result): result for result in before["results"]}
+    rows = []
+    for result in after["results"]:
+        old = previous.get(_case_key(result))
+        if old:
+            rows.append((result["name"], _case_key(result)[1], old["p50_ms"], result["p50_ms"], result["p50_ms"] / old["p50_ms"]))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch and compute paths offline")
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--symbols", type=int, default=UNIVERSE_SIZE, help="Universe size for refresh and screening")
+    parser.add_argument("--bars", type=int, nargs="+", default=list(BAR_SIZES), help="Candle counts for the indicator suite")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses from the stub")
+    parser.add_argument("--fixtures", help="Replay responses recorded with stub_server.py --record")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two reports and exit")
+    args = parser.parse_args()
+
+    metrics.configure_logging()
+    # Injected errors would otherwise log every retry between the result lines.
+    logging.getLogger("async_scanner").setLevel(logging.WARNING)
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path) as f:
+                reports.append(json.load(f))
+        for name, params, before, after, ratio in compare(*reports):
+            print(f"{name:28s} {params:50s} {before:10.2f} ms -> {after:10.2f} ms  x{ratio:.2f}")
+        return
+
+    report = run(args.only, args.repeats, args.symbols, args.bars, args.latency, args.error_rate, args.fixtures)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Live Bybit public ticker and kline streams.
+
+BybitStream keeps a WebSocket connection per shard of symbols in a background thread and
+applies every message to a shared MarketState: the last traded price per symbol and a
+rolling window of candles. Connections reconnect with backoff and resubscribe on their own.
+
+Raw messages can be recorded to a JSON-lines file and replayed offline with ReplayStream:
+
+    python bybit_stream.py --record ticks.jsonl --seconds 60 BTCUSDT.P ETHUSDT.P
+    python bybit_stream.py --replay ticks.jsonl
+
+The Streamlit pages call open_stream(), which follows CRYPTO_STREAM: "live" (default),
+"off", or "replay:<path>" to loop a recording at its original pace.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import websocket
+
+import candle_store
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+STREAM_URL = "wss://stream.bybit.com/v5/public/linear"
+KLINE_INTERVAL = "1"
+ROLLING_CANDLES = 240
+SYMBOLS_PER_CONNECTION = 100
+TOPICS_PER_REQUEST = 10
+PING_EVERY = 20
+RECONNECT_BASE = 1.0
+RECONNECT_CAP = 60.0
+STREAM_MODE = os.environ.get("CRYPTO_STREAM", "live")
+
+TICKER_FIELDS = {
+    "lastPrice": "last_price",
+    "markPrice": "mark_price",
+    "bid1Price": "bid",
+    "ask1Price": "ask",
+    "price24hPcnt": "change_24h",
+    "turnover24h": "turnover_24h",
+}
+
+class MarketState:
+    """Thread-safe last price and rolling candle table keyed by Bybit symbol."""
+
+    def __init__(self, rolling_candles=ROLLING_CANDLES, kline_interval=KLINE_INTERVAL):
+        self._lock = threading.Lock()
+        self._tickers = {}
+        self._candles = {}
+        self._forming = {}
+        self._listeners = {}
+        self.rolling_candles = rolling_candles
+        self.kline_interval = kline_interval
+        self.messages = 0
+
+    def add_listener(self, callback, interval=KLINE_INTERVAL):
+        """Call `callback(symbol, candle)` for every confirmed candle of the Bybit `interval`.
+
+        Intervals other than `kline_interval` only reach listeners; the stream must be
+        opened with them in `kline_intervals`.
+        """
+        self._listeners.setdefault(interval, []).append(callback)
+
+    def handle_message(self, message):
+        topic = message.get("topic", "")
+        if topic.startswith("tickers."):
+            self._apply_ticker(message["data"], message.get("ts"))
+        elif topic.startswith("kline."):
+            _, interval, symbol = topic.split(".", 2)
+            for candle in message.get("data", []):
+                self._apply_kline(symbol, candle, interval)
+        else:
+            return
+        self.messages += 1
+
+    def _apply_ticker(self, data, ts):
+        symbol = data.get("symbol")
+        if not symbol:
+            return
+        with self._lock:
+            ticker = self._tickers.setdefault(symbol, {})
+            # Deltas only carry the fields that changed.
+            for field, name in TICKER_FIELDS.items():
+                if data.get(field) not in (None, ""):
+                    ticker[name] = float(data[field])
+            ticker["updated_at"] = (ts or time.time() * 1000) / 1000
+
+    def _apply_kline(self, symbol, data, interval=KLINE_INTERVAL):
+        candle = {
+            "start": int(data["start"]),
+            "open": float(data["open"]),
+            "high": float(data["high"]),
+            "low": float(data["low"]),
+            "close": float(data["close"]),
+            "volume": float(data["volume"]),
+        }
+        if interval != self.kline_interval:
+            if data.get("confirm"):
+                for callback in self._listeners.get(interval, ()):
+                    callback(symbol, candle)
+            return
+        with self._lock:
+            history = self._candles.setdefault(symbol, deque(maxlen=self.rolling_candles))
+            if data.get("confirm"):
+                if not history or history[-1]["start"] < candle["start"]:
+                    history.append(candle)
+                self._forming.pop(symbol, None)
+            else:
+                self._forming[symbol] = candle
+            ticker = self._tickers.setdefault(symbol, {})
+            ticker.setdefault("last_price", candle["close"])
+        if data.get("confirm"):
+            for callback in self._listeners.get(interval, ()):
+                callback(symbol, candle)
+
+    def last_price(self, symbol):
+        with self._lock:
+            ticker = self._tickers.get(candle_store.to_bybit_symbol(symbol))
+            return None if ticker is None else ticker.get("last_price")
+
+    def ticker(self, symbol):
+        with self._lock:
+            return dict(self._tickers.get(candle_store.to_bybit_symbol(symbol), {}))
+
+    def tickers(self):
+        with self._lock:
+            return {symbol: dict(values) for symbol, values in self._tickers.items()}
+
+    def candles(self, symbol, include_forming=False):
+        symbol = candle_store.to_bybit_symbol(symbol)
+        with self._lock:
+            rows = list(self._candles.get(symbol, ()))
+            if include_forming and symbol in self._forming:
+                rows.append(dict(self._forming[symbol]))
+        return rows
+
+def subscription_topics(symbols, kline_intervals=(KLINE_INTERVAL,)):
+    topics = []
+    for symbol in dict.fromkeys(candle_store.to_bybit_symbol(symbol) for symbol in symbols):
+        topics.append(f"tickers.{symbol}")
+        topics.extend(f"kline.{interval}.{symbol}" for interval in kline_intervals)
+    return topics
+
+class _Connection:
+    def __init__(self, stream, topics):
+        self.stream = stream
+        self.topics = topics
+        self.app = None
+        self.connected = threading.Event()
+
+    def run(self):
+        attempt = 0
+        while not self.stream.stopped.is_set():
+            self.app = websocket.WebSocketApp(
+                self.stream.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=lambda app, error: logger.info("Stream error: %s", error),
+                on_close=lambda app, code, reason: self.connected.clear(),
+            )
+            started = time.monotonic()
+            self.app.run_forever()
+            self.connected.clear()
+            if self.stream.stopped.is_set():
+                break
+            # Reset the backoff once a connection has stayed up for a while.
+            attempt = 0 if time.monotonic() - started > RECONNECT_CAP else attempt + 1
+            delay = random.uniform(0, min(RECONNECT_CAP, RECONNECT_BASE * 2 ** attempt))
+            logger.info("Stream disconnected; reconnecting in %.1fs", delay)
+            self.stream.stopped.wait(delay)
+
+    def _on_open(self, app):
+        # A fresh connection has no subscriptions, so every reconnect resubscribes.
+        for start in range(0, len(self.topics), TOPICS_PER_REQUEST):
+            app.send(json.dumps({"op": "subscribe", "args": self.topics[start:start + TOPICS_PER_REQUEST]}))
+        self.connected.set()
+        threading.Thread(target=self._heartbeat, args=(app,), daemon=True).start()
+
+    def _heartbeat(self, app):
+        while self.connected.is_set() and not self.stream.stopped.wait(PING_EVERY):
+            try:
+                app.send(json.dumps({"op": "ping"}))
+            except websocket.WebSocketException:
+                return
+
+    def _on_message(self, app, raw):
+        self.stream.record(raw)
+        try:
+            self.stream.state.handle_message(json.loads(raw))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug("Ignoring malformed stream message: %s", e)
+
+class BybitStream:
+    def __init__(self, symbols, state=None, url=STREAM_URL, kline_intervals=(KLINE_INTERVAL,), record_path=None):
+        self.state = state or MarketState()
+        self.url = url
+        self.stopped = threading.Event()
+        self._record_lock = threading.Lock()
+        self._record_file = open(record_path, "a") if record_path else None
+        topics = subscription_topics(symbols, kline_intervals)
+        per_connection = (1 + len(kline_intervals)) * SYMBOLS_PER_CONNECTION
+        self._connections = [_Connection(self, topics[start:start + per_connection]) for start in range(0, len(topics), per_connection)]
+        self._threads = []
+
+    def record(self, raw):
+        if self._record_file is not None:
+            with self._record_lock:
+                self._record_file.write(raw.strip() + "\n")
+
+    def start(self):
+        for connection in self._connections:
+            thread = threading.Thread(target=connection.run, daemon=True, name="bybit-stream")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def connected(self):
+        return any(connection.connected.is_set() for connection in self._connections)
+
+    def stop(self):
+        self.stopped.set()
+        for connection in self._connections:
+            if connection.app is not None:
+                connection.app.close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self._record_file is not None:
+            self._record_file.close()
+
+class ReplayStream:
+    """Feed recorded messages into a MarketState, either at once or paced by their timestamps."""
+
+    def __init__(self, path, state=None, speed=None, loop=False):
+        self.path = path
+        self.state = state or MarketState()
+        self.speed = speed
+        self.loop = loop
+        self.stopped = threading.Event()
+        self._thread = None
+
+    def run(self):
+        while not self.stopped.is_set():
+            previous_ts = None
+            with open(self.path) as f:
+                for line in f:
+                    if self.stopped.is_set():
+                        return
+                    if not line.strip():
+                        continue
+                    message = json.loads(line)
+                    ts = message.get("ts")
+                    if self.speed and previous_ts is not None and ts is not None:
+                        self.stopped.wait(max(0.0, (ts - previous_ts) / 1000 / self.speed))
+                    previous_ts = ts if ts is not None else previous_ts
+                    self.state.handle_message(message)
+            if not self.loop:
+                return
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True, name="bybit-replay")
+        self._thread.start()
+        return self
+
+    def connected(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self.stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+def open_stream(symbols, mode=STREAM_MODE, kline_intervals=(KLINE_INTERVAL,)):
+    """Start the stream selected by `mode`, or return None when streaming is off.
+
+    `kline_intervals` are Bybit interval codes; candles of intervals other than
+    KLINE_INTERVAL go to MarketState listeners only.
+    """
+    if mode == "off":
+        return None
+    if mode.startswith("replay:"):
+        return ReplayStream(mode.split(":", 1)[1], speed=1.0, loop=True).start()
+    return BybitStream(symbols, kline_intervals=kline_intervals).start()
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream or replay Bybit tickers and klines")
+    parser.add_argument("symbols", nargs="*", help="Defaults to the whole universe")
+    parser.add_argument("--record", help="Append raw messages to this JSON-lines file")
+    parser.add_argument("--replay", help="Replay a recorded JSON-lines file instead of connecting")
+    parser.add_argument("--speed", type=float, default=None, help="Replay speed multiplier; omit to replay instantly")
+    parser.add_argument("--seconds", type=float, default=None, help="Stop after this many seconds")
+    args = parser.parse_args()
+
+    metrics.configure_logging()
+    if args.replay:
+        stream = ReplayStream(args.replay, speed=args.speed).start()
+    else:
+        from universe import symbols
+        stream = BybitStream(args.symbols or symbols, record_path=args.record).start()
+
+    started = time.monotonic()
+    try:
+        while stream.connected() or not args.replay:
+            if args.seconds is not None and time.monotonic() - started >= args.seconds:
+                break
+            time.sleep(1)
+            tickers = stream.state.tickers()
+            logger.info("%d messages, %d symbols priced", stream.state.messages, len(tickers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
+
+    for symbol, ticker in sorted(stream.state.tickers().items())[:20]:
+        print(f"{symbol:>20} {ticker.get('last_price')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Local OHLCV history downloaded from Bybit's public kline endpoint.
+
+Candles live under CANDLE_DIR/<interval>/<symbol>/ as one raw little-endian file per
+column. Only closed candles are stored and new ones are appended, so every column can be
+memory-mapped directly:
+
+    python candle_store.py --intervals 1d 4h
+"""
+import argparse
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+import health
+import indicator_cache
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CANDLE_DIR = os.environ.get("CRYPTO_CANDLE_DIR", os.path.join(indicator_cache.CACHE_DIR, "candles"))
+BYBIT_API = os.environ.get("BYBIT_API_URL", "https://api.bybit.com")
+CATEGORY = "linear"
+PAGE_LIMIT = 1000
+HISTORY_BARS = 1000
+REQUEST_TIMEOUT = 10
+MAX_WORKERS = 8
+# Kept apart from the scanner's health file: a symbol Bybit does not list may still be on TradingView.
+HEALTH_PATH = os.path.join(indicator_cache.CACHE_DIR, "candle_health.json")
+
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+BYBIT_INTERVALS = {
+    "1m": "1", "5m": "5", "15m": "15", "30m": "30",
+    "1h": "60", "2h": "120", "4h": "240",
+    "1d": "D", "1W": "W",
+}
+
+class BybitError(ValueError):
+    def __init__(self, message, ret_code=None):
+        super().__init__(message)
+        self.ret_code = ret_code
+
+def to_bybit_symbol(symbol):
+    # TradingView marks perpetuals with a ".P" suffix; Bybit uses the bare ticker.
+    symbol = symbol.split(":", 1)[-1].strip().upper()
+    return symbol[:-2] if symbol.endswith(".P") else symbol
+
+def interval_ms(interval):
+    return int(indicator_cache.INTERVAL_SECONDS[interval] * 1000)
+
+def fetch_klines(symbol, interval, start_ms=None, session=None, base_url=BYBIT_API):
+    """Download closed candles for `symbol` from `start_ms` onwards, oldest first."""
+    session = session or requests
+    step = interval_ms(interval)
+    now_ms = int(time.time() * 1000)
+    if start_ms is None:
+        start_ms = now_ms - HISTORY_BARS * step
+    rows = []
+    end_ms = now_ms
+
+    # Bybit returns the newest `limit` candles in [start, end], so page backwards from now.
+    while end_ms >= start_ms:
+        response = session.get(f"{base_url}/v5/market/kline", params={
+            "category": CATEGORY,
+            "symbol": to_bybit_symbol(symbol),
+            "interval": BYBIT_INTERVALS[interval],
+            "start": start_ms,
+            "end": end_ms,
+            "limit": PAGE_LIMIT,
+        }, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("retCode") != 0:
+            raise BybitError(f"Bybit kline error for {symbol}: {payload.get('retMsg')}", payload.get("retCode"))
+        page = payload["result"]["list"]
+        rows.extend(page)
+        if len(page) < PAGE_LIMIT:
+            break
+        end_ms = min(int(row[0]) for row in page) - 1
+
+    rows.sort(key=lambda row: int(row[0]))
+    # Drop the candle that is still forming; the store only holds closed bars.
+    closed = [row for row in rows if int(row[0]) + step <= now_ms]
+    return {
+        "timestamp": np.array([int(row[0]) for row in closed], dtype=COLUMNS["timestamp"]),
+        "open": np.array([float(row[1]) for row in closed], dtype=COLUMNS["open"]),
+        "high": np.array([float(row[2]) for row in closed], dtype=COLUMNS["high"]),
+        "low": np.array([float(row[3]) for row in closed], dtype=COLUMNS["low"]),
+        "close": np.array([float(row[4]) for row in closed], dtype=COLUMNS["close"]),
+        "volume": np.array([float(row[5]) for row in closed], dtype=COLUMNS["volume"]),
+    }
+
+class CandleStore:
+    def __init__(self, root=CANDLE_DIR):
+        self.root = root
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, interval, to_bybit_symbol(symbol))
+
+    def _column_path(self, symbol, interval, column):
+        return os.path.join(self._dir(symbol, interval), f"{column}.bin")
+
+    def length(self, symbol, interval):
+        # A crash mid-append can leave columns uneven; the shortest column wins.
+        lengths = []
+        for column, dtype in COLUMNS.items():
+            try:
+                lengths.append(os.path.getsize(self._column_path(symbol, interval, column)) // dtype.itemsize)
+            except FileNotFoundError:
+                return 0
+        return min(lengths)
+
+    def load(self, symbol, interval):
+        """Return {column: read-only memory-mapped array} for the stored candles."""
+        n = self.length(symbol, interval)
+        if n == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        return {
+            column: np.memmap(self._column_path(symbol, interval, column), dtype=dtype, mode="r", shape=(n,))
+            for column, dtype in COLUMNS.items()
+        }
+
+    def last_timestamp(self, symbol, interval):
+        n = self.length(symbol, interval)
+        if n == 0:
+            return None
+        with open(self._column_path(symbol, interval, "timestamp"), "rb") as f:
+            f.seek((n - 1) * COLUMNS["timestamp"].itemsize)
+            return int(np.frombuffer(f.read(COLUMNS["timestamp"].itemsize), dtype=COLUMNS["timestamp"])[0])
+
+    def append(self, symbol, interval, candles):
+        last = self.last_timestamp(symbol, interval)
+        keep = candles["timestamp"] > (last if last is not None else -1)
+        if not keep.any():
+            return 0
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        n = self.length(symbol, interval)
+        for column, dtype in COLUMNS.items():
+            path = self._column_path(symbol, interval, column)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # Trim any partial tail from an interrupted append before writing.
+                f.truncate(n * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(candles[column][keep], dtype=dtype).tobytes())
+        return int(keep.sum())
+
+    def needs_update(self, symbol, interval, now=None):
+        last = self.last_timestamp(symbol, interval)
+        if last is None:
+            return True
+        now_ms = int((time.time() if now is None else now) * 1000)
+        # The next candle after `last` has closed once two intervals have passed since it opened.
+        return last + 2 * interval_ms(interval) <= now_ms
+
+    def update(self, symbol, interval, session=None, base_url=BYBIT_API):
+        if not self.needs_update(symbol, interval):
+            return 0
+        last = self.last_timestamp(symbol, interval)
+        start_ms = None if last is None else last + interval_ms(interval)
+        return self.append(symbol, interval, fetch_klines(symbol, interval, start_ms, session, base_url))
+
+    def update_many(self, symbols, intervals, max_workers=MAX_WORKERS, base_url=BYBIT_API, tracker=None):
+        session = requests.Session()
+        tracker = tracker or health.HealthTracker()
+        # Symbols with an open breaker are skipped so they do not occupy a worker.
+        allowed, skipped = tracker.allowed(list(dict.fromkeys(symbols)))
+        jobs = [(symbol, interval) for symbol in allowed for interval in intervals]
+
+        def run(job):
+            started = time.perf_counter()
+            # executor.map submits every job up front, so this is the time spent queued.
+            metrics.observe("queue_wait_seconds", started - submitted, pool="candles")
+            try:
+                appended = self.update(job[0], job[1], session, base_url)
+            except (requests.RequestException, ValueError) as e:
+                cause = health.classify(e)
+                metrics.observe("fetch_seconds", time.perf_counter() - started, source="candles", outcome=cause)
+                logger.debug("Candle update failed for %s %s: %s", job[0], job[1], e)
+                return 0, cause
+            metrics.observe("fetch_seconds", time.perf_counter() - started, source="candles", outcome="ok")
+            return appended, None
+
+        submitted = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(run, jobs))
+
+        errors = Counter(cause for _, cause in outcomes if cause)
+        failed = {job[0]: cause for job, (_, cause) in zip(jobs, outcomes) if cause}
+        tracker.record_success([symbol for symbol in allowed if symbol not in failed])
+        # Only an unknown symbol is the symbol's fault; anything else is counted for the batch.
+        tracker.record_failure([symbol for symbol, cause in failed.items() if cause == "not_found"], "not_found")
+        tracker.record_errors({cause: count for cause, count in errors.items() if cause != "not_found"})
+        if errors or skipped:
+            logger.warning("Candle update: %d of %d jobs failed %s; %d symbols skipped while cooling down",
+                           sum(errors.values()), len(jobs), dict(errors), len(skipped))
+        return sum(appended for appended, _ in outcomes)
+
+    def read_tail(self, symbol, interval, column, bars, length=None):
+        n = self.length(symbol, interval) if length is None else length
+        count = min(bars, n)
+        if count == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        dtype = COLUMNS[column]
+        return np.fromfile(self._column_path(symbol, interval, column), dtype=dtype, count=count, offset=(n - count) * dtype.itemsize)
+
+    def load_matrix(self, symbols, interval, bars, columns=("open", "high", "low", "close", "volume")):
+        """Stack the last `bars` candles of each symbol into (symbols, bars) arrays.
+
+        Rows are right-aligned on the most recent bar and NaN-padded on the left when a
+        symbol has less history.
+        """
+        matrix = {column: np.full((len(symbols), bars), np.nan) for column in columns}
+        for row, symbol in enumerate(symbols):
+            n = self.length(symbol, interval)
+            if n == 0:
+                continue
+            for column in columns:
+                tail = self.read_tail(symbol, interval, column, bars, n)
+                matrix[column][row, bars - len(tail):] = tail
+        return matrix
+
+def main():
+    from universe import symbols
+
+    parser = argparse.ArgumentParser(description="Download OHLCV history into the local candle store")
+    parser.add_argument("--intervals", nargs="+", default=["1d", "4h"], choices=sorted(BYBIT_INTERVALS))
+    parser.add_argument("--symbols", nargs="*", help="Defaults to the whole universe")
+    args = parser.parse_args()
+
+    metrics.configure_logging()
+    store = CandleStore()
+    tracker = health.HealthTracker.load(HEALTH_PATH)
+    started = time.monotonic()
+    appended = store.update_many(args.symbols or symbols, args.intervals, tracker=tracker)
+    tracker.save(HEALTH_PATH)
+    logger.info("Appended %d candles in %.1fs", appended, time.monotonic() - started)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Pre-aggregated Plotly figures for the dashboard.
+
+Histograms are binned here and sent as RSI_BINS bars, and per-symbol scatters keep at most
+MAX_POINTS markers, so the browser payload and the figure build time stay flat however
+large the universe grows. The figures are plain graph_objects; callers cache them.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+# Configuration
+RSI_BINS = 50
+RSI_RANGE = (0, 100)
+MAX_POINTS = 150
+OVERSOLD = 30
+OVERBOUGHT = 70
+THEME = dict(plot_bgcolor='#1E1E1E', paper_bgcolor='#1E1E1E', font_color='white')
+
+def bin_counts(values, bins=RSI_BINS, value_range=RSI_RANGE):
+    """(counts, edges) of the non-NaN `values` over fixed bins."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.histogram(values[~np.isnan(values)], bins=bins, range=value_range)
+
+def histogram_figure(counts, edges, title, overlay=None):
+    """Bar chart of pre-binned counts; `overlay` is (name, counts) on the same edges."""
+    centers = (edges[:-1] + edges[1:]) / 2
+    widths = np.diff(edges)
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=widths, name='Now', marker_color='#8A2BE2'))
+    if overlay is not None:
+        name, overlay_counts = overlay
+        fig.add_bar(x=centers, y=overlay_counts, width=widths, name=name, marker_color='#AAAAAA', opacity=0.5)
+        fig.update_layout(barmode='overlay')
+    fig.add_vline(x=OVERSOLD, line_dash="dash", line_color="#FF4136", annotation_text="Oversold")
+    fig.add_vline(x=OVERBOUGHT, line_dash="dash", line_color="#2ECC40", annotation_text="Overbought")
+    fig.update_layout(title=title, xaxis_title='RSI Value', yaxis_title='Number of Symbols', bargap=0, **THEME)
+    return fig
+
+def downsample(frame, max_points=MAX_POINTS):
+    """Evenly spaced rows of an already sorted frame, always keeping the first and last."""
+    if len(frame) <= max_points:
+        return frame
+    rows = np.unique(np.linspace(0, len(frame) - 1, max_points).round().astype(int))
+    return frame.iloc[rows]
+
+def symbol_scatter(frame, column, title, max_points=MAX_POINTS):
+    """One marker per symbol of a frame sorted by `column`, thinned to `max_points`."""
+    sample = downsample(frame, max_points)
+    fig = go.Figure(go.Scatter(
+        x=sample['Symbol'].astype(str), y=sample[column], mode='markers',
+        marker=dict(size=10, color=sample[column], colorscale='Viridis', showscale=True, colorbar=dict(title=column)),
+    ))
+    if len(sample) < len(frame):
+        title = f"{title} ({len(sample)} of {len(frame)} shown)"
+    fig.update_layout(title=title, xaxis_tickangle=-45, xaxis_title='Symbol', yaxis_title=column, **THEME)
+    return fig
@@ -0,0 +1,176 @@
+"""Background collector for the crypto_selector universe.
+
+Refreshes indicator values on a schedule and publishes each result as an atomic snapshot
+that the Streamlit pages read without touching the network. Every indicator is collected
+on every timeframe in TIMEFRAMES in the same scanner requests and stored as one wide row
+per symbol ("15m RSI", "1h RSI", "4h RSI", ...):
+
+    python collector.py --every 60
+    python collector.py --once
+    python collector.py --alerts rules.json --alert-sink file:alerts.jsonl
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import alerts
+import async_scanner
+import bybit_stream
+import candle_store
+import health
+import indicator_cache
+import metrics
+import snapshot_archive
+import snapshot_store
+from universe import symbols, exchange, screener
+
+logger = logging.getLogger("collector")
+
+# Configuration
+REFRESH_EVERY = 60
+TIMEFRAMES = ("15m", "1h", "4h", "1d")
+INDICATORS = ("RSI", "Stoch.K", "ADX", "change", "close")
+# Prices need more digits than float32 keeps.
+FLOAT64_INDICATORS = ("close",)
+
+def timeframe_column(interval, indicator):
+    return f"{interval} {indicator}"
+
+def collect_snapshot(cache, timeframes=TIMEFRAMES, indicators=INDICATORS, tracker=None, universe_symbols=None, base_url=None,
+                     scanner=None):
+    """One wide snapshot of the universe. A `scanner` (async_scanner.ScannerSession) keeps
+    connections open between calls; without one every refresh opens its own."""
+    tracker = tracker or health.HealthTracker()
+    run_refresh = scanner.refresh if scanner is not None else async_scanner.run_refresh
+    unique_symbols = list(dict.fromkeys(universe_symbols or symbols))
+    entries = {}
+    expired_intervals = {}
+    for interval in timeframes:
+        entries[interval], expired = cache.get_many(unique_symbols, exchange, interval, list(indicators))
+        metrics.inc("indicator_cache_lookups_total", len(entries[interval]), interval=interval, result="hit")
+        metrics.inc("indicator_cache_lookups_total", len(expired), interval=interval, result="miss")
+        for symbol in expired:
+            expired_intervals.setdefault(symbol, []).append(interval)
+
+    # Each candle interval expires on its own schedule, so symbols are grouped by the set of
+    # intervals that closed since they were cached and each group is one multi-interval refresh.
+    # Symbols whose breaker is open are left stale and take no request slots.
+    to_fetch, skipped = tracker.allowed(list(expired_intervals))
+    groups = {}
+    for symbol in to_fetch:
+        groups.setdefault(tuple(expired_intervals[symbol]), []).append(symbol)
+    stale = set(skipped)
+    for intervals, group in groups.items():
+        refresh = run_refresh(group, exchange, screener, list(intervals), list(indicators), base_url=base_url)
+        tracker.record_success(refresh.results)
+        tracker.record_failure(refresh.missing, "not_found")
+        tracker.record_errors(refresh.errors)
+        fetched_at = datetime.now(timezone.utc).timestamp()
+        for interval in intervals:
+            values = {
+                symbol: {indicator: row.get(timeframe_column(interval, indicator)) for indicator in indicators}
+                for symbol, row in refresh.results.items()
+            }
+            cache.put_many(values, exchange, interval, fetched_at)
+            entries[interval].update({symbol: (row, fetched_at) for symbol, row in values.items()})
+        stale.update(refresh.stale)
+
+    present = [symbol for symbol in unique_symbols if any(symbol in entries[interval] for interval in timeframes)]
+    columns = {"Symbol": pd.Categorical(present)}
+    for interval in timeframes:
+        for indicator in indicators:
+            values = np.array(
+                [entries[interval].get(symbol, ({}, None))[0].get(indicator, np.nan) for symbol in present], dtype=np.float64
+            )
+            columns[timeframe_column(interval, indicator)] = values if indicator in FLOAT64_INDICATORS else values.astype(np.float32)
+    fetched = [max(entries[interval][symbol][1] for interval in timeframes if symbol in entries[interval]) for symbol in present]
+    columns["Timestamp"] = pd.to_datetime(fetched, unit="s", utc=True)
+
+    df = pd.DataFrame(columns)
+    df.attrs["created_at"] = datetime.now(timezone.utc).isoformat()
+    df.attrs["timeframes"] = list(timeframes)
+    df.attrs["stale_symbols"] = sorted(stale)
+    df.attrs["health"] = tracker.summary()
+    return df
+
+def run_once(cache, snapshot_path, archive_root=None, tracker=None, alerting=None, scanner=None):
+    started = time.monotonic()
+    with metrics.timer("collect_seconds", stage="collect"):
+        df = collect_snapshot(cache, tracker=tracker, scanner=scanner)
+    with metrics.timer("collect_seconds", stage="publish"):
+        snapshot_store.publish_snapshot(df, snapshot_path)
+    summary = df.attrs["health"]
+    logger.info(
+        "Published %d symbols (%d stale, %d cooling down) in %.2fs; errors: %s",
+        len(df), len(df.attrs["stale_symbols"]), len(summary["cooling_down"]), time.monotonic() - started,
+        summary["errors"] or "none"
+    )
+    if archive_root:
+        try:
+            with metrics.timer("collect_seconds", stage="archive"):
+                snapshot_archive.append_snapshot(df, archive_root)
+                snapshot_archive.maintain(archive_root)
+        except OSError:
+            logger.exception("Archiving the snapshot failed")
+    if alerting:
+        try:
+            fired = alerting.process(df)
+            if fired:
+                logger.info("Sent %d alerts", len(fired))
+        except Exception:
+            # Alerting must never cost the next snapshot.
+            logger.exception("Evaluating alerts failed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the symbol universe and publish snapshots")
+    parser.add_argument("--every", type=float, default=REFRESH_EVERY, help="Seconds between refresh starts")
+    parser.add_argument("--once", action="store_true", help="Publish a single snapshot and exit")
+    parser.add_argument("--snapshot", default=snapshot_store.SNAPSHOT_PATH, help="Snapshot file to publish")
+    parser.add_argument("--archive", default=snapshot_archive.ARCHIVE_DIR, help="History archive directory")
+    parser.add_argument("--no-archive", action="store_true", help="Do not keep snapshot history")
+    parser.add_argument("--alerts", metavar="RULES", help="JSON rules file; evaluate alerts after every snapshot")
+    parser.add_argument("--alert-sink", action="append", metavar="SINK",
+                        help="stdout, file:<path> or webhook:<url>; repeatable (default: stdout)")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT, help="Port of /metrics when CRYPTO_METRICS=on")
+    args = parser.parse_args()
+
+    metrics.configure_logging()
+    metrics.serve(args.metrics_port)
+    cache = indicator_cache.IndicatorCache()
+    tracker = health.HealthTracker.load()
+    scanner = async_scanner.ScannerSession()
+    alerting = None
+    if args.alerts:
+        alerting = alerts.Alerting(
+            args.alerts, args.alert_sink or ["stdout"],
+            store=candle_store.CandleStore(), tracker=health.HealthTracker.load(candle_store.HEALTH_PATH)
+        )
+        if alerting.engine.needs_pivots:
+            # Live prices for near-level rules between snapshot refreshes; follows CRYPTO_STREAM.
+            stream = bybit_stream.open_stream(symbols)
+            alerting.prices = stream.state if stream is not None else None
+
+    while True:
+        started = time.monotonic()
+        try:
+            run_once(cache, args.snapshot, None if args.no_archive else args.archive, tracker, alerting, scanner)
+        except Exception:
+            if args.once:
+                raise
+            logger.exception("Refresh failed; keeping the previous snapshot")
+        finally:
+            try:
+                tracker.save()
+            except OSError:
+                logger.exception("Saving fetch health failed")
+        if args.once:
+            scanner.close()
+            break
+        time.sleep(max(0.0, args.every - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    main()
@@ -1,153 +1,150 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, timezone
-import concurrent.futures
-from tradingview_ta import TA_Handler, Interval
-
-# List of symbols
-symbols = [
-    "10000LADYSUSDT.P", "10000NFTUSDT.P", "1000BONKUSDT.P", "1000BTTUSDT.P", "1000BEERUSDT.P",
-    "1000FLOKIUSDT.P", "1000LUNCUSDT.P", "1000PEPEUSDT.P", "1000XECUSDT.P", "1000000MOGUSDT.P",
-    "1INCHUSDT.P", "AAVEUSDT.P", "ACHUSDT.P", "ADAUSDT.P", "AGLDUSDT.P", "AVAILUSDT.P",
-    "AKROUSDT.P", "ALGOUSDT.P", "ALICEUSDT.P", "ALPACAUSDT.P", "1000APUUSDT.P", "1CATUSDT.P",
-    "ALPHAUSDT.P", "AMBUSDT.P", "ANKRUSDT.P", "APEUSDT.P", "API3USDT.P", "A8USDT.P",
-    "APTUSDT.P", "ARUSDT.P", "ARBUSDT.P", "ARKUSDT.P", "DOP1USDT.P", "1000RATSUSDT.P",
-    "ARKMUSDT.P", "ARPAUSDT.P", "ASTRUSDT.P", "ATAUSDT.P", "ATOMUSDT.P", 
-    "AUCTIONUSDT.P", "AUDIOUSDT.P", "AVAXUSDT.P", "AXSUSDT.P", "BADGERUSDT.P", 
-    "BAKEUSDT.P", "BALUSDT.P", "BANDUSDT.P", "BATUSDT.P", "BCHUSDT.P", 
-    "BELUSDT.P", "BICOUSDT.P", "BIGTIMEUSDT.P", "BLURUSDT.P", "BLZUSDT.P", "CETUSUSDT.P",
-    "BTCUSDT.P", "C98USDT.P", "CEEKUSDT.P", "CELOUSDT.P", "CELRUSDT.P", "CFXUSDT.P",
-    "CHRUSDT.P", "CHZUSDT.P", "CKBUSDT.P", "COMBOUSDT.P", "COMPUSDT.P", "DRIFTUSDT.P",
-    "COREUSDT.P", "COTIUSDT.P", "CROUSDT.P", "CRVUSDT.P", "CTCUSDT.P", "DEGENUSDT.P",
-    "CTKUSDT.P", "CTSIUSDT.P", "CVCUSDT.P", "CVXUSDT.P", "CYBERUSDT.P", "DARUSDT.P",
-    "DASHUSDT.P", "DENTUSDT.P", "DGBUSDT.P", "DODOUSDT.P", "DOGEUSDT.P", "DOTUSDT.P",
-    "DUSKUSDT.P", "DYDXUSDT.P", "EDUUSDT.P", "EGLDUSDT.P", "ENJUSDT.P", "ENSUSDT.P",
-    "EOSUSDT.P", "ETCUSDT.P", "ETHUSDT.P", "ETHWUSDT.P", "FILUSDT.P", "DOGUSDT.P", "FIREUSDT.P",
-    "FITFIUSDT.P", "FLOWUSDT.P", "FLRUSDT.P", "FORTHUSDT.P", "FRONTUSDT.P", "FTMUSDT.P",
-    "FXSUSDT.P", "GALAUSDT.P", "GFTUSDT.P", "GLMUSDT.P", "BENDOGUSDT.P", "L3USDT.P",
-    "GLMRUSDT.P", "GMTUSDT.P", "GMXUSDT.P", "GRTUSDT.P", "GTCUSDT.P", "HBARUSDT.P", 
-    "HFTUSDT.P", "HIFIUSDT.P", "HIGHUSDT.P", "HNTUSDT.P", "PENGUSDT.P", "1000000PEIPEIUSDT.P",
-    "HOOKUSDT.P", "HOTUSDT.P", "ICPUSDT.P", "ICXUSDT.P", "IDUSDT.P", "IDEXUSDT.P",
-    "ILVUSDT.P", "IMXUSDT.P", "INJUSDT.P", "IOSTUSDT.P", "IOTAUSDT.P", "IOTXUSDT.P",
-    "JASMYUSDT.P", "JOEUSDT.P", "JSTUSDT.P", "KASUSDT.P", "KAVAUSDT.P", "KDAUSDT.P",
-    "KEYUSDT.P", "KLAYUSDT.P", "KNCUSDT.P", "KSMUSDT.P", "LDOUSDT.P", "LEVERUSDT.P",
-    "LINAUSDT.P", "LINKUSDT.P", "LITUSDT.P", "LOOKSUSDT.P", "LOOMUSDT.P", "LPTUSDT.P", "LAIUSDT.P",
-    "LQTYUSDT.P", "LRCUSDT.P", "LTCUSDT.P", "LUNA2USDT.P", "MAGICUSDT.P", "MOTHERUSDT.P", "MYRIAUSDT.P",
-    "MANAUSDT.P", "MASKUSDT.P", "MATICUSDT.P", "MAVUSDT.P", "MDTUSDT.P", "POPCATUSDT.P", "MANEKIUSDT.P",
-    "MINAUSDT.P", "MKRUSDT.P", "MNTUSDT.P", "MTLUSDT.P", "NEARUSDT.P", "PIXFIUSDT.P",
-    "NEOUSDT.P", "NKNUSDT.P", "NMRUSDT.P", "NTRNUSDT.P", "NEIROETHUSDT.P", "OGUSDT.P",
-    "OGNUSDT.P", "OMGUSDT.P", "ONEUSDT.P", "ONTUSDT.P", "OPUSDT.P", "ORBSUSDT  .P", "ORDERUSDT.P",
-    "ORDIUSDT.P", "OXTUSDT.P", "PAXGUSDT.P", "PENDLEUSDT.P", "PEOPLEUSDT.P", "PERPUSDT.P",
-    "PHBUSDT.P", "PROMUSDT.P", "PONKEUSDT.P", "QNTUSDT.P", "QTUMUSDT.P", "RADUSDT.P", "RDNTUSDT.P", 
-    "REEFUSDT.P", "RENUSDT.P", "REQUSDT.P", "RLCUSDT.P", "ROSEUSDT.P", "SCAUSDT.P", "SAGAUSDT.P",
-    "RPLUSDT.P", "RSRUSDT.P", "RSS3USDT.P", "RUNEUSDT.P", "RVNUSDT.P", "SUNDOGUSDT.P", "SAFEUSDT.P",
-    "SANDUSDT.P", "SCUSDT.P", "SCRTUSDT.P", "SEIUSDT.P", "SFPUSDT.P", "SHIB1000USDT.P", "SILLYUSDT.P",
-    "SKLUSDT.P", "SLPUSDT.P", "SNXUSDT.P", "SOLUSDT.P", "SPELLUSDT.P", "SSVUSDT.P", "PRCLUSDT.P",
-    "STGUSDT.P", "STMXUSDT.P", "STORJUSDT.P", "STPTUSDT.P", "STXUSDT.P", "SUIUSDT.P", "SLFUSDT.P",
-    "SUNUSDT.P", "SUSHIUSDT.P", "SWEATUSDT.P", "SXPUSDT.P", "UXLINKUSDT.P", "PIRATEUSDT.P",
-    "TUSDT.P", "THETAUSDT.P", "TLMUSDT.P", "TOMIUSDT.P", "TONUSDT.P", "STRKUSDT.P",
-    "TRBUSDT.P", "TRUUSDT.P", "TRXUSDT.P", "TWTUSDT.P", "UMAUSDT.P", "UNFIUSDT.P",
-    "UNIUSDT.P", "USDCUSDT.P", "VETUSDT.P", "VGXUSDT.P", "VRAUSDT.P",
-    "WAVESUSDT.P", "WAXPUSDT.P", "WLDUSDT.P", "WOOUSDT.P", "XCNUSDT.P", "ZCXUSDT.P",
-    "XEMUSDT.P", "XLMUSDT.P", "XMRUSDT.P", "XNOUSDT.P", "XRPUSDT.P", "XTZUSDT.P", "ZBCNUSDT.P",
-    "XVGUSDT.P", "XVSUSDT.P", "YFIUSDT.P", "YGGUSDT.P", "ZECUSDT.P", "ZENUSDT.P", "ZILUSDT.P", "ZRXUSDT.P"
-    "10000000AIDOGEUSDT.P", "1000000BABYDOGEUSDT.P", "1000000CHEEMSUSDT.P", "1000000MOGUSDT.P", "1000000PEIPEIUSDT.P",
-    "10000COQUSDT.P", "10000ELONUSDT.P", "10000LADYSUSDT.P", "10000QUBICUSDT.P", "10000SATSUSDT.P", "10000WENUSDT.P",
-    "10000WHYUSDT.P", "1000APUUSDT.P", "1000BONKPERP.P", "1000BONKUSDT.P", "1000BTTUSDT.P", "1000CATSUSDT.P", "1000CATUSDT.P",
-    "1000FLOKIUSDT.P", "1000LUNCUSDT.P", "1000MUMUUSDT.P", "1000NEIROCTOUSDT.P", "1000PEPEPERP.P", "1000PEPEUSDT.P",
-    "1000RATSUSDT.P", "1000TOSHIUSDT.P", "1000TURBOUSDT.P", "1000XECUSDT.P", "1000XUSDT.P", "1INCHUSDT.P", "A8USDT.P",
-    "AAVEUSDT.P", "ACEUSDT.P", "ACHUSDT.P", "ACTUSDT.P", "ACXUSDT.P", "ADAUSDT.P", "AERGOUSDT.P", "AEROUSDT.P", "AEVOPERP.P",
-    "AEVOUSDT.P", "AGIUSDT.P", "AGLDUSDT.P", "AI16ZUSDT.P", "AIOZUSDT.P", "AIUSDT.P", "AIXBTUSDT.P", "AKTUSDT.P", "ALCHUSDT.P",
-    "ALEOUSDT.P", "ALGOUSDT.P", "ALICEUSDT.P", "ALPACAUSDT.P", "ALPHAUSDT.P", "ALTUSDT.P", "ALUUSDT.P", "AMBUSDT.P",
-    "ANIMEUSDT.P", "ANKRUSDT.P", "APEUSDT.P", "API3USDT.P", "APTUSDT.P", "ARBPERP.P", "ARBUSDT.P", "ARCUSDT.P", "ARKMUSDT.P",
-    "ARKUSDT.P", "ARPAUSDT.P", "ARUSDT.P", "ASTRUSDT.P", "ATAUSDT.P", "ATHUSDT.P", "ATOMUSDT.P", "AUCTIONUSDT.P", "AUDIOUSDT.P",
-    "AVAAIUSDT.P", "AVAILUSDT.P", "AVAUSDT.P", "AVAXUSDT.P", "AXLUSDT.P", "AXSUSDT.P", "B3USDT.P", "BADGERUSDT.P", "BAKEUSDT.P",
-    "BALUSDT.P", "BANANAUSDT.P", "BANDUSDT.P", "BANUSDT.P", "BATUSDT.P", "BBUSDT.P", "BCHUSDT.P", "BEAMUSDT.P", "BELUSDT.P",
-    "BERAUSDT.P", "BICOUSDT.P", "BIGTIMEUSDT.P", "BILLYUSDT.P", "BIOUSDT.P", "BLASTUSDT.P", "BLUEUSDT.P", "BLURUSDT.P",
-    "BNBPERP.P", "BNBUSDT.P", "BNTUSDT.P", "BNXUSDT.P", "BOBAUSDT.P", "BOMEUSDT.P", "BRETTUSDT.P", "BROCCOLIUSDT.P", "BSVUSDT.P",
-    "BSWUSDT.P", "BTC-07MAR25.P", "BTC-21FEB25.P", "BTC-25APR25.P", "BTC-26DEC25.P", "BTC-26SEP25.P", "BTC-27JUN25.P",
-    "BTC-28FEB25.P", "BTC-28MAR25.P", "BTCPERP.P", "BTCUSDT.P", "BUZZUSDT.P", "C98USDT.P", "CAKEUSDT.P", "CARVUSDT.P",
-    "CATIUSDT.P", "CELOUSDT.P", "CELRUSDT.P", "CETUSUSDT.P", "CFXUSDT.P", "CGPTUSDT.P", "CHESSUSDT.P", "CHILLGUYUSDT.P",
-    "CHRUSDT.P", "CHZUSDT.P", "CKBUSDT.P", "CLOUDUSDT.P", "COMBOUSDT.P", "COMPUSDT.P", "COOKIEUSDT.P", "COOKUSDT.P",
-    "COREUSDT.P", "COSUSDT.P", "COTIUSDT.P", "COWUSDT.P", "CROUSDT.P", "CRVUSDT.P", "CTCUSDT.P", "CTKUSDT.P", "CTSIUSDT.P",
-    "CVCUSDT.P", "CVXUSDT.P", "CYBERUSDT.P", "DASHUSDT.P", "DATAUSDT.P", "DBRUSDT.P", "DEEPUSDT.P", "DEGENUSDT.P", "DENTUSDT.P",
-    "DEXEUSDT.P", "DGBUSDT.P", "DODOUSDT.P", "DOGEPERP.P", "DOGEUSDT.P", "DOGSUSDT.P", "DOGUSDT.P", "DOTPERP.P", "DOTUSDT.P",
-    "DRIFTUSDT.P", "DUCKUSDT.P", "DUSKUSDT.P", "DYDXUSDT.P", "DYMUSDT.P", "EDUUSDT.P", "EGLDUSDT.P", "EIGENUSDT.P", "ENAPERP.P",
-    "ENAUSDT.P", "ENJUSDT.P", "ENSUSDT.P", "EOSUSDT.P", "ETCPERP.P", "ETCUSDT.P", "ETH-07MAR25.P", "ETH-21FEB25.P",
-    "ETH-25APR25.P", "ETH-26DEC25.P", "ETH-26SEP25.P", "ETH-27JUN25.P", "ETH-28FEB25.P", "ETH-28MAR25.P", "ETHBTCUSDT.P",
-    "ETHFIPERP.P", "ETHFIUSDT.P", "ETHPERP.P", "ETHUSDT.P", "ETHWUSDT.P", "FARTCOINUSDT.P", "FBUSDT.P", "FDUSDUSDT.P",
-    "FIDAUSDT.P", "FILUSDT.P", "FIOUSDT.P", "FIREUSDT.P", "FLMUSDT.P", "FLOCKUSDT.P", "FLOWUSDT.P", "FLRUSDT.P", "FLUXUSDT.P",
-    "FORTHUSDT.P", "FOXYUSDT.P", "FTNUSDT.P", "FUELUSDT.P", "FUSDT.P", "FWOGUSDT.P", "FXSUSDT.P", "GALAUSDT.P", "GASUSDT.P",
-    "GEMSUSDT.P", "GIGAUSDT.P", "GLMRUSDT.P", "GLMUSDT.P", "GMEUSDT.P", "GMTUSDT.P", "GMXUSDT.P", "GNOUSDT.P", "GOATUSDT.P",
-    "GODSUSDT.P", "GOMININGUSDT.P", "GRASSUSDT.P", "GRIFFAINUSDT.P", "GRTUSDT.P", "GTCUSDT.P", "GUSDT.P", "HBARUSDT.P",
-    "HEIUSDT.P", "HFTUSDT.P", "HIFIUSDT.P", "HIGHUSDT.P", "HIPPOUSDT.P", "HIVEUSDT.P", "HMSTRUSDT.P", "HNTUSDT.P", "HOOKUSDT.P",
-    "HOTUSDT.P", "HPOS10IUSDT.P", "HYPEUSDT.P", "ICPUSDT.P", "ICXUSDT.P", "IDEXUSDT.P", "IDUSDT.P", "ILVUSDT.P", "IMXUSDT.P",
-    "INJUSDT.P", "IOSTUSDT.P", "IOTAUSDT.P", "IOTXUSDT.P", "IOUSDT.P", "IPUSDT.P", "JAILSTOOLUSDT.P", "JASMYUSDT.P",
-    "JELLYJELLYUSDT.P", "JOEUSDT.P", "JSTUSDT.P", "JTOUSDT.P", "JUPUSDT.P", "JUSDT.P", "KAIAUSDT.P", "KASUSDT.P", "KAVAUSDT.P",
-    "KDAUSDT.P", "KMNOUSDT.P", "KNCUSDT.P", "KOMAUSDT.P", "KSMUSDT.P", "L3USDT.P", "LAIUSDT.P", "LDOUSDT.P", "LEVERUSDT.P",
-    "LINAUSDT.P", "LINKPERP.P", "LINKUSDT.P", "LISTAUSDT.P", "LOOKSUSDT.P", "LPTUSDT.P", "LQTYUSDT.P", "LRCUSDT.P", "LSKUSDT.P",
-    "LTCUSDT.P", "LUCEUSDT.P", "LUMIAUSDT.P", "LUNA2USDT.P", "MAGICUSDT.P", "MAJORUSDT.P", "MANAUSDT.P", "MANEKIUSDT.P",
-    "MANTAUSDT.P", "MASAUSDT.P", "MASKUSDT.P", "MAVIAUSDT.P", "MAVUSDT.P", "MAXUSDT.P", "MBLUSDT.P", "MBOXUSDT.P", "MDTUSDT.P",
-    "MELANIAUSDT.P", "MEMEFIUSDT.P", "MEMEUSDT.P", "MERLUSDT.P", "METISUSDT.P", "MEUSDT.P", "MEWUSDT.P", "MICHIUSDT.P",
-    "MINAUSDT.P", "MKRUSDT.P", "MNTPERP.P", "MNTUSDT.P", "MOBILEUSDT.P", "MOCAUSDT.P", "MONUSDT.P", "MOODENGUSDT.P",
-    "MORPHOUSDT.P", "MOTHERUSDT.P", "MOVEUSDT.P", "MOVRUSDT.P", "MTLUSDT.P", "MVLUSDT.P", "MYRIAUSDT.P", "MYROUSDT.P",
-    "NCUSDT.P", "NEARUSDT.P", "NEIROETHUSDT.P", "NEOUSDT.P", "NFPUSDT.P", "NKNUSDT.P", "NMRUSDT.P", "NOTPERP.P", "NOTUSDT.P",
-    "NSUSDT.P", "NTRNUSDT.P", "NULSUSDT.P", "NYANUSDT.P", "OGNUSDT.P", "OGUSDT.P", "OLUSDT.P", "OMGUSDT.P", "OMNIUSDT.P",
-    "OMUSDT.P", "ONDOPERP.P", "ONDOUSDT.P", "ONEUSDT.P", "ONGUSDT.P", "ONTUSDT.P", "OPPERP.P", "OPUSDT.P", "ORBSUSDT.P",
-    "ORCAUSDT.P", "ORDERUSDT.P", "ORDIPERP.P", "ORDIUSDT.P", "OSMOUSDT.P", "OXTUSDT.P", "PAXGUSDT.P", "PEAQUSDT.P",
-    "PENDLEUSDT.P", "PENGUUSDT.P", "PEOPLEUSDT.P", "PERPUSDT.P", "PHAUSDT.P", "PHBUSDT.P", "PIPPINUSDT.P", "PIRATEUSDT.P",
-    "PIXELUSDT.P", "PLUMEUSDT.P", "PNUTUSDT.P", "POLPERP.P", "POLUSDT.P", "POLYXUSDT.P", "PONKEUSDT.P", "POPCATPERP.P",
-    "POPCATUSDT.P", "PORTALUSDT.P", "POWRUSDT.P", "PRCLUSDT.P", "PRIMEUSDT.P", "PROMUSDT.P", "PROSUSDT.P", "PUFFERUSDT.P",
-    "PYRUSDT.P", "PYTHUSDT.P", "QIUSDT.P", "QNTUSDT.P", "QTUMUSDT.P", "QUICKUSDT.P", "RADUSDT.P", "RAREUSDT.P", "RAYDIUMUSDT.P",
-    "RDNTUSDT.P", "RENDERUSDT.P", "RENUSDT.P", "REQUSDT.P", "REXUSDT.P", "REZUSDT.P", "RIFSOLUSDT.P", "RIFUSDT.P", "RLCUSDT.P",
-    "RONINUSDT.P", "ROSEUSDT.P", "RPLUSDT.P", "RSRUSDT.P", "RSS3USDT.P", "RUNEUSDT.P", "RVNUSDT.P", "SAFEUSDT.P", "SAGAUSDT.P",
-    "SANDUSDT.P", "SCAUSDT.P", "SCRTUSDT.P", "SCRUSDT.P", "SCUSDT.P", "SDUSDT.P", "SEIUSDT.P", "SENDUSDT.P", "SFPUSDT.P",
-    "SHELLUSDT.P", "SHIB1000PERP.P", "SHIB1000USDT.P", "SKLUSDT.P", "SLERFUSDT.P", "SLFUSDT.P", "SLPUSDT.P", "SNTUSDT.P",
-    "SNXUSDT.P", "SOL-07MAR25.P", "SOL-21FEB25.P", "SOL-28FEB25.P", "SOL-28MAR25.P", "SOLAYERUSDT.P", "SOLOUSDT.P", "SOLPERP.P",
-    "SOLUSDT.P", "SOLUSDT-04APR25.P", "SOLUSDT-11APR25.P", "SOLVUSDT.P", "SONICUSDT.P", "SPECUSDT.P", "SPELLUSDT.P", "SPXUSDT.P",
-    "SSVUSDT.P", "STEEMUSDT.P", "STGUSDT.P", "STMXUSDT.P", "STORJUSDT.P", "STPTUSDT.P", "STRKPERP.P", "STRKUSDT.P", "STXUSDT.P",
-    "SUIPERP.P", "SUIUSDT.P", "SUNDOGUSDT.P", "SUNUSDT.P", "SUPERUSDT.P", "SUSDT.P", "SUSHIUSDT.P", "SWARMSUSDT.P", "SWEATUSDT.P",
-    "SWELLUSDT.P", "SXPUSDT.P", "SYNUSDT.P", "SYSUSDT.P", "TAIKOUSDT.P", "TAIUSDT.P", "TAOUSDT.P", "THETAUSDT.P", "THEUSDT.P",
-    "TIAPERP.P", "TIAUSDT.P", "TLMUSDT.P", "TNSRUSDT.P", "TOKENUSDT.P", "TONPERP.P", "TONUSDT.P", "TRBUSDT.P", "TROYUSDT.P",
-    "TRUMPUSDT.P", "TRUUSDT.P", "TRXUSDT.P", "TSTBSCUSDT.P", "TUSDT.P", "TWTUSDT.P", "UMAUSDT.P", "UNIUSDT.P", "UROUSDT.P",
-    "USDCUSDT.P", "USDEUSDT.P", "USTCUSDT.P", "USUALUSDT.P", "UXLINKUSDT.P", "VANAUSDT.P", "VANRYUSDT.P"
-]
+from datetime import datetime, timedelta, timezone
+import async_scanner
+import bybit_stream
+import charts
+import collector
+import health
+import indicator_cache
+import metrics
+import rsi_index
+import snapshot_archive
+import snapshot_store
+from universe import symbols as universe_symbols
+
 # Configuration
-exchange = "BYBIT"
-screener = "crypto"
-interval = Interval.INTERVAL_4_HOURS
+STALE_SNAPSHOT_AGE = 600
+HISTORY_DAYS = 30
+COMPARE_OPTIONS = {"None": None, "1 day ago": 1, "7 days ago": 7, "30 days ago": 30}
+LIVE_REFRESH = None if bybit_stream.STREAM_MODE == "off" else 1
+TABLE_PAGE_SIZE = 50
+TOP_N = 10
+
+@st.cache_resource
+def get_indicator_cache():
+    return indicator_cache.IndicatorCache()
+
+@st.cache_resource
+def get_health_tracker():
+    return health.HealthTracker()
+
+@st.cache_resource
+def get_scanner():
+    return async_scanner.ScannerSession()
+
+@st.cache_resource
+def get_market_stream():
+    return bybit_stream.open_stream(universe_symbols)
+
+@st.cache_resource
+def start_metrics_server():
+    return metrics.serve()
 
 @st.cache_data(ttl=180)
 def fetch_all_data():
-    results = []
-    current_datetime = datetime.now(timezone.utc)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        future_to_symbol = {executor.submit(process_symbol, symbol): symbol for symbol in symbols}
-        for future in concurrent.futures.as_completed(future_to_symbol):
-            result = future.result()
-            if result:
-                result["Timestamp"] = current_datetime
-                results.append(result)
-
-    return pd.DataFrame(results)
-
-def process_symbol(symbol):
-    try:
-        handler = TA_Handler(
-            symbol=symbol,
-            exchange=exchange,
-            screener=screener,
-            interval=interval,
-            timeout=None
-        )
-        analysis = handler.get_analysis()
-        rsi_value = analysis.indicators.get('RSI', None)
-        return {"Symbol": symbol, "4h RSI": rsi_value}
-    except Exception as e:
-        st.error(f"Error fetching data for {symbol}: {str(e)}")
-        return None
+    # Inline fallback for when no collector is publishing snapshots.
+    metrics.inc("app_cache_misses_total", cache="fetch_all_data")
+    return collector.collect_snapshot(get_indicator_cache(), tracker=get_health_tracker(), scanner=get_scanner())
+
+@st.cache_data(max_entries=2)
+def read_snapshot(path, mtime):
+    metrics.inc("app_cache_misses_total", cache="read_snapshot")
+    return snapshot_store.load_snapshot(path)
+
+@st.cache_data(ttl=300)
+def archived_distribution(days_ago):
+    return snapshot_archive.distribution_at(datetime.now(timezone.utc) - timedelta(days=days_ago), ['4h RSI'])
+
+@st.cache_data(ttl=300)
+def rsi_history(symbols, days=HISTORY_DAYS):
+    frames = [snapshot_archive.symbol_history(symbol, ('4h RSI',), days).assign(Symbol=symbol) for symbol in symbols]
+    frames = [frame for frame in frames if len(frame)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+@st.cache_resource(max_entries=4)
+def get_rsi_index(snapshot_id, _df):
+    # Sorted once per snapshot; every filter change is then a binary search.
+    return rsi_index.RsiIndex(_df)
+
+# Figures are cached as objects per (snapshot, filter): a rerun with the same filters only
+# serializes them, and leading-underscore arguments are not hashed by Streamlit.
+@st.cache_resource(max_entries=16)
+def distribution_figure(snapshot_id, compare_with, compare_snapshot_at, _df, _past):
+    counts, edges = charts.bin_counts(_df['4h RSI'])
+    overlay = None if _past is None else (compare_with, charts.bin_counts(_past['4h RSI'])[0])
+    return charts.histogram_figure(counts, edges, 'RSI Distribution', overlay)
+
+@st.cache_resource(max_entries=64)
+def range_figure(snapshot_id, rsi_range, _df_in_range):
+    return charts.symbol_scatter(_df_in_range, '4h RSI', f'Symbols with RSI between {rsi_range[0]} and {rsi_range[1]}')
+
+def paged_table(df, columns, key, vmin=0, vmax=100):
+    # Only the visible page goes through the Styler; fixed vmin/vmax keep colors comparable across pages.
+    pages = max(1, -(-len(df) // TABLE_PAGE_SIZE))
+    # The widget takes its value from session state only, so a shrinking table can reset it.
+    if st.session_state.setdefault(key, 1) > pages:
+        st.session_state[key] = 1
+    page = st.number_input(f'Page (of {pages})', 1, pages, key=key) if pages > 1 else 1
+    start = (page - 1) * TABLE_PAGE_SIZE
+    rows = df.iloc[start:start + TABLE_PAGE_SIZE]
+    st.dataframe(rows.style
+                 .format({column: '{:.2f}' for column in columns})
+                 .background_gradient(cmap='viridis', subset=columns, vmin=vmin, vmax=vmax))
+    if pages > 1:
+        st.caption(f"Rows {start + 1}–{start + len(rows)} of {len(df)}")
+
+def load_data():
+    # Hit ratio = 1 - misses / requests; the misses are counted inside the cached functions.
+    mtime = snapshot_store.snapshot_mtime()
+    if mtime is None:
+        metrics.inc("app_cache_requests_total", cache="fetch_all_data")
+        return fetch_all_data()
+    metrics.inc("app_cache_requests_total", cache="read_snapshot")
+    return read_snapshot(snapshot_store.SNAPSHOT_PATH, mtime)
+
+def metrics_panel():
+    if not metrics.ENABLED:
+        return
+    with st.sidebar.expander("⏱️ Debug metrics"):
+        rows = metrics.snapshot()
+        if rows:
+            st.dataframe(pd.DataFrame(rows).assign(labels=lambda frame: frame['labels'].map(
+                lambda labels: ", ".join(f"{key}={value}" for key, value in labels.items()))), hide_index=True)
+        else:
+            st.caption("Nothing recorded yet.")
+
+@st.fragment(run_every=LIVE_REFRESH)
+def live_prices(df_selected):
+    stream = get_market_stream()
+    if stream is None:
+        return
+    tickers = [stream.state.ticker(symbol) for symbol in df_selected['Symbol']]
+    live = df_selected[['Symbol', '4h RSI']].assign(
+        **{'Last Price': [ticker.get('last_price') for ticker in tickers],
+           '24h Change (%)': [ticker.get('change_24h', float('nan')) * 100 for ticker in tickers]}
+    )
+    st.caption("Live prices" if stream.connected() else "Live prices (reconnecting...)")
+    st.dataframe(live.style.format({'4h RSI': '{:.2f}', 'Last Price': '{:.8g}', '24h Change (%)': '{:+.2f}'}, na_rep='-'))
+
+def health_panel(df):
+    # One summary instead of a message per failing symbol.
+    summary = df.attrs.get("health") or {}
+    errors = summary.get("errors", {})
+    cooling = summary.get("cooling_down", {})
+    stale_symbols = df.attrs.get("stale_symbols", [])
+    if not (errors or cooling or stale_symbols):
+        return
+    with st.sidebar.expander(f"🩺 Feed health: {len(stale_symbols)} stale, {len(cooling)} cooling down"):
+        st.caption(f"Errors by cause: {health.describe_errors(errors)}")
+        if cooling:
+            st.dataframe(pd.DataFrame([
+                {"Symbol": symbol, "Cause": info["cause"], "Failures": info["failures"], "Retry in (min)": round(info["retry_in"] / 60)}
+                for symbol, info in sorted(cooling.items(), key=lambda item: item[1]["retry_in"])
+            ]), hide_index=True)
+        if stale_symbols:
+            st.write("Without fresh data: " + ", ".join(stale_symbols))
 
 def display_streamlit_app():
     st.set_page_config(page_title="Crypto Selector", layout="wide", initial_sidebar_state="expanded")
@@ -184,18 +181,42 @@ def display_streamlit_app():
     """, unsafe_allow_html=True)
 
     st.title('📊 Crypto Selector')
+    start_metrics_server()
 
     if st.button('Refresh Data'):
-        st.experimental_rerun()
+        fetch_all_data.clear()
+        read_snapshot.clear()
+        st.rerun()
 
-    df = fetch_all_data()
+    with metrics.timer("render_seconds", stage="load"):
+        df = load_data()
 
     # Sidebar
     st.sidebar.header('Dashboard Controls')
-    st.sidebar.write(f"🕒 Last update: {df['Timestamp'].iloc[0].strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    st.sidebar.write(f"🕒 Last update: {df['Timestamp'].max().strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    age = snapshot_store.snapshot_age(df)
+    if age is not None:
+        st.sidebar.caption(f"Snapshot age: {age:.0f}s")
+        if age > STALE_SNAPSHOT_AGE:
+            st.sidebar.warning("Snapshot is out of date. Is the collector running?")
+    health_panel(df)
+    metrics_panel()
     
     rsi_range = st.sidebar.slider('RSI Range', 0, 100, (30, 70))
-    symbols_to_show = st.sidebar.multiselect('Select Symbols', options=df['Symbol'].unique(), default=[])
+    compare_with = st.sidebar.selectbox('Compare Distribution With', list(COMPARE_OPTIONS))
+    symbols_to_show = st.sidebar.multiselect('Select Symbols', options=list(df['Symbol'].unique()), default=[])
+
+    timeframes = [tf for tf in df.attrs.get("timeframes", []) if f"{tf} RSI" in df.columns]
+    timeframe_ranges = {}
+    if timeframes:
+        with st.sidebar.expander('Multi-Timeframe Filters'):
+            for tf in timeframes:
+                low, high = st.slider(f'{tf} RSI', 0, 100, (0, 100), key=f'mtf_{tf}')
+                if (low, high) != (0, 100):
+                    timeframe_ranges[f'{tf} RSI'] = (low, high)
+
+    snapshot_id = snapshot_store.snapshot_id(df)
+    index = get_rsi_index(snapshot_id, df)
 
     # Main dashboard area
     col1, col2, col3 = st.columns(3)
@@ -209,46 +230,59 @@ def display_streamlit_app():
         st.markdown('</div>', unsafe_allow_html=True)
     with col3:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Symbols in Range", len(df[(df['4h RSI'] >= rsi_range[0]) & (df['4h RSI'] <= rsi_range[1])]))
+        st.metric("Symbols in Range", index.count('4h RSI', *rsi_range))
         st.markdown('</div>', unsafe_allow_html=True)
 
     # RSI Distribution
     st.subheader('📈 Distribution')
-    fig_hist = px.histogram(df, x='4h RSI', nbins=50, 
-                            title='RSI Distribution',
-                            labels={'4h RSI': 'RSI Value', 'count': 'Number of Symbols'},
-                            color_discrete_sequence=['#8A2BE2'])
-    fig_hist.add_vline(x=30, line_dash="dash", line_color="#FF4136", annotation_text="Oversold")
-    fig_hist.add_vline(x=70, line_dash="dash", line_color="#2ECC40", annotation_text="Overbought")
-    fig_hist.update_layout(
-        plot_bgcolor='#1E1E1E',
-        paper_bgcolor='#1E1E1E',
-        font_color='white'
-    )
-    st.plotly_chart(fig_hist, use_container_width=True)
+    with metrics.timer("render_seconds", stage="histogram_figure"):
+        past = None
+        if COMPARE_OPTIONS[compare_with]:
+            past = archived_distribution(COMPARE_OPTIONS[compare_with])
+            if not len(past):
+                st.caption(f"No archived snapshot from {compare_with}.")
+                past = None
+        fig_hist = distribution_figure(snapshot_id, compare_with, None if past is None else past.attrs.get("snapshot_at"), df, past)
+    with metrics.timer("render_seconds", stage="histogram_chart"):
+        st.plotly_chart(fig_hist, use_container_width=True)
 
     # Symbols in selected range
     st.subheader(f'🎯 Symbols in Range ({rsi_range[0]}-{rsi_range[1]})')
-    df_in_range = df[(df['4h RSI'] >= rsi_range[0]) & (df['4h RSI'] <= rsi_range[1])].sort_values(by='4h RSI', ascending=False)
+    df_in_range = df.iloc[index.between('4h RSI', *rsi_range)]
     if not df_in_range.empty:
-        fig_range = px.scatter(df_in_range, x='Symbol', y='4h RSI', color='4h RSI', 
-                               title=f'Symbols with RSI between {rsi_range[0]} and {rsi_range[1]}',
-                               color_continuous_scale='Viridis')
-        fig_range.update_traces(marker=dict(size=10))
-        fig_range.update_layout(
-            xaxis_tickangle=-45,
-            plot_bgcolor='#1E1E1E',
-            paper_bgcolor='#1E1E1E',
-            font_color='white'
-        )
-        st.plotly_chart(fig_range, use_container_width=True)
+        with metrics.timer("render_seconds", stage="range_figure"):
+            fig_range = range_figure(snapshot_id, rsi_range, df_in_range)
+        with metrics.timer("render_seconds", stage="range_chart"):
+            st.plotly_chart(fig_range, use_container_width=True)
         
-        st.dataframe(df_in_range[['Symbol', '4h RSI']].style
-                     .format({'4h RSI': '{:.2f}'})
-                     .background_gradient(cmap='viridis', subset=['4h RSI']))
+        # The Styler is rendered inside st.dataframe, so the table is timed as a whole.
+        with metrics.timer("render_seconds", stage="range_table"):
+            paged_table(df_in_range[['Symbol', '4h RSI']], ['4h RSI'], key='range_page')
     else:
         st.info("No symbols found in the selected RSI range.")
 
+    # Extremes of the whole universe, straight from the sorted index
+    col_low, col_high = st.columns(2)
+    with col_low:
+        st.subheader(f'🔻 {TOP_N} Most Oversold')
+        st.dataframe(df.iloc[index.lowest('4h RSI', TOP_N)][['Symbol', '4h RSI']].style.format({'4h RSI': '{:.2f}'}), hide_index=True)
+    with col_high:
+        st.subheader(f'🔺 {TOP_N} Most Overbought')
+        st.dataframe(df.iloc[index.highest('4h RSI', TOP_N)][['Symbol', '4h RSI']].style.format({'4h RSI': '{:.2f}'}), hide_index=True)
+
+    # Multi-timeframe screener
+    if timeframe_ranges:
+        conditions = " and ".join(f"{low} ≤ {column} ≤ {high}" for column, (low, high) in timeframe_ranges.items())
+        st.subheader('🧭 Multi-Timeframe Screener')
+        st.caption(conditions)
+        rsi_columns = [f'{tf} RSI' for tf in timeframes]
+        df_screened = df.iloc[index.screen(timeframe_ranges)][['Symbol'] + rsi_columns]
+        if not df_screened.empty:
+            with metrics.timer("render_seconds", stage="screener_table"):
+                paged_table(df_screened, rsi_columns, key='screener_page')
+        else:
+            st.info("No symbols match every timeframe condition.")
+
     # Detailed view of selected symbols
     if symbols_to_show:
         st.subheader('🔍 Detailed Symbol View')
@@ -268,6 +302,21 @@ def display_streamlit_app():
         st.dataframe(df_selected[['Symbol', '4h RSI']]
                      .style.format({'4h RSI': '{:.2f}'})
                      .background_gradient(cmap='viridis', subset=['4h RSI']))
+        live_prices(df_selected)
+
+        history = rsi_history(tuple(symbols_to_show))
+        if len(history):
+            fig_history = px.line(history, x=snapshot_archive.SNAPSHOT_COLUMN, y='4h RSI', color='Symbol',
+                                  title=f'4h RSI over the last {HISTORY_DAYS} days',
+                                  labels={snapshot_archive.SNAPSHOT_COLUMN: 'Time'})
+            fig_history.add_hline(y=30, line_dash="dash", line_color="#FF4136")
+            fig_history.add_hline(y=70, line_dash="dash", line_color="#2ECC40")
+            fig_history.update_layout(
+                plot_bgcolor='#1E1E1E',
+                paper_bgcolor='#1E1E1E',
+                font_color='white'
+            )
+            st.plotly_chart(fig_history, use_container_width=True)
 
 if __name__ == "__main__":
     display_streamlit_app()
@@ -0,0 +1,133 @@
+"""Vectorized pivots, recommendations and grid settings for the whole universe.
+
+These mirror calculate_pivot_points, get_recommendation and optimize_grid_settings in
+mavbook.py, but take one float64 array per input and compute every symbol in a single
+NumPy pass. Values stay as floats; use as_decimal when displaying or exporting them.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+# Configuration
+MIN_DISTANCE_TO_TARGET = 4.5
+MAX_DISTANCE_TO_ANCHOR = 3.0
+GRID_SIZE_ATR_MULTIPLIER = 0.5
+NUM_GRIDS = 10
+STOP_LOSS_OFFSET = 0.05
+ATR_WINDOW = 14
+
+LONG, NEUTRAL, SHORT = 1, 0, -1
+RECOMMENDATION_LABELS = np.array(["SHORT", "NEUTRAL", "LONG"])
+
+def as_decimal(value, places=8):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_EVEN)
+
+def recommendation_labels(codes):
+    return RECOMMENDATION_LABELS[np.asarray(codes, dtype=np.int8) + 1]
+
+def pivot_points(high, low, close):
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    pivot = (high + low + close) / 3.0
+    return {
+        'pivot': pivot,
+        'r1': 2.0 * pivot - low, 's1': 2.0 * pivot - high,
+        'r2': pivot + (high - low), 's2': pivot - (high - low),
+        'r3': high + 2.0 * (pivot - low), 's3': low - 2.0 * (high - pivot)
+    }
+
+def distances(current_price, r1, s1):
+    current_price, r1, s1 = (np.asarray(values, dtype=np.float64) for values in (current_price, r1, s1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distance_to_r1 = (r1 - current_price) / current_price * 100.0
+        distance_to_s1 = (current_price - s1) / current_price * 100.0
+    return distance_to_r1, distance_to_s1
+
+def recommendations(current_price, r1, s1):
+    """Return int8 codes: LONG (1), SHORT (-1) or NEUTRAL (0) per symbol."""
+    distance_to_r1, distance_to_s1 = distances(current_price, r1, s1)
+    long_mask = (distance_to_r1 > MIN_DISTANCE_TO_TARGET) & (distance_to_s1 < MAX_DISTANCE_TO_ANCHOR)
+    short_mask = (distance_to_s1 > MIN_DISTANCE_TO_TARGET) & (distance_to_r1 < MAX_DISTANCE_TO_ANCHOR)
+    codes = np.zeros(distance_to_r1.shape, dtype=np.int8)
+    codes[long_mask] = LONG
+    codes[short_mask & ~long_mask] = SHORT
+    return codes
+
+def grid_settings(current_price, atr, signal, s1, r1, grid_multiplier=GRID_SIZE_ATR_MULTIPLIER, num_grids=NUM_GRIDS,
+                  stop_loss_offset=STOP_LOSS_OFFSET):
+    """Grid settings per symbol; the multiplier, grid count and stop offset may also be arrays."""
+    current_price, atr, s1, r1 = (np.asarray(values, dtype=np.float64) for values in (current_price, atr, s1, r1))
+    signal = np.asarray(signal, dtype=np.int8)
+    grid_size = atr * np.asarray(grid_multiplier, dtype=np.float64)
+    num_grids = np.broadcast_to(np.asarray(num_grids, dtype=np.int64), grid_size.shape).copy()
+    half_span = num_grids / 2.0 * grid_size
+
+    is_long = signal == LONG
+    is_short = signal == SHORT
+    entry_point = np.where(is_long, np.maximum(current_price - half_span, s1),
+                  np.where(is_short, np.minimum(current_price + half_span, r1), current_price))
+    exit_point = np.where(is_long, np.minimum(current_price + half_span, r1),
+                 np.where(is_short, np.maximum(current_price - half_span, s1), current_price))
+    stop_loss = np.where(is_long, entry_point * (1.0 - stop_loss_offset), entry_point * (1.0 + stop_loss_offset))
+
+    return {
+        "grid_size": grid_size,
+        "num_grids": num_grids,
+        "entry_point": entry_point,
+        "exit_point": exit_point,
+        "stop_loss": stop_loss,
+        "take_profit": exit_point.copy()
+    }
+
+def screen(symbols, high, low, close, current_price, atr):
+    """Pivots, recommendation and grid settings for every symbol as one columnar DataFrame."""
+    pivots = pivot_points(high, low, close)
+    signal = recommendations(current_price, pivots['r1'], pivots['s1'])
+    settings = grid_settings(current_price, atr, signal, pivots['s1'], pivots['r1'])
+    distance_to_r1, distance_to_s1 = distances(current_price, pivots['r1'], pivots['s1'])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grid_profit = settings["grid_size"] / np.asarray(current_price, dtype=np.float64) * 100.0
+
+    columns = {
+        "Symbol": list(symbols),
+        "Price": np.asarray(current_price, dtype=np.float64),
+        "ATR": np.asarray(atr, dtype=np.float64),
+        "Recommendation": recommendation_labels(signal),
+        "Distance to R1 (%)": distance_to_r1,
+        "Distance to S1 (%)": distance_to_s1,
+        "GRID Profit (%)": grid_profit,
+    }
+    columns.update(pivots)
+    columns.update(settings)
+    return pd.DataFrame(columns)
+
+def screen_store(store, symbols, pivot_interval="1d", price_interval="4h", atr_intervals=("1d", "4h"), window=ATR_WINDOW):
+    """Screen `symbols` using only candles already in the local candle store.
+
+    Pivots come from the last closed `pivot_interval` candle and the price from the last
+    closed `price_interval` candle. ATR is the volume-weighted true range over the last
+    `window` bars of every ATR interval, as in calculate_weighted_atr.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    pivot_candles = store.load_matrix(symbols, pivot_interval, 1, ("high", "low", "close"))
+    current_price = store.load_matrix(symbols, price_interval, 1, ("close",))["close"][:, -1]
+
+    weighted = np.zeros(len(symbols))
+    total_volume = np.zeros(len(symbols))
+    for interval in atr_intervals:
+        # One extra leading bar gives the first true range in the window its previous close.
+        candles = store.load_matrix(symbols, interval, window + 1, ("high", "low", "close", "volume"))
+        interval_weighted, interval_volume = indicators.weighted_true_range_sums(
+            candles["high"], candles["low"], candles["close"], candles["volume"], window
+        )
+        weighted += interval_weighted
+        total_volume += interval_volume
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        atr = np.where(total_volume > 0, weighted / total_volume, np.nan)
+    result = screen(symbols, pivot_candles["high"][:, -1], pivot_candles["low"][:, -1], pivot_candles["close"][:, -1], current_price, atr)
+    return result.dropna(subset=["Price", "ATR", "pivot"]).reset_index(drop=True)
@@ -0,0 +1,133 @@
+"""Failure tracking for the fetch paths.
+
+HealthTracker counts failures by cause ("not_found", "timeout", "rate_limited", ...) and
+keeps a circuit breaker per symbol. Only failures that are the symbol's own fault, such as
+TradingView or Bybit not knowing it, trip a breaker. Transport failures of a whole batch
+are counted but never blamed on the symbols in it. A tripped symbol is skipped until its
+cool-down ends; the cool-down doubles with every further failure, up to MAX_COOLDOWN.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import aiohttp
+import requests
+
+import atomic_file
+import indicator_cache
+
+# Configuration
+HEALTH_PATH = os.path.join(indicator_cache.CACHE_DIR, "health.json")
+FAILURE_THRESHOLD = 2
+BASE_COOLDOWN = 5 * 60
+MAX_COOLDOWN = 24 * 60 * 60
+
+def classify(error):
+    """Map an exception from requests, aiohttp or the Bybit client to a failure cause."""
+    status = getattr(error, "status", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if getattr(error, "ret_code", None) == 10001 or status == 404:
+        return "not_found"
+    if status == 429:
+        return "rate_limited"
+    if status is not None and status >= 500:
+        return "server_error"
+    if status is not None:
+        return "http_error"
+    if isinstance(error, (asyncio.TimeoutError, requests.Timeout)):
+        return "timeout"
+    if isinstance(error, (aiohttp.ClientError, requests.ConnectionError)):
+        return "connection"
+    return "api_error"
+
+def describe_errors(errors):
+    """One line such as "timeout 12 · rate_limited 3", largest count first."""
+    return " · ".join(f"{cause} {count}" for cause, count in Counter(errors).most_common()) or "none"
+
+class HealthTracker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, base_cooldown=BASE_COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._open_until = {}
+        self._last_cause = {}
+        self.errors = Counter()
+
+    def record_success(self, symbols):
+        with self._lock:
+            for symbol in symbols:
+                self._failures.pop(symbol, None)
+                self._open_until.pop(symbol, None)
+                self._last_cause.pop(symbol, None)
+
+    def record_failure(self, symbols, cause, now=None):
+        """Count a failure caused by the symbols themselves and trip their breakers."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for symbol in symbols:
+                failures = self._failures.get(symbol, 0) + 1
+                self._failures[symbol] = failures
+                self._last_cause[symbol] = cause
+                self.errors[cause] += 1
+                if failures >= self.failure_threshold:
+                    steps = failures - self.failure_threshold
+                    self._open_until[symbol] = now + min(self.max_cooldown, self.base_cooldown * 2 ** steps)
+
+    def record_errors(self, counts):
+        """Add batch-level failures, e.g. {"timeout": 100}, without blaming any symbol."""
+        with self._lock:
+            self.errors.update(counts)
+
+    def allowed(self, symbols, now=None):
+        """Split `symbols` into (to fetch, skipped because their breaker is open)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            skipped = [symbol for symbol in symbols if self._open_until.get(symbol, 0) > now]
+        skipped_set = set(skipped)
+        return [symbol for symbol in symbols if symbol not in skipped_set], skipped
+
+    def summary(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            cooling = {
+                symbol: {"cause": self._last_cause.get(symbol), "failures": self._failures.get(symbol, 0), "retry_in": until - now}
+                for symbol, until in self._open_until.items() if until > now
+            }
+            return {"errors": dict(self.errors), "cooling_down": cooling, "failing": len(self._failures)}
+
+    def state_dict(self):
+        with self._lock:
+            return {
+                "failures": dict(self._failures),
+                "open_until": dict(self._open_until),
+                "last_cause": dict(self._last_cause),
+                "errors": dict(self.errors),
+            }
+
+    def load_state(self, state):
+        with self._lock:
+            self._failures = dict(state.get("failures", {}))
+            self._open_until = dict(state.get("open_until", {}))
+            self._last_cause = dict(state.get("last_cause", {}))
+            self.errors = Counter(state.get("errors", {}))
+
+    def save(self, path=HEALTH_PATH):
+        with atomic_file.open_replacing(path) as f:
+            json.dump(self.state_dict(), f)
+
+    @classmethod
+    def load(cls, path=HEALTH_PATH):
+        tracker = cls()
+        try:
+            with open(path) as f:
+                tracker.load_state(json.load(f))
+        except (FileNotFoundError, ValueError):
+            pass
+        return tracker
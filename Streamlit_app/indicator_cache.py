@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Configuration
+CACHE_DIR = os.environ.get("CRYPTO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+CACHE_FILE = "indicators.sqlite3"
+# Seconds to wait after a candle closes before its values are treated as published.
+CLOSE_GRACE = 15
+
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "2h": 2 * 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1W": 7 * 24 * 60 * 60,
+}
+# Weekly candles open on Monday 00:00 UTC; the Unix epoch fell on a Thursday.
+WEEK_OFFSET = 4 * 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicators (
+    symbol TEXT NOT NULL,
+    exchange TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (symbol, exchange, interval)
+)
+"""
+
+def next_candle_close(interval, now=None):
+    now = time.time() if now is None else now
+    if interval == "1M":
+        current = datetime.fromtimestamp(now, timezone.utc)
+        year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+        return datetime(year, month, 1, tzinfo=timezone.utc).timestamp()
+    seconds = INTERVAL_SECONDS[interval]
+    offset = WEEK_OFFSET if interval == "1W" else 0
+    return ((now - offset) // seconds + 1) * seconds + offset
+
+class IndicatorCache:
+    """Indicator values keyed by (symbol, exchange, interval) in a shared SQLite file.
+
+    Every entry expires when the candle it was fetched in closes, so replicas and
+    restarts reuse each other's data and only expired symbols are fetched again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, CACHE_FILE)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, symbols, exchange, interval, indicators, now=None):
+        """Return ({symbol: (values, fetched_at)} for fresh entries, [expired or missing symbols])."""
+        now = time.time() if now is None else now
+        unique_symbols = list(dict.fromkeys(symbols))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT symbol, data, fetched_at, expires_at FROM indicators WHERE exchange = ? AND interval = ?",
+                (exchange, interval)
+            ).fetchall()
+
+        entries = {}
+        for symbol, data, fetched_at, expires_at in rows:
+            if expires_at <= now:
+                continue
+            values = json.loads(data)
+            # Entries written for a narrower indicator set cannot serve this request.
+            if all(indicator in values for indicator in indicators):
+                entries[symbol] = (values, fetched_at)
+
+        fresh = {symbol: entries[symbol] for symbol in unique_symbols if symbol in entries}
+        expired = [symbol for symbol in unique_symbols if symbol not in entries]
+        return fresh, expired
+
+    def put_many(self, results, exchange, interval, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        expires_at = next_candle_close(interval, fetched_at) + CLOSE_GRACE
+        rows = [
+            (symbol, exchange, interval, json.dumps(values), fetched_at, expires_at)
+            for symbol, values in results.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO indicators VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def purge(self, older_than):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM indicators WHERE expires_at < ?", (older_than,))
@@ -0,0 +1,80 @@
+"""NumPy indicator kernels.
+
+Every function accepts 1-D arrays (one symbol) or 2-D arrays shaped (symbols, bars) and
+works along the last axis, so the whole universe is computed in one call.
+"""
+import numpy as np
+import pandas as pd
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+def _like_input(result, values):
+    return result[0] if np.ndim(values) == 1 else result
+
+def true_range(high, low, close):
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    previous_close = np.empty_like(c)
+    previous_close[:, 0] = np.nan
+    previous_close[:, 1:] = c[:, :-1]
+    # fmax ignores the missing previous close, so the first bar is just high - low.
+    tr = np.fmax(h - l, np.fmax(np.abs(h - previous_close), np.abs(l - previous_close)))
+    return _like_input(tr, close)
+
+def rma(values, period):
+    """Wilder's moving average, seeded with the simple mean of the first `period` values.
+
+    Each row starts at its own first non-NaN value, so rows left-padded with NaN (as from
+    CandleStore.load_matrix) match the 1-D result of their unpadded history.
+    """
+    data = _as_2d(values).copy()
+    bars = data.shape[1]
+    valid = ~np.isnan(data)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), bars)
+    seed_at = first + period - 1
+    seeded = seed_at < bars
+    if not seeded.any():
+        return _like_input(np.full_like(data, np.nan), values)
+    seeded_rows = np.flatnonzero(seeded)
+    seed = data[seeded_rows[:, np.newaxis], first[seeded_rows, np.newaxis] + np.arange(period)].mean(axis=1)
+    before_seed = np.arange(bars) < seed_at[:, np.newaxis]
+    data[before_seed] = np.nan
+    data[seeded_rows, seed_at[seeded_rows]] = seed
+    # pandas' ewm runs the recursion in compiled code for every column at once.
+    smoothed = pd.DataFrame(data.T).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy(copy=True).T
+    smoothed[before_seed] = np.nan
+    return _like_input(smoothed, values)
+
+def atr(high, low, close, period=14):
+    return rma(true_range(high, low, close), period)
+
+def rsi(close, period=14):
+    c = _as_2d(close)
+    change = np.diff(c, axis=1)
+    gains = rma(np.clip(change, 0, None), period)
+    losses = rma(np.clip(-change, 0, None), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = 100.0 - 100.0 / (1.0 + gains / losses)
+    result = np.where(losses == 0, np.where(gains == 0, 50.0, 100.0), result)
+    result = np.where(np.isnan(gains), np.nan, result)
+    # Align with `close`: the first bar has no change.
+    padded = np.concatenate([np.full((c.shape[0], 1), np.nan), _as_2d(result)], axis=1)
+    return _like_input(padded, close)
+
+def weighted_true_range_sums(high, low, close, volume, window=None):
+    """Return (sum of TR * volume, sum of volume) over the last `window` bars per symbol."""
+    tr = _as_2d(true_range(high, low, close))
+    volume = _as_2d(volume)
+    if window is not None:
+        tr, volume = tr[:, -window:], volume[:, -window:]
+    valid = ~np.isnan(tr) & ~np.isnan(volume)
+    weighted = np.where(valid, tr * volume, 0.0).sum(axis=1)
+    total_volume = np.where(valid, volume, 0.0).sum(axis=1)
+    return weighted, total_volume
+
+def volume_weighted_atr(high, low, close, volume, window=None):
+    weighted, total_volume = weighted_true_range_sums(high, low, close, volume, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(total_volume > 0, weighted / total_volume, np.nan)
+    return _like_input(result, close)
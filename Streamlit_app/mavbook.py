@@ -4,6 +4,22 @@ import numpy as np
 import plotly.graph_objects as go
 from tradingview_ta import TA_Handler, Interval
 from decimal import Decimal
+import requests
+import backtest
+import bybit_stream
+import candle_store
+import grid_engine
+import health
+import indicators
+import optimizer
+import strategy_cards
+import streaming_indicators
+from universe import symbols as universe_symbols
+
+# Configuration
+ATR_INTERVALS = [Interval.INTERVAL_1_DAY, Interval.INTERVAL_4_HOURS]
+ATR_WINDOW = 14
+LIVE_REFRESH = None if bybit_stream.STREAM_MODE == "off" else 1
 
 def float_to_decimal(value):
     return Decimal(str(value))
@@ -23,23 +39,68 @@ def fetch_data(symbol, exchange, screener, interval):
         st.error(f"Error fetching data for {symbol}: {str(e)}")
         return None
 
+@st.cache_resource
+def get_candle_store():
+    return candle_store.CandleStore()
+
+@st.cache_resource
+def get_candle_health():
+    return health.HealthTracker.load(candle_store.HEALTH_PATH)
+
+@st.cache_resource
+def get_market_stream():
+    # 4h klines drive the streaming indicators; 1m klines stay the rolling candle table.
+    return bybit_stream.open_stream(universe_symbols, kline_intervals=(bybit_stream.KLINE_INTERVAL, candle_store.BYBIT_INTERVALS[Interval.INTERVAL_4_HOURS]))
+
+def live_price(symbol):
+    stream = get_market_stream()
+    price = stream.state.last_price(symbol) if stream else None
+    return None if price is None else float_to_decimal(price)
+
+@st.cache_resource
+def get_streaming_indicators():
+    # Restored from disk and caught up with the candle store once per process, then fed closed 4h candles by the stream.
+    streaming = streaming_indicators.open_indicators(universe_symbols, Interval.INTERVAL_4_HOURS, get_candle_store())
+    stream = get_market_stream()
+    if stream is not None:
+        streaming.listen(stream.state)
+    return streaming
+
+@st.cache_data(ttl=300)
+def load_candles(symbol, intervals):
+    store = get_candle_store()
+    data = {}
+    for interval in intervals:
+        # Only reaches the network when a new candle has closed since the last download.
+        try:
+            store.update(symbol, interval)
+        except (requests.RequestException, ValueError) as e:
+            st.warning(f"Could not update {interval} candles for {symbol}: {str(e)}")
+        candles = store.load(symbol, interval)
+        if len(candles['close']):
+            data[interval] = pd.DataFrame({column: np.asarray(candles[column]) for column in ('open', 'high', 'low', 'close', 'volume')})
+    streaming = get_streaming_indicators()
+    row = streaming.row(symbol)
+    if row is not None:
+        # Picks up the candles just stored, so the live RSI does not wait for the stream.
+        streaming.seed(store, symbols=[streaming.symbols[row]])
+    return data
+
 def calculate_true_range(high, low, close):
-    previous_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - previous_close).abs()
-    tr3 = (low - previous_close).abs()
-    true_range = pd.DataFrame({'TR1': tr1, 'TR2': tr2, 'TR3': tr3}).max(axis=1)
-    return true_range
-
-def calculate_weighted_atr(data):
+    true_range = indicators.true_range(high.to_numpy(dtype=float), low.to_numpy(dtype=float), close.to_numpy(dtype=float))
+    return pd.Series(true_range, index=high.index)
+
+def calculate_weighted_atr(data, window=None):
     atr_data = []
     volume_data = []
     
     for interval, df in data.items():
-        true_range = calculate_true_range(df['high'], df['low'], df['close'])
-        weighted_tr = true_range * df['volume']
+        weighted_tr, volume = indicators.weighted_true_range_sums(
+            df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+            df['close'].to_numpy(dtype=float), df['volume'].to_numpy(dtype=float), window
+        )
         atr_data.append(weighted_tr.sum())
-        volume_data.append(df['volume'].sum())
+        volume_data.append(volume.sum())
     
     if sum(volume_data) == 0:
         return None
@@ -47,6 +108,9 @@ def calculate_weighted_atr(data):
     weighted_atr = sum(atr_data) / sum(volume_data)
     return weighted_atr
 
+def calculate_rsi(close, period=14):
+    return pd.Series(indicators.rsi(close.to_numpy(dtype=float), period), index=close.index)
+
 def calculate_pivot_points(high, low, close):
     pivot = (high + low + close) / Decimal('3')
     r1 = Decimal('2') * pivot - low
@@ -73,7 +137,27 @@ def get_recommendation(current_price, r1, s1):
     else:
         return "NEUTRAL"
 
-def optimize_grid_settings(current_price, atr, position_type, s1, r1):
+def optimize_grid_settings(current_price, atr, position_type, s1, r1, candles=None, backtested=None):
+    # With candle history, pick the backtested combination with the best return over drawdown.
+    # `backtested` is an earlier optimizer.best_settings result; its parameters are laid out
+    # again around the current price.
+    if candles is not None:
+        backtested = optimizer.best_settings(candles, float(current_price), float(atr), position_type, float(s1), float(r1))
+    if backtested is not None:
+        signal = grid_engine.LONG if position_type == "LONG" else grid_engine.SHORT
+        best = optimizer.grid_levels(float(current_price), float(atr), signal, float(s1), float(r1),
+                                     **{name: backtested[name] for name in optimizer.PARAMETERS})
+        return {
+            "grid_size": float_to_decimal(best["grid_size"]),
+            "num_grids": int(best["num_grids"]),
+            "entry_point": float_to_decimal(best["entry_point"]),
+            "exit_point": float_to_decimal(best["exit_point"]),
+            "stop_loss": float_to_decimal(best["stop_loss"]),
+            "take_profit": float_to_decimal(best["take_profit"]),
+            "backtest_return_pct": backtested["return_pct"],
+            "backtest_max_drawdown_pct": backtested["max_drawdown_pct"]
+        }
+
     grid_size = atr * Decimal('0.5')
     num_grids = 10
     
@@ -99,6 +183,15 @@ def optimize_grid_settings(current_price, atr, position_type, s1, r1):
         "take_profit": take_profit
     }
 
+@st.cache_data(max_entries=256)
+def backtested_parameters(symbol, last_timestamp, position_type, _candles, _current_price, _atr, _s1, _r1):
+    # Keyed by the last stored candle, so the sweep runs once per new candle rather than on every rerun.
+    # Only the best parameters and their backtest figures are kept; the levels depend on the price.
+    best = optimizer.best_settings(_candles, float(_current_price), float(_atr), position_type, float(_s1), float(_r1))
+    if best is None:
+        return None
+    return {name: best[name] for name in (*optimizer.PARAMETERS, "return_pct", "max_drawdown_pct")}
+
 def calculate_grid_profit(suggested_grid_size, current_price):
     return (suggested_grid_size / current_price) * Decimal('100')
 
@@ -134,19 +227,23 @@ def grid_optimization_page():
                 st.metric("Support 3 (S3)", f"{pivots['s3']:.8f}")
                 st.metric("Resistance 3 (R3)", f"{pivots['r3']:.8f}")
             
-            # Calculate ATR
-            atr = calculate_weighted_atr({
-                Interval.INTERVAL_1_DAY: pd.DataFrame({
-                    'close': [close],
-                    'high': [high],
-                    'low': [low],
-                    'volume': [volume]
-                })
-            })
+            # Calculate ATR over the stored candle history, falling back to today's bar when there is none
+            candles = load_candles(symbol, ATR_INTERVALS)
+            if not candles:
+                candles = {
+                    Interval.INTERVAL_1_DAY: pd.DataFrame({
+                        'close': [close],
+                        'high': [high],
+                        'low': [low],
+                        'volume': [volume]
+                    })
+                }
+            atr = calculate_weighted_atr(candles, window=ATR_WINDOW)
             
             if atr is None:
                 st.error("Unable to calculate ATR. Please check the data.")
                 return
+            atr = float_to_decimal(atr)
             
             # Calculate GRID Profit
             grid_size = atr * Decimal('0.5')
@@ -165,7 +262,15 @@ def grid_optimization_page():
             recommendation = get_recommendation(current_price, pivots['r1'], pivots['s1'])
             
             # Optimize grid settings
-            best_settings = optimize_grid_settings(current_price, atr, recommendation, pivots['s1'], pivots['r1'])
+            history = candles.get(Interval.INTERVAL_4_HOURS)
+            if history is None:
+                best_settings = optimize_grid_settings(current_price, atr, recommendation, pivots['s1'], pivots['r1'])
+            else:
+                last_timestamp = get_candle_store().last_timestamp(symbol, Interval.INTERVAL_4_HOURS)
+                backtested = backtested_parameters(symbol, last_timestamp, recommendation, history.tail(optimizer.BACKTEST_BARS),
+                                                   current_price, atr, pivots['s1'], pivots['r1'])
+                best_settings = optimize_grid_settings(current_price, atr, recommendation, pivots['s1'], pivots['r1'],
+                                                       backtested=backtested)
             
             st.subheader("Strategy Recommendation")
             st.markdown(f"<h1 style='text-align: center; color: {'green' if recommendation == 'LONG' else 'red' if recommendation == 'SHORT' else 'yellow'};'>{recommendation}</h1>", unsafe_allow_html=True)
@@ -181,26 +286,11 @@ def grid_optimization_page():
             with col3:
                 st.metric("Grid Size", f"{best_settings['grid_size']:.8f}")
                 st.metric("Number of Grids", best_settings['num_grids'])
+            if 'backtest_return_pct' in best_settings:
+                st.caption(f"Chosen by backtesting {len(optimizer.parameter_grid()['num_grids'])} grid combinations over the last {min(len(history), optimizer.BACKTEST_BARS)} stored 4h candles: "
+                           f"{best_settings['backtest_return_pct']:.2f}% return, {best_settings['backtest_max_drawdown_pct']:.2f}% max drawdown.")
             
-            # Visualization
-            st.subheader("Grid Visualization")
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=[0], y=[float(current_price)], mode='markers', marker=dict(color='blue', size=10), name='Current Price'))
-
-            # Add pivot lines
-            for level, name in [(pivots['pivot'], 'Pivot'), (pivots['s1'], 'S1'), (pivots['r1'], 'R1'), 
-                                (pivots['s2'], 'S2'), (pivots['r2'], 'R2'), (pivots['s3'], 'S3'), (pivots['r3'], 'R3')]:
-                fig.add_trace(go.Scatter(x=[-1, 1], y=[float(level), float(level)], mode='lines', line=dict(color='gray', dash='dash'), name=name))
-
-            if recommendation != "NEUTRAL":
-                for i in range(best_settings['num_grids']):
-                    level = float(best_settings['entry_point'] + i * best_settings['grid_size']) if recommendation == "LONG" else float(best_settings['entry_point'] - i * best_settings['grid_size'])
-                    if (recommendation == "LONG" and level <= float(best_settings['exit_point'])) or (recommendation == "SHORT" and level >= float(best_settings['exit_point'])):
-                        color = 'green' if (recommendation == "LONG" and level > float(current_price)) or (recommendation == "SHORT" and level < float(current_price)) else 'red'
-                        fig.add_trace(go.Scatter(x=[-0.5, 0.5], y=[level, level], mode='lines', line=dict(color=color), name=f'Grid Level {i+1}'))
-
-            fig.update_layout(title="Grid Optimization", xaxis_title="", yaxis_title="Price", showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            live_grid_panel(symbol, current_price, pivots, recommendation, best_settings)
             
             # Strategy explanation
             st.subheader("Strategy Explanation")
@@ -219,28 +309,196 @@ def grid_optimization_page():
             with a stop loss set at 5% beyond the entry point.
             """)
 
+@st.fragment(run_every=LIVE_REFRESH)
+def live_grid_panel(symbol, current_price, pivots, recommendation, best_settings):
+    # Reruns on its own every LIVE_REFRESH seconds so only the price-dependent parts follow the stream.
+    price = live_price(symbol) or current_price
+    streaming = get_streaming_indicators()
+    row = streaming.row(symbol)
+    live_rsi = np.nan if row is None else streaming.rsi.peek_one(float(price), row)
+    st.subheader("Live Market")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Last Price", f"{price:.8f}", f"{(price - current_price) / current_price * 100:.2f}%")
+    with col2:
+        st.metric("Distance to R1", f"{(pivots['r1'] - price) / price * 100:.2f}%")
+    with col3:
+        st.metric("Distance to S1", f"{(price - pivots['s1']) / price * 100:.2f}%")
+    with col4:
+        st.metric("4h RSI", "-" if np.isnan(live_rsi) else f"{live_rsi:.2f}")
+
+    # Visualization
+    st.subheader("Grid Visualization")
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[0], y=[float(price)], mode='markers', marker=dict(color='blue', size=10), name='Current Price'))
+
+    # Add pivot lines
+    for level, name in [(pivots['pivot'], 'Pivot'), (pivots['s1'], 'S1'), (pivots['r1'], 'R1'), 
+                        (pivots['s2'], 'S2'), (pivots['r2'], 'R2'), (pivots['s3'], 'S3'), (pivots['r3'], 'R3')]:
+        fig.add_trace(go.Scatter(x=[-1, 1], y=[float(level), float(level)], mode='lines', line=dict(color='gray', dash='dash'), name=name))
+
+    if recommendation != "NEUTRAL":
+        for i in range(best_settings['num_grids']):
+            level = float(best_settings['entry_point'] + i * best_settings['grid_size']) if recommendation == "LONG" else float(best_settings['entry_point'] - i * best_settings['grid_size'])
+            if (recommendation == "LONG" and level <= float(best_settings['exit_point'])) or (recommendation == "SHORT" and level >= float(best_settings['exit_point'])):
+                color = 'green' if (recommendation == "LONG" and level > float(price)) or (recommendation == "SHORT" and level < float(price)) else 'red'
+                fig.add_trace(go.Scatter(x=[-0.5, 0.5], y=[level, level], mode='lines', line=dict(color=color), name=f'Grid Level {i+1}'))
+
+    fig.update_layout(title="Grid Optimization", xaxis_title="", yaxis_title="Price", showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_data(ttl=300)
+def screen_universe():
+    return grid_engine.screen_store(get_candle_store(), universe_symbols)
+
+def grid_screener_page():
+    st.header("Grid Screener")
+    st.write("Pivots, recommendation and grid settings for every symbol in the universe, computed from the local candle store.")
+
+    if st.button("Update Candles"):
+        tracker = get_candle_health()
+        with st.spinner("Downloading closed candles for the universe..."):
+            get_candle_store().update_many(universe_symbols, ATR_INTERVALS, tracker=tracker)
+        tracker.save(candle_store.HEALTH_PATH)
+        screen_universe.clear()
+        summary = tracker.summary()
+        if summary["errors"] or summary["cooling_down"]:
+            st.warning(f"Candle update errors: {health.describe_errors(summary['errors'])}; "
+                       f"{len(summary['cooling_down'])} symbols cooling down.")
+
+    df = screen_universe()
+    if df.empty:
+        st.info("The candle store is empty. Press 'Update Candles' or run `python candle_store.py` first.")
+        return
+
+    recommendations = st.multiselect("Recommendation", ["LONG", "SHORT", "NEUTRAL"], default=["LONG", "SHORT"])
+    df = df[df['Recommendation'].isin(recommendations)].sort_values(by='GRID Profit (%)', ascending=False)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Symbols Screened", len(df))
+    with col2:
+        st.metric("LONG", int((df['Recommendation'] == "LONG").sum()))
+    with col3:
+        st.metric("SHORT", int((df['Recommendation'] == "SHORT").sum()))
+
+    # Round to Decimal only for what is actually displayed.
+    display_columns = ['Price', 'ATR', 'pivot', 's1', 'r1', 'entry_point', 'exit_point', 'stop_loss', 'grid_size']
+    display = df[['Symbol', 'Recommendation', 'Distance to R1 (%)', 'Distance to S1 (%)', 'GRID Profit (%)'] + display_columns].copy()
+    for column in display_columns:
+        display[column] = [str(grid_engine.as_decimal(value)) for value in display[column]]
+    st.dataframe(display.style.format({
+        'Distance to R1 (%)': '{:.2f}', 'Distance to S1 (%)': '{:.2f}', 'GRID Profit (%)': '{:.2f}'
+    }), use_container_width=True)
+
+def strategy_card_page():
+    st.header("Strategy Card")
+    st.write("Summarize your settings and download a personalized strategy card.")
+
+    df = screen_universe()
+    if df.empty:
+        st.info("The candle store is empty. Press 'Update Candles' on the Grid Screener page or run `python candle_store.py` first.")
+        return
+
+    recommendations = st.multiselect("Recommendation", ["LONG", "SHORT", "NEUTRAL"], default=["LONG", "SHORT"], key="card_recommendations")
+    cards = strategy_cards.card_frame(df[df['Recommendation'].isin(recommendations)])
+    if cards.empty:
+        st.info("No symbols match the selected recommendations.")
+        return
+
+    symbol = st.selectbox("Symbol", cards['Symbol'])
+    card = strategy_cards.render_card(cards[cards['Symbol'] == symbol].iloc[0])
+    st.markdown(card)
+    st.download_button("Download Card", card, file_name=f"{symbol}_strategy_card.md", mime="text/markdown")
+
+    st.subheader("All Cards")
+    st.write(f"{len(cards)} symbols. For the whole universe with backtested settings, run `python strategy_cards.py --output cards.csv --backtest`.")
+    table = strategy_cards.format_prices(cards)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Download CSV", table.to_csv(index=False), file_name="strategy_cards.csv", mime="text/csv")
+    with col2:
+        st.download_button("Download JSON", table.to_json(orient="records", indent=2), file_name="strategy_cards.json", mime="application/json")
+
+def profit_projections_page():
+    st.header("Profit Projections")
+    st.write("Replay stored candles through the suggested grid to see fills, realized grid profit, fees and drawdown.")
+
+    symbol = st.text_input("Enter symbol (e.g., CKBUSDT):", value="CKBUSDT", key="projection_symbol")
+    if not symbol:
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        interval = st.selectbox("Candle Interval", ATR_INTERVALS, index=1)
+    with col2:
+        bars = st.number_input("Bars to Replay", min_value=20, max_value=candle_store.HISTORY_BARS, value=180, step=10)
+    with col3:
+        capital = st.number_input("Capital (USDT)", min_value=10.0, value=backtest.CAPITAL, step=100.0)
+    with col4:
+        fee_rate = st.number_input("Fee per Fill (%)", min_value=0.0, value=backtest.FEE_RATE * 100, step=0.01, format="%.3f") / 100
+
+    candles = load_candles(symbol, ATR_INTERVALS)
+    if interval not in candles:
+        st.error(f"No {interval} candles stored for {symbol}.")
+        return
+    screened = grid_engine.screen_store(get_candle_store(), [symbol])
+    if screened.empty:
+        st.error("Unable to derive grid settings from the stored candles.")
+        return
+    row = screened.iloc[0]
+
+    recommendation = row['Recommendation']
+    direction = st.radio("Direction", ["LONG", "SHORT"], index=1 if recommendation == "SHORT" else 0, horizontal=True)
+    if recommendation == "NEUTRAL":
+        st.info(f"{symbol} is currently NEUTRAL; projecting a {direction} grid anyway.")
+    signal = grid_engine.LONG if direction == "LONG" else grid_engine.SHORT
+    settings = {key: value[0] for key, value in grid_engine.grid_settings(
+        [row['Price']], [row['ATR']], [signal], [row['s1']], [row['r1']]
+    ).items()}
+
+    history = candles[interval].tail(int(bars))
+    result = backtest.backtest_settings(history, settings, direction, capital=capital, fee_rate=fee_rate, record_equity=True)
+
+    st.subheader("Backtest Results")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Net Profit", f"{result['net_profit']:.2f} USDT", f"{result['return_pct']:.2f}%")
+        st.metric("Realized Grid Profit", f"{result['realized_profit']:.2f} USDT")
+    with col2:
+        st.metric("Max Drawdown", f"{result['max_drawdown']:.2f} USDT", f"-{result['max_drawdown_pct']:.2f}%", delta_color="inverse")
+        st.metric("Fees", f"{result['fees']:.2f} USDT")
+    with col3:
+        st.metric("Fills", int(result['fills']))
+        st.metric("Completed Grid Trades", int(result['round_trips']))
+    if result['stopped']:
+        st.warning(f"The stop loss was hit after {int(result['finished_at']) + 1} of {len(history)} bars.")
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(y=result['equity'], mode='lines', name='Equity (USDT)'))
+    fig.update_layout(title=f"{direction} grid equity over the last {len(history)} {interval} candles", xaxis_title="Bar", yaxis_title="Profit (USDT)", showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
 def main():
     st.set_page_config(page_title="Maverick Book", layout="wide")
     
     st.title("Maverick Book")
     
     # Sidebar navigation
-    page = st.sidebar.selectbox("Chapters", ["Introduction", "Grid Optimization", "Profit Projections", "Strategy Card"])
+    page = st.sidebar.selectbox("Chapters", ["Introduction", "Grid Optimization", "Grid Screener", "Profit Projections", "Strategy Card"])
 
     if page == "Grid Optimization":
         grid_optimization_page()
+    elif page == "Grid Screener":
+        grid_screener_page()
     elif page == "Introduction":
         st.header("Welcome to Maverick Book")
         st.write("This interactive tool helps you optimize your grid bot strategy using market data, pivot points, and support/resistance levels.")
         st.write("Navigate to the Grid Optimization page to analyze a specific symbol and get recommendations.")
     elif page == "Profit Projections":
-        st.header("Profit Projections")
-        st.write("Project potential profits based on your grid bot settings.")
-        st.info("This section is under development. Check back soon for updates!")
+        profit_projections_page()
     elif page == "Strategy Card":
-        st.header("Strategy Card")
-        st.write("Summarize your settings and download a personalized strategy card.")
-        st.info("This section is under development. Check back soon for updates!")
+        strategy_card_page()
 
 if __name__ == "__main__":
     main()
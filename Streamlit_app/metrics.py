@@ -0,0 +1,199 @@
+"""In-process counters and latency histograms, exposed in the Prometheus text format.
+
+Disabled unless CRYPTO_METRICS=on. While disabled, `timer()` hands out one shared no-op
+context manager and `inc`/`observe` return immediately, so instrumented hot paths pay a
+function call and nothing else. When enabled, `serve()` publishes everything on
+http://127.0.0.1:<port>/metrics:
+
+    CRYPTO_METRICS=on CRYPTO_METRICS_PORT=9108 python collector.py
+    curl -s localhost:9108/metrics
+
+CRYPTO_LOG_FORMAT=json switches `configure_logging()` to one JSON object per line.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configuration
+ENABLED = os.environ.get("CRYPTO_METRICS", "off").lower() in ("1", "on", "true")
+METRICS_PORT = int(os.environ.get("CRYPTO_METRICS_PORT", "9108"))
+LOG_FORMAT = os.environ.get("CRYPTO_LOG_FORMAT", "text")
+PREFIX = "crypto_"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_server = None
+logger = logging.getLogger(__name__)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        histogram[0][index] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name, **labels):
+    """`with timer("stage_seconds", stage="style"):` records the block's wall time."""
+    return _Timer(name, labels) if ENABLED else _NULL_TIMER
+
+def _quantile(buckets, count, q):
+    # Linear interpolation inside the bucket, like PromQL's histogram_quantile.
+    rank = q * count
+    seen = 0
+    for index, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            low = BUCKETS[index - 1] if index else 0.0
+            high = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+            return low + (high - low) * (rank - seen) / n
+        seen += n
+    return float("nan")
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in _histograms.items())
+    lines = []
+    declared = set()
+
+    def declare(name, kind):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    for (name, labels), value in counters:
+        declare(name, "counter")
+        lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+    for (name, labels), (buckets, total, count) in histograms:
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, n in zip((*BUCKETS, "+Inf"), buckets):
+            cumulative += n
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+def snapshot():
+    """Rows for the debug panel: one per counter or histogram series."""
+    with _lock:
+        counters = list(_counters.items())
+        histograms = [(key, (list(h[0]), h[1], h[2])) for key, h in _histograms.items()]
+    rows = [{"metric": name, "labels": dict(labels), "count": value} for (name, labels), value in counters]
+    for (name, labels), (buckets, total, count) in histograms:
+        rows.append({
+            "metric": name, "labels": dict(labels), "count": count, "mean_ms": total / count * 1000,
+            "p50_ms": _quantile(buckets, count, 0.5) * 1000, "p99_ms": _quantile(buckets, count, 0.99) * 1000,
+        })
+    return sorted(rows, key=lambda row: (row["metric"], sorted(row["labels"].items())))
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(port=METRICS_PORT, host="127.0.0.1"):
+    """Start the /metrics endpoint once per process; returns the server, or None when disabled."""
+    global _server
+    if not ENABLED:
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                # Another process (e.g. the collector) may already own the port.
+                logger.warning("Cannot serve /metrics on %s:%s: %s", host, port, e)
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level=logging.INFO, log_format=LOG_FORMAT):
+    if log_format == "json":
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        logging.basicConfig(level=level, handlers=[handler])
+    else:
+        logging.basicConfig(level=level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
@@ -0,0 +1,243 @@
+"""Grid parameter sweep across the symbol universe.
+
+For every symbol the grid size multiplier, grid count, stop loss and take profit offsets
+are swept through backtest.backtest_grid and ranked by return over max drawdown. The
+universe is fanned out over a process pool: candle history is copied once into shared
+memory and workers read it in place instead of receiving pickled arrays. Finished symbols
+are appended to a JSON-lines checkpoint, so an interrupted run resumes where it stopped:
+
+    python optimizer.py --interval 4h --bars 500 --checkpoint sweep.jsonl --output sweep.csv
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import candle_store
+import grid_engine
+import indicator_cache
+import metrics
+
+logger = logging.getLogger("optimizer")
+
+# Configuration
+GRID_MULTIPLIERS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0)
+GRID_COUNTS = (5, 8, 10, 15, 20, 30)
+STOP_LOSS_OFFSETS = (0.02, 0.03, 0.05, 0.08)
+TAKE_PROFIT_OFFSETS = (0.0, 0.01, 0.02, 0.05)
+# Drawdowns below this share of capital (%) do not inflate the score of quiet grids.
+DRAWDOWN_FLOOR_PCT = 1.0
+MIN_BARS = 50
+# A bounded tail: today's absolute-price grid says little about months-old prices.
+BACKTEST_BARS = 500
+TOP_N = 5
+CHECKPOINT_PATH = os.path.join(indicator_cache.CACHE_DIR, "sweep_checkpoint.jsonl")
+OHLC = ("open", "high", "low", "close")
+PARAMETERS = ("grid_multiplier", "num_grids", "stop_loss_offset", "take_profit_offset")
+
+def parameter_grid():
+    combos = np.array(list(itertools.product(GRID_MULTIPLIERS, GRID_COUNTS, STOP_LOSS_OFFSETS, TAKE_PROFIT_OFFSETS)))
+    return {
+        "grid_multiplier": combos[:, 0],
+        "num_grids": combos[:, 1].astype(np.int64),
+        "stop_loss_offset": combos[:, 2],
+        "take_profit_offset": combos[:, 3],
+    }
+
+def risk_adjusted_score(result):
+    return result["return_pct"] / np.maximum(result["max_drawdown_pct"], DRAWDOWN_FLOOR_PCT)
+
+def grid_levels(current_price, atr, signal, s1, r1, grid_multiplier, num_grids, stop_loss_offset, take_profit_offset):
+    """grid_engine.grid_settings with the take profit moved `take_profit_offset` beyond the
+    exit point. The parameters may be arrays, one entry per combination."""
+    settings = grid_engine.grid_settings(current_price, atr, signal, s1, r1, grid_multiplier, num_grids, stop_loss_offset)
+    direction = 1.0 if signal == grid_engine.LONG else -1.0
+    settings["take_profit"] = settings["exit_point"] * (1.0 + direction * np.asarray(take_profit_offset, dtype=np.float64))
+    return settings
+
+def sweep(candles, current_price, atr, signal, s1, r1, capital=backtest.CAPITAL, fee_rate=backtest.FEE_RATE):
+    """Backtest every parameter combination for one symbol and direction.
+
+    `candles` maps open/high/low/close to 1-D arrays. Returns a DataFrame with one row per
+    combination, best score first.
+    """
+    params = parameter_grid()
+    settings = grid_levels(current_price, atr, signal, s1, r1, **params)
+
+    result = backtest.backtest_grid(
+        candles["open"], candles["high"], candles["low"], candles["close"],
+        settings["entry_point"], settings["grid_size"], settings["num_grids"],
+        settings["stop_loss"], settings["take_profit"],
+        direction=signal, capital=capital, fee_rate=fee_rate
+    )
+    columns = dict(params)
+    columns.update(settings)
+    columns.update({key: result[key] for key in ("net_profit", "return_pct", "max_drawdown_pct", "fills", "round_trips", "fees", "stopped")})
+    columns["score"] = risk_adjusted_score(result)
+    return pd.DataFrame(columns).sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+def traded(ranked):
+    # A grid that never filled scores 0 and would otherwise outrank every grid that traded at a small loss.
+    return ranked[ranked["fills"] > 0]
+
+def best_settings(candles, current_price, atr, position_type, s1, r1):
+    """Best optimize_grid_settings-style dict for one symbol, or None without enough history
+    or when no combination traded at all. The PARAMETERS that produced it are included, so
+    the levels can be rebuilt with grid_levels when the price moves."""
+    signal = {"LONG": grid_engine.LONG, "SHORT": grid_engine.SHORT}.get(position_type)
+    candles = {column: np.asarray(candles[column], dtype=np.float64) for column in OHLC}
+    if signal is None or len(candles["close"]) < MIN_BARS:
+        return None
+    ranked = traded(sweep(candles, current_price, atr, signal, s1, r1))
+    if ranked.empty:
+        return None
+    best = ranked.iloc[0]
+    return {
+        "grid_size": best["grid_size"],
+        "num_grids": int(best["num_grids"]),
+        "entry_point": best["entry_point"],
+        "exit_point": best["exit_point"],
+        "stop_loss": best["stop_loss"],
+        "take_profit": best["take_profit"],
+        "grid_multiplier": best["grid_multiplier"],
+        "stop_loss_offset": best["stop_loss_offset"],
+        "take_profit_offset": best["take_profit_offset"],
+        "score": best["score"],
+        "return_pct": best["return_pct"],
+        "max_drawdown_pct": best["max_drawdown_pct"],
+    }
+
+# Worker-side view of the shared candle block, set by _attach_candles.
+_shared = None
+_candles = None
+
+def _attach_candles(name, shape):
+    global _shared, _candles
+    # Pool workers share the parent's resource tracker, so the parent's unlink cleans up.
+    _shared = shared_memory.SharedMemory(name=name)
+    _candles = np.ndarray(shape, dtype=np.float64, buffer=_shared.buf)
+
+def _sweep_symbol(row, symbol, inputs, capital, fee_rate):
+    history = {column: _candles[i, row] for i, column in enumerate(OHLC)}
+    available = ~np.isnan(history["close"])
+    history = {column: values[available] for column, values in history.items()}
+    if available.sum() < MIN_BARS:
+        return symbol, []
+
+    signals = [inputs["signal"]] if inputs["signal"] != grid_engine.NEUTRAL else [grid_engine.LONG, grid_engine.SHORT]
+    ranked = pd.concat([
+        traded(sweep(history, inputs["price"], inputs["atr"], signal, inputs["s1"], inputs["r1"], capital, fee_rate))
+        .assign(direction=grid_engine.recommendation_labels([signal])[0])
+        for signal in signals
+    ]).sort_values("score", ascending=False, kind="stable").head(TOP_N)
+    ranked.insert(0, "symbol", symbol)
+    return symbol, json.loads(ranked.to_json(orient="records"))
+
+def load_checkpoint(path):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn last line from an interrupted run; that symbol is simply redone.
+                continue
+            done[entry["symbol"]] = entry["results"]
+    return done
+
+def _open_checkpoint(path):
+    log = open(path, "a+")
+    # Start on a fresh line if the previous run died halfway through writing one.
+    if log.tell() > 0:
+        log.seek(log.tell() - 1)
+        if log.read(1) != "\n":
+            log.write("\n")
+    return log
+
+def run_sweep(store, symbols, interval="4h", bars=BACKTEST_BARS, workers=None, checkpoint=CHECKPOINT_PATH,
+              capital=backtest.CAPITAL, fee_rate=backtest.FEE_RATE):
+    """Sweep every symbol in parallel and return the top results per symbol, best first."""
+    symbols = list(dict.fromkeys(symbols))
+    done = load_checkpoint(checkpoint) if checkpoint else {}
+    pending = [symbol for symbol in symbols if symbol not in done]
+    logger.info("%d symbols to sweep, %d restored from checkpoint", len(pending), len(symbols) - len(pending))
+
+    if pending:
+        screened = grid_engine.screen_store(store, pending).set_index("Symbol")
+        pending = [symbol for symbol in pending if symbol in screened.index]
+        matrix = store.load_matrix(pending, interval, bars, OHLC)
+        shape = (len(OHLC), len(pending), bars)
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        shared = None
+        try:
+            shared = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+            for i, column in enumerate(OHLC):
+                shared[i] = matrix[column]
+            del matrix
+
+            signal_codes = {"LONG": grid_engine.LONG, "SHORT": grid_engine.SHORT, "NEUTRAL": grid_engine.NEUTRAL}
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_candles, initargs=(block.name, shape)) as executor, \
+                    _open_checkpoint(checkpoint) if checkpoint else open(os.devnull, "w") as log:
+                futures = []
+                for row, symbol in enumerate(pending):
+                    entry = screened.loc[symbol]
+                    inputs = {
+                        "price": float(entry["Price"]), "atr": float(entry["ATR"]),
+                        "s1": float(entry["s1"]), "r1": float(entry["r1"]),
+                        "signal": signal_codes[entry["Recommendation"]],
+                    }
+                    futures.append(executor.submit(_sweep_symbol, row, symbol, inputs, capital, fee_rate))
+                for future in as_completed(futures):
+                    symbol, results = future.result()
+                    done[symbol] = results
+                    log.write(json.dumps({"symbol": symbol, "results": results}) + "\n")
+                    log.flush()
+        finally:
+            del shared
+            block.close()
+            block.unlink()
+
+    rows = [result for symbol in symbols for result in done.get(symbol, [])]
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+def main():
+    from universe import symbols
+
+    parser = argparse.ArgumentParser(description="Sweep grid parameters for every symbol in the candle store")
+    parser.add_argument("--interval", default="4h", choices=sorted(candle_store.BYBIT_INTERVALS))
+    parser.add_argument("--bars", type=int, default=BACKTEST_BARS, help="Candles to replay per symbol")
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to one per CPU core")
+    parser.add_argument("--symbols", nargs="*", help="Defaults to the whole universe")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--fresh", action="store_true", help="Ignore and replace an existing checkpoint")
+    parser.add_argument("--output", help="Write the ranked results to this CSV file")
+    args = parser.parse_args()
+
+    metrics.configure_logging()
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    os.makedirs(os.path.dirname(os.path.abspath(args.checkpoint)), exist_ok=True)
+
+    started = time.monotonic()
+    results = run_sweep(candle_store.CandleStore(), args.symbols or symbols, args.interval, args.bars, args.workers, args.checkpoint)
+    logger.info("Swept %d symbols in %.1fs", results["symbol"].nunique() if len(results) else 0, time.monotonic() - started)
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+    else:
+        print(results.groupby("symbol").head(1).head(20).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
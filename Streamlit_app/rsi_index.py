@@ -0,0 +1,70 @@
+"""Sorted per-column index over a snapshot for range and top-N queries.
+
+Built once per snapshot (O(n log n) per RSI column). Afterwards every range count is two
+binary searches, and a range slice or a top/bottom-N list costs O(log n + k) for k rows
+returned, however often the filters move. NaN values are left out of the index, so they
+match no range, the same as a comparison mask.
+"""
+import numpy as np
+
+class RsiIndex:
+    def __init__(self, df, columns=None):
+        columns = [column for column in df.columns if column.endswith(" RSI")] if columns is None else list(columns)
+        self._length = len(df)
+        self._values = {}
+        self._sorted = {}
+        self._positions = {}
+        for column in columns:
+            values = df[column].to_numpy(dtype=np.float64)
+            positions = np.argsort(values, kind="stable")
+            # argsort puts NaN last; drop them so the searches only see real values.
+            positions = positions[:np.count_nonzero(~np.isnan(values))]
+            self._values[column] = values
+            self._sorted[column] = values[positions]
+            self._positions[column] = positions
+
+    @property
+    def columns(self):
+        return list(self._sorted)
+
+    def _bounds(self, column, low, high):
+        values = self._sorted[column]
+        start = np.searchsorted(values, low, side="left")
+        # An inverted range (low > high) is empty rather than negative.
+        return start, max(start, np.searchsorted(values, high, side="right"))
+
+    def count(self, column, low, high):
+        """Number of rows with low <= column <= high."""
+        start, stop = self._bounds(column, low, high)
+        return int(stop - start)
+
+    def between(self, column, low, high, descending=True):
+        """Row positions with low <= column <= high, sorted by the column."""
+        start, stop = self._bounds(column, low, high)
+        positions = self._positions[column][start:stop]
+        return positions[::-1] if descending else positions
+
+    def lowest(self, column, n):
+        """Row positions of the `n` smallest values, smallest first."""
+        return self._positions[column][:n]
+
+    def highest(self, column, n):
+        """Row positions of the `n` largest values, largest first."""
+        positions = self._positions[column]
+        return positions[::-1][:n]
+
+    def screen(self, ranges):
+        """Row positions, in frame order, that satisfy every {column: (low, high)} condition.
+
+        The most selective condition comes from the index; the others are checked only on
+        its matches.
+        """
+        if not ranges:
+            return np.arange(self._length)
+        column = min(ranges, key=lambda name: self.count(name, *ranges[name]))
+        positions = np.sort(self.between(column, *ranges[column], descending=False))
+        for other, (low, high) in ranges.items():
+            if other != column:
+                values = self._values[other][positions]
+                positions = positions[(values >= low) & (values <= high)]
+        return positions
@@ -0,0 +1,210 @@
+"""Append-only archive of every published snapshot, for history and trend queries.
+
+One directory per UTC day under ARCHIVE_DIR:
+
+    day=2024-05-01/part-1714564800000.parquet   one refresh, written by append_snapshot
+    day=2024-05-01/hour-13.parquet              the parts of a closed hour, merged
+    day=2024-05-01/day.parquet                  a closed day, merged
+    day=2024-05-01/day-1h.parquet               an old day, one snapshot per hour kept
+
+Merged files are sorted by symbol, so Parquet row-group statistics act as the symbol
+index: a history query only decodes the row groups that hold that symbol. maintain()
+merges closed hours and days, downsamples days older than RAW_DAYS and deletes days
+older than RETENTION_DAYS, which keeps disk use bounded.
+"""
+import os
+import re
+import shutil
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import atomic_file
+import indicator_cache
+
+# Configuration
+ARCHIVE_DIR = os.environ.get("CRYPTO_ARCHIVE_DIR", os.path.join(indicator_cache.CACHE_DIR, "archive"))
+RAW_DAYS = 7
+RETENTION_DAYS = 90
+DOWNSAMPLE_SECONDS = 60 * 60
+ROW_GROUP_SIZE = 16384
+COMPRESSION = "zstd"
+SNAPSHOT_COLUMN = "snapshot_at"
+
+DAY_DIR = re.compile(r"^day=(\d{4}-\d{2}-\d{2})$")
+PART_FILE = re.compile(r"^part-(\d+)\.parquet$")
+SYMBOL_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+def _day_dir(root, day):
+    return os.path.join(root, f"day={day.isoformat()}")
+
+def _data_files(directory):
+    try:
+        return sorted(name for name in os.listdir(directory) if name.endswith(".parquet") and not name.startswith("."))
+    except FileNotFoundError:
+        return []
+
+def _write_atomic(table, path):
+    with atomic_file.replacing(path) as tmp_path:
+        pq.write_table(table, tmp_path, compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+
+def _normalize(table):
+    # Every file stores Symbol the same way so tables from different days concatenate.
+    index = table.schema.get_field_index("Symbol")
+    symbols = table.column(index)
+    if pa.types.is_dictionary(symbols.type):
+        symbols = symbols.cast(pa.string())
+    return table.set_column(index, pa.field("Symbol", SYMBOL_TYPE), pc.dictionary_encode(symbols).cast(SYMBOL_TYPE))
+
+def append_snapshot(df, root=ARCHIVE_DIR):
+    """Archive one published snapshot; returns the path of the new part file."""
+    created_at = df.attrs.get("created_at")
+    created_at = datetime.fromisoformat(created_at) if created_at else datetime.now(timezone.utc)
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    table = table.append_column(
+        pa.field(SNAPSHOT_COLUMN, pa.timestamp("ms", tz="UTC")),
+        pa.array([created_at] * len(df), type=pa.timestamp("ms", tz="UTC"))
+    )
+    path = os.path.join(_day_dir(root, created_at.date()), f"part-{int(created_at.timestamp() * 1000)}.parquet")
+    _write_atomic(_normalize(table), path)
+    return path
+
+def _merge(paths):
+    table = pa.concat_tables([_normalize(pq.read_table(path)) for path in paths], promote_options="default")
+    # Sorting by symbol is what makes row-group statistics usable as a symbol index.
+    keys = pa.table({"symbol": table.column("Symbol").cast(pa.string()), "time": table.column(SNAPSHOT_COLUMN)})
+    order = pc.sort_indices(keys, [("symbol", "ascending"), ("time", "ascending")])
+    return table.take(order)
+
+def _downsample(table, seconds=DOWNSAMPLE_SECONDS):
+    # Keep the last snapshot of every bucket so each kept point is still a real snapshot.
+    times = table.column(SNAPSHOT_COLUMN).cast(pa.int64()).to_numpy()
+    frame = pd.DataFrame({"time": times, "bucket": times // (seconds * 1000)})
+    keep = frame.groupby("bucket")["time"].transform("max").to_numpy() == times
+    return table.filter(pa.array(keep))
+
+def _replace(directory, names, target, downsample=False):
+    paths = [os.path.join(directory, name) for name in names]
+    table = _merge(paths)
+    if downsample:
+        table = _downsample(table)
+    _write_atomic(table, os.path.join(directory, target))
+    for path in paths:
+        if os.path.basename(path) != target:
+            os.unlink(path)
+
+def maintain(root=ARCHIVE_DIR, now=None):
+    """Merge closed hours and days, downsample old days and drop expired ones."""
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    try:
+        entries = os.listdir(root)
+    except FileNotFoundError:
+        return
+
+    for entry in entries:
+        match = DAY_DIR.match(entry)
+        if not match:
+            continue
+        day = date.fromisoformat(match.group(1))
+        directory = os.path.join(root, entry)
+        age = (today - day).days
+        if age > RETENTION_DAYS:
+            shutil.rmtree(directory, ignore_errors=True)
+            continue
+
+        names = _data_files(directory)
+        if age > 0:
+            target = "day-1h.parquet" if age > RAW_DAYS else "day.parquet"
+            if names and names != [target]:
+                _replace(directory, names, target, downsample=target == "day-1h.parquet")
+            continue
+
+        hours = {}
+        for name in names:
+            part = PART_FILE.match(name)
+            if part:
+                hour = datetime.fromtimestamp(int(part.group(1)) / 1000, timezone.utc).hour
+                if hour < now.hour:
+                    hours.setdefault(hour, []).append(name)
+        for hour, parts in hours.items():
+            target = f"hour-{hour:02d}.parquet"
+            _replace(directory, parts + ([target] if target in names else []), target)
+
+def _read(path, columns, symbol=None):
+    try:
+        parquet = pq.ParquetFile(path)
+    except FileNotFoundError:
+        # Merged away by maintain() between listing and reading; its rows are in the merged file.
+        return None
+    names = parquet.schema_arrow.names
+    columns = names if columns is None else [column for column in columns if column in names]
+    if symbol is None:
+        return parquet.read(columns=columns)
+
+    # Files are sorted by symbol, so min/max statistics pick the row groups that hold it.
+    index = names.index("Symbol")
+    groups = []
+    for group in range(parquet.metadata.num_row_groups):
+        statistics = parquet.metadata.row_group(group).column(index).statistics
+        if statistics is None or not statistics.has_min_max or statistics.min <= symbol <= statistics.max:
+            groups.append(group)
+    table = parquet.read_row_groups(groups, columns=columns)
+    return table.filter(pc.equal(table.column("Symbol").cast(pa.string()), symbol))
+
+def _to_frame(tables):
+    tables = [table for table in tables if table is not None and table.num_rows]
+    if not tables:
+        return pd.DataFrame()
+    df = pa.concat_tables([_normalize(table) for table in tables], promote_options="default").to_pandas()
+    # A reader racing maintain() can see a part and the file it was merged into.
+    return df.drop_duplicates(["Symbol", SNAPSHOT_COLUMN]).sort_values(SNAPSHOT_COLUMN, kind="stable").reset_index(drop=True)
+
+def symbol_history(symbol, columns=("4h RSI",), days=30, now=None, root=ARCHIVE_DIR):
+    """Every archived value of `columns` for `symbol` over the last `days` days, oldest first."""
+    now = now or datetime.now(timezone.utc)
+    start = now - timedelta(days=days)
+    tables = []
+    for offset in range(days + 1):
+        directory = _day_dir(root, start.date() + timedelta(days=offset))
+        for name in _data_files(directory):
+            tables.append(_read(os.path.join(directory, name), ["Symbol", SNAPSHOT_COLUMN, *columns], symbol))
+    df = _to_frame(tables)
+    if not len(df):
+        return df
+    df = df[df[SNAPSHOT_COLUMN] >= pd.Timestamp(start)].reset_index(drop=True)
+    return df[[SNAPSHOT_COLUMN, *[column for column in columns if column in df.columns]]]
+
+def _snapshot_times(path):
+    part = PART_FILE.match(os.path.basename(path))
+    if part:
+        return [int(part.group(1))]
+    table = _read(path, [SNAPSHOT_COLUMN])
+    return [] if table is None else pc.unique(table.column(SNAPSHOT_COLUMN).cast(pa.int64())).to_pylist()
+
+def distribution_at(when, columns=None, root=ARCHIVE_DIR):
+    """The universe as of the last archived snapshot at or before `when`, or an empty frame."""
+    when_ms = int(when.timestamp() * 1000)
+    best = None
+    for day in (when.date(), when.date() - timedelta(days=1)):
+        directory = _day_dir(root, day)
+        for name in _data_files(directory):
+            path = os.path.join(directory, name)
+            earlier = [t for t in _snapshot_times(path) if t <= when_ms]
+            if earlier and (best is None or max(earlier) > best[0]):
+                best = (max(earlier), path)
+        if best is not None:
+            break
+    if best is None:
+        return pd.DataFrame()
+
+    snapshot_at = pd.Timestamp(best[0], unit="ms", tz="UTC")
+    table = _read(best[1], None if columns is None else ["Symbol", SNAPSHOT_COLUMN, *columns])
+    if table is not None:
+        table = table.filter(pc.equal(table.column(SNAPSHOT_COLUMN).cast(pa.int64()), best[0]))
+    df = _to_frame([table])
+    df.attrs["snapshot_at"] = snapshot_at.isoformat()
+    return df
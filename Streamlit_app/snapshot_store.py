@@ -0,0 +1,55 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import atomic_file
+import indicator_cache
+
+# Configuration
+SNAPSHOT_PATH = os.environ.get("CRYPTO_SNAPSHOT_PATH", os.path.join(indicator_cache.CACHE_DIR, "snapshot.parquet"))
+METADATA_KEY = b"snapshot"
+
+def publish_snapshot(df, path=SNAPSHOT_PATH):
+    """Write `df` and its attrs to `path` atomically.
+
+    The table is written to a temporary file in the same directory and renamed over the
+    previous snapshot, so readers only ever see a complete file.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(df.attrs, default=str).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    with atomic_file.replacing(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+def snapshot_mtime(path=SNAPSHOT_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    try:
+        table = pq.read_table(path)
+    except FileNotFoundError:
+        return None
+    df = table.to_pandas()
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    if raw:
+        df.attrs.update(json.loads(raw))
+    return df
+
+def snapshot_age(df, now=None):
+    created_at = df.attrs.get("created_at")
+    if created_at is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    return (now - datetime.fromisoformat(created_at)).total_seconds()
+
+def snapshot_id(df):
+    """A key that changes with every published snapshot, for caching anything derived from it."""
+    return f"{df.attrs.get('created_at')}|{len(df)}"
@@ -0,0 +1,248 @@
+"""Batch strategy cards for the universe, computed from the local candle store.
+
+Symbols are screened CHUNK_SIZE at a time with grid_engine.screen_store (the vectorized
+calculate_pivot_points / get_recommendation / optimize_grid_settings), and each chunk is
+written out before the next one is loaded, so memory stays flat however many symbols
+are exported. Nothing is fetched: run `python candle_store.py` first to bring candles up
+to date.
+
+    python strategy_cards.py --output cards.csv
+    python strategy_cards.py --output cards.parquet --recommendation LONG SHORT
+    python strategy_cards.py --output cards.jsonl --cards-dir cards/ --backtest
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import atomic_file
+import candle_store
+import grid_engine
+import indicator_cache
+import metrics
+import optimizer
+
+# Configuration
+CHUNK_SIZE = 100
+MAX_WORKERS = 8
+BACKTEST_INTERVAL = "4h"
+BACKTEST_BARS = optimizer.BACKTEST_BARS
+CARDS_DIR = os.path.join(indicator_cache.CACHE_DIR, "strategy_cards")
+FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".parquet": "parquet"}
+PRICE_COLUMNS = ["Price", "ATR", "pivot", "s1", "r1", "s2", "r2", "s3", "r3",
+                 "entry_point", "exit_point", "stop_loss", "take_profit", "grid_size"]
+COLUMNS = ["Symbol", "Recommendation", "Distance to R1 (%)", "Distance to S1 (%)", "GRID Profit (%)",
+           *PRICE_COLUMNS, "num_grids", "backtest_return_pct", "backtest_max_drawdown_pct"]
+
+logger = logging.getLogger(__name__)
+
+def _backtest(candles, price, atr, recommendation, s1, r1):
+    return optimizer.best_settings(candles, price, atr, recommendation, s1, r1)
+
+def apply_backtest(store, cards, executor, interval=BACKTEST_INTERVAL, bars=BACKTEST_BARS):
+    """Replace the heuristic grid settings with the best backtested ones, as
+    optimize_grid_settings does when it is given candles. NEUTRAL symbols and symbols
+    with too little history keep the heuristic settings."""
+    matrix = store.load_matrix(list(cards["Symbol"]), interval, bars, optimizer.OHLC)
+    futures = {}
+    for row, card in enumerate(cards.itertuples(index=False)):
+        if card.Recommendation == "NEUTRAL":
+            continue
+        history = {column: matrix[column][row] for column in optimizer.OHLC}
+        available = ~np.isnan(history["close"])
+        history = {column: values[available] for column, values in history.items()}
+        futures[row] = executor.submit(_backtest, history, card.Price, card.ATR, card.Recommendation, card.s1, card.r1)
+    for row, future in futures.items():
+        best = future.result()
+        if best is None:
+            continue
+        for column in ("grid_size", "num_grids", "entry_point", "exit_point", "stop_loss", "take_profit"):
+            cards.at[row, column] = best[column]
+        cards.at[row, "backtest_return_pct"] = best["return_pct"]
+        cards.at[row, "backtest_max_drawdown_pct"] = best["max_drawdown_pct"]
+    return cards
+
+def card_frame(screened):
+    """screen_store output as COLUMNS, with the backtest columns empty."""
+    return screened.assign(backtest_return_pct=np.nan, backtest_max_drawdown_pct=np.nan)[COLUMNS]
+
+def iter_cards(store, symbols, recommendations=None, chunk_size=CHUNK_SIZE, executor=None):
+    """Yield one DataFrame of COLUMNS per chunk of `symbols` that has candles.
+
+    `recommendations` keeps only those labels; an `executor` backtests the grid settings.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    for start in range(0, len(symbols), chunk_size):
+        cards = grid_engine.screen_store(store, symbols[start:start + chunk_size])
+        if recommendations:
+            cards = cards[cards["Recommendation"].isin(recommendations)].reset_index(drop=True)
+        if cards.empty:
+            continue
+        cards = card_frame(cards)
+        if executor is not None:
+            cards = apply_backtest(store, cards, executor)
+        yield cards
+
+def format_prices(cards):
+    """Copy of `cards` with the price columns as 8-place decimal strings, for text formats."""
+    cards = cards.copy()
+    for column in PRICE_COLUMNS:
+        cards[column] = [str(grid_engine.as_decimal(value)) for value in cards[column]]
+    return cards
+
+class CardWriter:
+    """Streams card chunks to one CSV, JSON, JSON-lines or Parquet file.
+
+    Used as a context manager: rows go to a temporary file next to `path`, which replaces
+    `path` only when the block exits cleanly, so readers never see a half-written export.
+    """
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.format = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+        if self.format not in FORMATS.values():
+            raise ValueError(f"Unknown export format for {path}; use one of {', '.join(FORMATS)}")
+        self._file = None
+        self._parquet = None
+        self.rows = 0
+
+    def __enter__(self):
+        with ExitStack() as stack:
+            self._tmp_path = stack.enter_context(atomic_file.replacing(self.path))
+            if self.format != "parquet":
+                self._file = stack.enter_context(open(self._tmp_path, "w", newline=""))
+            stack.callback(self._close_parquet)
+            self._stack = stack.pop_all()
+        return self
+
+    def write(self, cards):
+        if self.format == "parquet":
+            table = pa.Table.from_pandas(cards, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._tmp_path, table.schema)
+            self._parquet.write_table(table)
+        elif self.format == "csv":
+            format_prices(cards).to_csv(self._file, index=False, header=self.rows == 0)
+        else:
+            records = format_prices(cards).to_json(orient="records", lines=True).splitlines()
+            if self.format == "json":
+                # One JSON array, opened on the first chunk and closed in _finish().
+                self._file.write(("[\n" if self.rows == 0 else ",\n") + ",\n".join(records))
+            else:
+                self._file.write("\n".join(records) + "\n")
+        self.rows += len(cards)
+
+    def _finish(self):
+        if self.format == "parquet" and self._parquet is None:
+            pq.write_table(pa.Table.from_pandas(pd.DataFrame(columns=COLUMNS), preserve_index=False), self._tmp_path)
+        elif self.format == "json":
+            self._file.write("\n]\n" if self.rows else "[]\n")
+
+    def _close_parquet(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            return self._stack.__exit__(exc_type, exc, tb)
+        with self._stack:
+            self._finish()
+
+def render_card(card):
+    """Markdown strategy card for one row of iter_cards output."""
+    price = grid_engine.as_decimal(card["Price"])
+    lines = [
+        f"# {card['Symbol']} Strategy Card",
+        "",
+        f"**Recommendation: {card['Recommendation']}** at {price}",
+        "",
+        "| Level | Value |",
+        "| --- | --- |",
+    ]
+    for label, column in (("Pivot", "pivot"), ("Resistance 1 (R1)", "r1"), ("Support 1 (S1)", "s1"),
+                          ("Resistance 2 (R2)", "r2"), ("Support 2 (S2)", "s2"),
+                          ("Resistance 3 (R3)", "r3"), ("Support 3 (S3)", "s3"), ("ATR", "ATR")):
+        lines.append(f"| {label} | {grid_engine.as_decimal(card[column])} |")
+    lines += [
+        "",
+        "## Grid Settings",
+        "",
+        "| Setting | Value |",
+        "| --- | --- |",
+        f"| Entry Point | {grid_engine.as_decimal(card['entry_point'])} |",
+        f"| Exit Point | {grid_engine.as_decimal(card['exit_point'])} |",
+        f"| Stop Loss | {grid_engine.as_decimal(card['stop_loss'])} |",
+        f"| Take Profit | {grid_engine.as_decimal(card['take_profit'])} |",
+        f"| Grid Size | {grid_engine.as_decimal(card['grid_size'])} |",
+        f"| Number of Grids | {int(card['num_grids'])} |",
+        f"| GRID Profit | {card['GRID Profit (%)']:.2f}% |",
+        "",
+        f"Distance to R1: {card['Distance to R1 (%)']:.2f}%. Distance to S1: {card['Distance to S1 (%)']:.2f}%.",
+    ]
+    if not pd.isna(card["backtest_return_pct"]):
+        lines.append(f"Backtested over stored {BACKTEST_INTERVAL} candles: {card['backtest_return_pct']:.2f}% return, "
+                     f"{card['backtest_max_drawdown_pct']:.2f}% max drawdown.")
+    return "\n".join(lines) + "\n"
+
+def _write_cards(cards, directory):
+    for card in cards.to_dict("records"):
+        with open(os.path.join(directory, f"{card['Symbol']}.md"), "w") as f:
+            f.write(render_card(card))
+    return len(cards)
+
+def export(store, symbols, output=None, cards_dir=None, recommendations=None, chunk_size=CHUNK_SIZE,
+           backtest=False, workers=MAX_WORKERS):
+    """Stream cards for `symbols` to `output` and/or one Markdown file per symbol in
+    `cards_dir`. Returns the number of symbols exported."""
+    if cards_dir:
+        os.makedirs(cards_dir, exist_ok=True)
+    rows = 0
+    with ExitStack() as stack:
+        writer = stack.enter_context(CardWriter(output)) if output else None
+        backtest_pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if backtest else None
+        # Cards of one chunk are written while the next chunk is screened.
+        card_pool = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+        pending = []
+        for cards in iter_cards(store, symbols, recommendations, chunk_size, backtest_pool):
+            with metrics.timer("export_seconds", stage="write"):
+                if writer:
+                    writer.write(cards)
+                if cards_dir:
+                    step = -(-len(cards) // workers)
+                    pending += [card_pool.submit(_write_cards, cards.iloc[i:i + step], cards_dir)
+                                for i in range(0, len(cards), step)]
+            rows += len(cards)
+        for future in pending:
+            future.result()
+    metrics.inc("exported_cards_total", rows)
+    return rows
+
+def main():
+    from universe import symbols
+
+    parser = argparse.ArgumentParser(description="Export strategy cards for the universe from the local candle store")
+    parser.add_argument("--output", help="CSV, JSON, JSON-lines or Parquet file, chosen by extension")
+    parser.add_argument("--cards-dir", nargs="?", const=CARDS_DIR, help=f"Also write one Markdown card per symbol (default {CARDS_DIR})")
+    parser.add_argument("--symbols", nargs="*", help="Defaults to the whole universe")
+    parser.add_argument("--recommendation", nargs="+", choices=["LONG", "SHORT", "NEUTRAL"], help="Only export these recommendations")
+    parser.add_argument("--backtest", action="store_true", help=f"Pick grid settings by backtesting stored {BACKTEST_INTERVAL} candles")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    if not args.output and not args.cards_dir:
+        parser.error("nothing to do: give --output and/or --cards-dir")
+
+    metrics.configure_logging()
+    started = time.monotonic()
+    rows = export(candle_store.CandleStore(), args.symbols or symbols, args.output, args.cards_dir,
+                  args.recommendation, args.chunk_size, args.backtest, args.workers)
+    logger.info("Exported %d strategy cards in %.1fs", rows, time.monotonic() - started)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""Incremental indicators updated one candle or tick at a time.
+
+Each calculator keeps a few arrays with one slot per symbol, so a new candle for the whole
+universe costs a handful of NumPy operations and nothing is recomputed from history. Once
+`period` candles have been seen the values match the batch kernels in indicators.py.
+`peek` evaluates the candle that is still forming at a given price without changing state.
+
+State round-trips through state_dict/load_state, and StreamingIndicators.save/load keep it
+on disk so a restart carries on without a warm-up backfill. open_indicators restores that
+state, catches up on candles stored while the process was down, and `listen` then feeds
+every closed candle from the Bybit stream.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+
+import atomic_file
+import candle_store
+import grid_engine
+import indicator_cache
+
+# Configuration
+STATE_PATH = os.path.join(indicator_cache.CACHE_DIR, "streaming_state.npz")
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+WEIGHTED_ATR_WINDOW = 14
+SEED_BARS = 200
+# Closed candles for the whole universe arrive together; they are saved once, this many seconds after the first.
+SAVE_DELAY = 5.0
+
+logger = logging.getLogger(__name__)
+
+def _wilder(count, total, average, value, period):
+    # One Wilder step; `count` already includes `value`. The average is seeded with the
+    # simple mean of the first `period` values, as in indicators.rma.
+    valid = ~np.isnan(value)
+    total = np.where(valid & (count <= period), total + value, total)
+    average = np.where(valid & (count == period), total / period, average)
+    average = np.where(valid & (count > period), average + (value - average) / period, average)
+    return total, average
+
+def _wilder_one(count, total, average, value, period):
+    # Scalar _wilder for the single-symbol tick path, where NumPy call overhead dominates.
+    if count <= period:
+        total += value
+    if count == period:
+        average = total / period
+    elif count > period:
+        average += (value - average) / period
+    return total, average
+
+def _true_range(high, low, previous_close):
+    return np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+def _rsi(average_gain, average_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    result = np.where(average_loss == 0, np.where(average_gain == 0, 50.0, 100.0), result)
+    return np.where(np.isnan(average_gain), np.nan, result)
+
+def _rsi_one(average_gain, average_loss):
+    if average_gain != average_gain:
+        return np.nan
+    if average_loss == 0:
+        return 50.0 if average_gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+
+class _Calculator:
+    # (name, dtype, fill) for every per-symbol state array; shapes are (size,) + extra.
+    fields = ()
+
+    def __init__(self, size):
+        self.size = size
+        for name, dtype, fill in self.fields:
+            setattr(self, name, np.full((size,) + self._extra_shape(name), fill, dtype=dtype))
+        self._all = np.arange(size)
+
+    def _extra_shape(self, name):
+        return ()
+
+    def _rows(self, rows):
+        return self._all if rows is None else np.atleast_1d(np.asarray(rows, dtype=np.int64))
+
+    def state_dict(self):
+        return {name: getattr(self, name).copy() for name, _, _ in self.fields}
+
+    def load_state(self, state):
+        for name, _, _ in self.fields:
+            getattr(self, name)[...] = state[name]
+
+class StreamingRSI(_Calculator):
+    fields = (
+        ("previous_close", np.float64, np.nan),
+        ("count", np.int64, 0),
+        ("gain_total", np.float64, 0.0),
+        ("loss_total", np.float64, 0.0),
+        ("average_gain", np.float64, np.nan),
+        ("average_loss", np.float64, np.nan),
+    )
+
+    def __init__(self, size, period=RSI_PERIOD):
+        super().__init__(size)
+        self.period = period
+
+    def _step(self, rows, close):
+        change = close - self.previous_close[rows]
+        count = self.count[rows] + ~np.isnan(change)
+        gain_total, average_gain = _wilder(count, self.gain_total[rows], self.average_gain[rows], np.clip(change, 0, None), self.period)
+        loss_total, average_loss = _wilder(count, self.loss_total[rows], self.average_loss[rows], np.clip(-change, 0, None), self.period)
+        return count, gain_total, loss_total, average_gain, average_loss
+
+    def update(self, close, rows=None):
+        """Add one closed candle per row and return the new RSI for those rows."""
+        rows = self._rows(rows)
+        close = np.broadcast_to(np.asarray(close, dtype=np.float64), rows.shape)
+        count, self.gain_total[rows], self.loss_total[rows], average_gain, average_loss = self._step(rows, close)
+        self.count[rows] = count
+        self.average_gain[rows] = average_gain
+        self.average_loss[rows] = average_loss
+        self.previous_close[rows] = np.where(np.isnan(close), self.previous_close[rows], close)
+        return _rsi(average_gain, average_loss)
+
+    def peek(self, price, rows=None):
+        """RSI if the forming candle closed at `price`, leaving the state untouched."""
+        rows = self._rows(rows)
+        price = np.broadcast_to(np.asarray(price, dtype=np.float64), rows.shape)
+        _, _, _, average_gain, average_loss = self._step(rows, price)
+        return _rsi(average_gain, average_loss)
+
+    def peek_one(self, price, row):
+        """Scalar `peek` for a single row."""
+        change = price - float(self.previous_close[row])
+        if change != change:
+            return _rsi_one(float(self.average_gain[row]), float(self.average_loss[row]))
+        count = int(self.count[row]) + 1
+        _, average_gain = _wilder_one(count, float(self.gain_total[row]), float(self.average_gain[row]), max(change, 0.0), self.period)
+        _, average_loss = _wilder_one(count, float(self.loss_total[row]), float(self.average_loss[row]), max(-change, 0.0), self.period)
+        return _rsi_one(average_gain, average_loss)
+
+    def value(self, rows=None):
+        rows = self._rows(rows)
+        return _rsi(self.average_gain[rows], self.average_loss[rows])
+
+class StreamingATR(_Calculator):
+    fields = (
+        ("previous_close", np.float64, np.nan),
+        ("count", np.int64, 0),
+        ("total", np.float64, 0.0),
+        ("average", np.float64, np.nan),
+    )
+
+    def __init__(self, size, period=ATR_PERIOD):
+        super().__init__(size)
+        self.period = period
+
+    def _step(self, rows, high, low, close):
+        tr = np.where(np.isnan(close), np.nan, _true_range(high, low, self.previous_close[rows]))
+        count = self.count[rows] + ~np.isnan(tr)
+        total, average = _wilder(count, self.total[rows], self.average[rows], tr, self.period)
+        return count, total, average
+
+    def update(self, high, low, close, rows=None):
+        rows = self._rows(rows)
+        high, low, close = (np.broadcast_to(np.asarray(values, dtype=np.float64), rows.shape) for values in (high, low, close))
+        self.count[rows], self.total[rows], average = self._step(rows, high, low, close)
+        self.average[rows] = average
+        self.previous_close[rows] = np.where(np.isnan(close), self.previous_close[rows], close)
+        return average
+
+    def peek(self, high, low, close, rows=None):
+        rows = self._rows(rows)
+        high, low, close = (np.broadcast_to(np.asarray(values, dtype=np.float64), rows.shape) for values in (high, low, close))
+        return self._step(rows, high, low, close)[2]
+
+    def value(self, rows=None):
+        return self.average[self._rows(rows)]
+
+class StreamingWeightedATR(_Calculator):
+    """Volume-weighted true range over the last `window` candles, as in calculate_weighted_atr."""
+
+    fields = (
+        ("previous_close", np.float64, np.nan),
+        ("position", np.int64, 0),
+        ("weighted", np.float64, 0.0),
+        ("volume", np.float64, 0.0),
+        ("weighted_sum", np.float64, 0.0),
+        ("volume_sum", np.float64, 0.0),
+    )
+
+    def __init__(self, size, window=WEIGHTED_ATR_WINDOW):
+        self.window = window
+        super().__init__(size)
+
+    def _extra_shape(self, name):
+        # Ring buffers holding the last `window` contributions per symbol.
+        return (self.window,) if name in ("weighted", "volume") else ()
+
+    def update(self, high, low, close, volume, rows=None):
+        rows = self._rows(rows)
+        high, low, close, volume = (np.broadcast_to(np.asarray(values, dtype=np.float64), rows.shape) for values in (high, low, close, volume))
+        tr = _true_range(high, low, self.previous_close[rows])
+        self.previous_close[rows] = np.where(np.isnan(close), self.previous_close[rows], close)
+
+        valid = ~np.isnan(tr) & ~np.isnan(volume) & ~np.isnan(close)
+        rows, tr, volume = rows[valid], tr[valid], volume[valid]
+        slot = self.position[rows] % self.window
+        self.weighted_sum[rows] += tr * volume - self.weighted[rows, slot]
+        self.volume_sum[rows] += volume - self.volume[rows, slot]
+        self.weighted[rows, slot] = tr * volume
+        self.volume[rows, slot] = volume
+        self.position[rows] += 1
+
+        # Re-add the buffer once per wrap so running-sum rounding never accumulates.
+        wrapped = rows[slot == self.window - 1]
+        if len(wrapped):
+            self.weighted_sum[wrapped] = self.weighted[wrapped].sum(axis=1)
+            self.volume_sum[wrapped] = self.volume[wrapped].sum(axis=1)
+
+    def sums(self, rows=None):
+        """Return (sum of TR * volume, sum of volume), for combining several intervals."""
+        rows = self._rows(rows)
+        return self.weighted_sum[rows], self.volume_sum[rows]
+
+    def value(self, rows=None):
+        weighted, volume = self.sums(rows)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(volume > 0, weighted / volume, np.nan)
+
+class StreamingPivots(_Calculator):
+    """Pivot levels from the last completed `interval` session.
+
+    Sessions are either fed as closed candles through `update`, or built from ticks: `tick`
+    tracks the forming session's high, low and last price and promotes it to the pivot
+    basis when a tick from the next session arrives.
+    """
+
+    fields = (
+        ("high", np.float64, np.nan),
+        ("low", np.float64, np.nan),
+        ("close", np.float64, np.nan),
+        ("session", np.int64, -1),
+        ("session_high", np.float64, np.nan),
+        ("session_low", np.float64, np.nan),
+        ("session_close", np.float64, np.nan),
+    )
+
+    def __init__(self, size, interval="1d"):
+        super().__init__(size)
+        self.interval = interval
+
+    def update(self, high, low, close, rows=None):
+        rows = self._rows(rows)
+        self.high[rows], self.low[rows], self.close[rows] = high, low, close
+
+    def _session(self, timestamp_ms):
+        seconds = indicator_cache.INTERVAL_SECONDS[self.interval]
+        offset = indicator_cache.WEEK_OFFSET if self.interval == "1W" else 0
+        return (timestamp_ms // 1000 - offset) // seconds
+
+    def tick(self, price, timestamp_ms, rows=None):
+        rows = self._rows(rows)
+        price = np.broadcast_to(np.asarray(price, dtype=np.float64), rows.shape)
+        session = self._session(np.asarray(timestamp_ms, dtype=np.int64))
+        session = np.broadcast_to(session, rows.shape)
+
+        rolled = rows[(session > self.session[rows]) & (self.session[rows] >= 0)]
+        self.high[rolled] = self.session_high[rolled]
+        self.low[rolled] = self.session_low[rolled]
+        self.close[rolled] = self.session_close[rolled]
+
+        new = session > self.session[rows]
+        current = session == self.session[rows]
+        self.session_high[rows] = np.where(new, price, np.where(current, np.fmax(self.session_high[rows], price), self.session_high[rows]))
+        self.session_low[rows] = np.where(new, price, np.where(current, np.fmin(self.session_low[rows], price), self.session_low[rows]))
+        self.session_close[rows] = np.where(new | current, price, self.session_close[rows])
+        self.session[rows] = np.maximum(self.session[rows], session)
+
+    def tick_one(self, price, timestamp_ms, row):
+        """Scalar `tick` for a single row."""
+        if price != price:
+            return
+        session = self._session(int(timestamp_ms))
+        current = int(self.session[row])
+        if session > current:
+            if current >= 0:
+                self.high[row], self.low[row], self.close[row] = self.session_high[row], self.session_low[row], self.session_close[row]
+            self.session[row] = session
+            self.session_high[row] = self.session_low[row] = self.session_close[row] = price
+        elif session == current:
+            if price > self.session_high[row]:
+                self.session_high[row] = price
+            if price < self.session_low[row]:
+                self.session_low[row] = price
+            self.session_close[row] = price
+
+    def levels(self, rows=None):
+        rows = self._rows(rows)
+        return grid_engine.pivot_points(self.high[rows], self.low[rows], self.close[rows])
+
+class StreamingIndicators:
+    """RSI, ATR, volume-weighted ATR and pivots for a fixed list of symbols on one interval."""
+
+    def __init__(self, symbols, interval="4h", pivot_interval="1d", rsi_period=RSI_PERIOD, atr_period=ATR_PERIOD,
+                 weighted_window=WEIGHTED_ATR_WINDOW):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.stream_index = {candle_store.to_bybit_symbol(symbol): row for row, symbol in enumerate(self.symbols)}
+        self.interval = interval
+        # Open time (ms) of the last candle applied per row, so no candle is counted twice.
+        self.last_start = np.full(len(self.symbols), -1, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self.rsi = StreamingRSI(len(self.symbols), rsi_period)
+        self.atr = StreamingATR(len(self.symbols), atr_period)
+        self.weighted_atr = StreamingWeightedATR(len(self.symbols), weighted_window)
+        self.pivots = StreamingPivots(len(self.symbols), pivot_interval)
+
+    def rows(self, symbols):
+        return np.array([self.index[symbol] for symbol in symbols], dtype=np.int64)
+
+    def row(self, symbol):
+        """Row of `symbol` in TradingView or Bybit form, or None when it is not tracked."""
+        row = self.index.get(symbol)
+        return self.stream_index.get(candle_store.to_bybit_symbol(symbol)) if row is None else row
+
+    def on_candle(self, high, low, close, volume, rows=None):
+        """Feed one closed `interval` candle per row (all symbols when `rows` is None)."""
+        self.rsi.update(close, rows)
+        self.atr.update(high, low, close, rows)
+        self.weighted_atr.update(high, low, close, volume, rows)
+
+    def on_tick(self, price, timestamp_ms, rows=None):
+        """Track pivot sessions and return the RSI of the forming candle at `price`."""
+        if isinstance(rows, (int, np.integer)):
+            self.pivots.tick_one(price, timestamp_ms, rows)
+            return self.rsi.peek_one(price, rows)
+        self.pivots.tick(price, timestamp_ms, rows)
+        return self.rsi.peek(price, rows)
+
+    def on_stream_candle(self, symbol, candle):
+        """MarketState listener for closed `interval` candles; returns whether it was applied."""
+        row = self.stream_index.get(symbol)
+        if row is None:
+            return False
+        with self._lock:
+            if candle["start"] <= self.last_start[row]:
+                return False
+            self.on_candle(candle["high"], candle["low"], candle["close"], candle["volume"], row)
+            self.last_start[row] = candle["start"]
+        return True
+
+    def listen(self, state, path=STATE_PATH, save_delay=SAVE_DELAY):
+        """Feed closed candles from a bybit_stream.MarketState and save the state after them.
+
+        The stream must include candle_store.BYBIT_INTERVALS[interval] in its kline intervals.
+        """
+        def on_candle(symbol, candle):
+            if self.on_stream_candle(symbol, candle):
+                self._schedule_save(path, save_delay)
+
+        state.add_listener(on_candle, candle_store.BYBIT_INTERVALS[self.interval])
+        return self
+
+    def _schedule_save(self, path, delay):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(delay, self._save_scheduled, args=(path,))
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_scheduled(self, path):
+        with self._lock:
+            self._save_timer = None
+        try:
+            self.save(path)
+        except OSError as e:
+            logger.warning("Could not save streaming indicator state to %s: %s", path, e)
+
+    def values(self, rows=None):
+        values = {
+            "RSI": self.rsi.value(rows),
+            "ATR": self.atr.value(rows),
+            "Weighted ATR": self.weighted_atr.value(rows),
+        }
+        values.update(self.pivots.levels(rows))
+        return values
+
+    def seed(self, store, bars=SEED_BARS, symbols=None):
+        """Replay stored candles newer than each row's last applied one, at most the last
+        `bars`, one vectorized step per bar. On fresh calculators this is the warm-up;
+        after load() it only catches up on candles closed since the state was saved.
+        `symbols` limits the replay to those tracked symbols."""
+        symbols = self.symbols if symbols is None else list(symbols)
+        selected = self.rows(symbols)
+        matrix = store.load_matrix(symbols, self.interval, bars, ("timestamp", "high", "low", "close", "volume"))
+        with self._lock:
+            for t in range(bars):
+                # NaN padding compares False, so rows without this bar are skipped.
+                new = np.flatnonzero(matrix["timestamp"][:, t] > self.last_start[selected])
+                if len(new):
+                    rows = selected[new]
+                    self.on_candle(matrix["high"][new, t], matrix["low"][new, t], matrix["close"][new, t], matrix["volume"][new, t], rows)
+                    self.last_start[rows] = matrix["timestamp"][new, t].astype(np.int64)
+            pivot_candles = store.load_matrix(symbols, self.pivots.interval, 1, ("high", "low", "close"))
+            self.pivots.update(pivot_candles["high"][:, -1], pivot_candles["low"][:, -1], pivot_candles["close"][:, -1], selected)
+        return self
+
+    def state_dict(self):
+        state = {
+            "symbols": np.array(self.symbols),
+            "interval": np.array(self.interval),
+            "pivot_interval": np.array(self.pivots.interval),
+            "periods": np.array([self.rsi.period, self.atr.period, self.weighted_atr.window]),
+            "last_start": self.last_start.copy(),
+        }
+        for name in ("rsi", "atr", "weighted_atr", "pivots"):
+            for key, value in getattr(self, name).state_dict().items():
+                state[f"{name}.{key}"] = value
+        return state
+
+    def load_state(self, state):
+        if "last_start" in state:
+            self.last_start[...] = state["last_start"]
+        for name in ("rsi", "atr", "weighted_atr", "pivots"):
+            calculator = getattr(self, name)
+            calculator.load_state({key: state[f"{name}.{key}"] for key, _, _ in calculator.fields})
+
+    def save(self, path=STATE_PATH):
+        with self._lock:
+            state = self.state_dict()
+        with atomic_file.open_replacing(path, "wb") as f:
+            np.savez_compressed(f, **state)
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        with np.load(path) as state:
+            rsi_period, atr_period, weighted_window = state["periods"].tolist()
+            indicators = cls(state["symbols"].tolist(), str(state["interval"]), str(state["pivot_interval"]),
+                             rsi_period, atr_period, weighted_window)
+            indicators.load_state(state)
+        return indicators
+
+def open_indicators(symbols, interval, store, path=STATE_PATH, bars=SEED_BARS):
+    """Calculators for `symbols` restored from `path` when it matches, else warmed up from
+    the candle store; either way caught up with the store and saved."""
+    indicators = None
+    if os.path.exists(path):
+        try:
+            indicators = StreamingIndicators.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable streaming indicator state %s: %s", path, e)
+    if indicators is None or indicators.symbols != list(dict.fromkeys(symbols)) or indicators.interval != interval:
+        indicators = StreamingIndicators(symbols, interval)
+    indicators.seed(store, bars)
+    indicators.save(path)
+    return indicators
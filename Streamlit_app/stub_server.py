@@ -0,0 +1,278 @@
+"""Local stand-in for TradingView's scanner and Bybit's market endpoints.
+
+Serves deterministic indicator values and candles for any symbol so the fetch engines and
+the candle store can be exercised offline. Latency and error injection are controlled from the command line:
+
+    python stub_server.py --port 8765 --latency 0.2 --error-rate 0.1 --hang-rate 0.01
+
+Real responses can be recorded once and replayed instead of the synthetic values; symbols
+and candles missing from the recording fall back to synthetic data:
+
+    python stub_server.py --record fixtures/     # needs network access
+    python stub_server.py --fixtures fixtures/
+
+then point the fetchers at it with base_url="http://127.0.0.1:8765/" (scanner) or
+base_url="http://127.0.0.1:8765" (Bybit).
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+UNKNOWN_MARKER = "UNKNOWN"
+SCAN_FIXTURE = "scan.json"
+KLINE_FIXTURE_DIR = "klines"
+RECORD_KLINE_SYMBOLS = 20
+RECORD_KLINE_INTERVALS = ("D", "240")
+
+def indicator_value(ticker, column):
+    # Stable pseudo-random value per (ticker, column) so repeated runs are comparable.
+    seed = zlib.crc32(f"{ticker}|{column}".encode())
+    return round(10 + (seed % 8000) / 100, 2)
+
+def build_scan_response(payload, fixtures=None):
+    columns = payload.get("columns", [])
+    tickers = payload.get("symbols", {}).get("tickers", [])
+    recorded = (fixtures or {}).get("scan", {})
+    unknown = set((fixtures or {}).get("scan_missing", ()))
+    data = []
+    for ticker in tickers:
+        if UNKNOWN_MARKER in ticker or ticker in unknown:
+            continue
+        values = recorded.get(ticker, {})
+        data.append({"s": ticker, "d": [values[column] if column in values else indicator_value(ticker, column) for column in columns]})
+    return {"totalCount": len(data), "data": data}
+
+KLINE_STEPS_MS = {
+    "1": 60_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000,
+    "D": 86_400_000, "W": 604_800_000,
+}
+
+def synthetic_candle(symbol, start_ms):
+    # A deterministic random walk keyed on (symbol, candle start).
+    seed = zlib.crc32(f"{symbol}|{start_ms}".encode())
+    base = 1 + zlib.crc32(symbol.encode()) % 1000
+    close = base * (1 + ((seed % 2001) - 1000) / 20000)
+    open_ = close * (1 + ((seed >> 11) % 201 - 100) / 10000)
+    high = max(open_, close) * (1 + (seed >> 3) % 100 / 10000)
+    low = min(open_, close) * (1 - (seed >> 5) % 100 / 10000)
+    volume = 1000 + seed % 100000
+    return [str(start_ms), f"{open_:.6f}", f"{high:.6f}", f"{low:.6f}", f"{close:.6f}", str(volume), str(volume * close)]
+
+def build_kline_response(params, fixtures=None):
+    symbol = params.get("symbol", [""])[0]
+    interval = params.get("interval", ["D"])[0]
+    step = KLINE_STEPS_MS[interval]
+    limit = int(params.get("limit", ["200"])[0])
+    now_ms = int(time.time() * 1000)
+    end = int(params.get("end", [now_ms])[0])
+    start = int(params.get("start", [end - limit * step])[0])
+    first = -(-start // step) * step
+    starts = list(range(first, min(end, now_ms) + 1, step))[-limit:]
+    if UNKNOWN_MARKER in symbol:
+        return {"retCode": 10001, "retMsg": "Not supported symbols", "result": {}}
+    recorded = (fixtures or {}).get("klines", {}).get((symbol, interval))
+    if recorded:
+        # Recorded rows are newest first, as Bybit sends them.
+        rows = [row for row in recorded if start <= int(row[0]) <= end][:limit]
+    else:
+        rows = [synthetic_candle(symbol, start_ms) for start_ms in reversed(starts)]
+    return {"retCode": 0, "retMsg": "OK", "result": {"symbol": symbol, "category": "linear", "list": rows}}
+
+def stub_instruments():
+    # Every curated symbol, live or expired, so the universe filters have something to drop.
+    import universe
+    instruments = []
+    for symbol in dict.fromkeys(re.sub(r"\s+", "", entry) for entry in universe.CURATED_SYMBOLS):
+        bybit_symbol = symbol[:-2] if symbol.endswith(".P") else symbol
+        delivery = universe.delivery_date(symbol)
+        instruments.append({
+            "symbol": bybit_symbol,
+            "contractType": "LinearFutures" if delivery else "LinearPerpetual",
+            "status": "Trading",
+            "settleCoin": "USDC" if bybit_symbol.endswith(("PERP", "USDC")) or delivery else "USDT",
+            "deliveryTime": str(int(delivery.timestamp() * 1000)) if delivery else "0",
+        })
+    return instruments
+
+def build_instruments_response(params, fixtures=None):
+    instruments = stub_instruments()
+    limit = int(params.get("limit", ["500"])[0])
+    offset = int(params.get("cursor", ["0"])[0] or 0)
+    page = instruments[offset:offset + limit]
+    cursor = str(offset + limit) if offset + limit < len(instruments) else ""
+    return {"retCode": 0, "retMsg": "OK", "result": {"category": "linear", "list": page, "nextPageCursor": cursor}}
+
+def build_tickers_response(params, fixtures=None):
+    tickers = [
+        {"symbol": instrument["symbol"], "turnover24h": str(zlib.crc32(instrument["symbol"].encode()) % 100_000_000)}
+        for instrument in stub_instruments()
+    ]
+    return {"retCode": 0, "retMsg": "OK", "result": {"category": "linear", "list": tickers}}
+
+def load_fixtures(directory):
+    """Read a directory written by record_fixtures() into the `fixtures` option of the stub."""
+    fixtures = {"scan": {}, "scan_missing": [], "klines": {}}
+    try:
+        with open(os.path.join(directory, SCAN_FIXTURE)) as f:
+            scan = json.load(f)
+        fixtures["scan"] = scan["data"]
+        fixtures["scan_missing"] = scan.get("missing", [])
+    except FileNotFoundError:
+        pass
+    kline_dir = os.path.join(directory, KLINE_FIXTURE_DIR)
+    for name in sorted(os.listdir(kline_dir)) if os.path.isdir(kline_dir) else []:
+        if name.endswith(".json"):
+            symbol, interval = name[:-len(".json")].rsplit("-", 1)
+            with open(os.path.join(kline_dir, name)) as f:
+                fixtures["klines"][(symbol, interval)] = json.load(f)
+    return fixtures
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+def record_fixtures(directory, kline_symbols=RECORD_KLINE_SYMBOLS):
+    """Record real scanner values for the universe and Bybit candles for a sample of it."""
+    import requests
+    import candle_store
+    import collector
+    import tv_scanner
+    from universe import symbols, exchange, screener
+
+    columns, _ = tv_scanner.scan_columns(list(collector.INDICATORS), list(collector.TIMEFRAMES))
+    tickers = [f"{exchange}:{symbol}" for symbol in dict.fromkeys(symbols)]
+    data = {}
+    for chunk in tv_scanner.chunked(tickers, tv_scanner.CHUNK_SIZE):
+        response = requests.post(tv_scanner.scan_url(screener), json=tv_scanner.scan_payload(chunk, columns),
+                                 headers=tv_scanner.HEADERS, timeout=tv_scanner.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        for row in response.json().get("data") or []:
+            data[row["s"]] = dict(zip(columns, row["d"]))
+    _write_json(os.path.join(directory, SCAN_FIXTURE), {
+        "recorded_at": int(time.time()), "data": data, "missing": [ticker for ticker in tickers if ticker not in data],
+    })
+
+    for symbol in list(dict.fromkeys(symbols))[:kline_symbols]:
+        bybit_symbol = candle_store.to_bybit_symbol(symbol)
+        for interval in RECORD_KLINE_INTERVALS:
+            response = requests.get(f"{candle_store.BYBIT_API}/v5/market/kline", params={
+                "category": candle_store.CATEGORY, "symbol": bybit_symbol, "interval": interval, "limit": candle_store.PAGE_LIMIT,
+            }, timeout=candle_store.REQUEST_TIMEOUT)
+            response.raise_for_status()
+            rows = response.json().get("result", {}).get("list") or []
+            _write_json(os.path.join(directory, KLINE_FIXTURE_DIR, f"{bybit_symbol}-{interval}.json"), rows)
+    return len(data)
+
+GET_ROUTES = {
+    "/v5/market/kline": build_kline_response,
+    "/v5/market/instruments-info": build_instruments_response,
+    "/v5/market/tickers": build_tickers_response,
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    rate_limit_rate = 0.0
+    hang_rate = 0.0
+    hang_seconds = 60.0
+    fixtures = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(encoded)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on a slow or hung response; that is the point of the test.
+            pass
+
+    def _inject_faults(self):
+        # Returns True when a fault response was sent instead of the real one.
+        roll = random.random()
+        if roll < self.hang_rate:
+            time.sleep(self.hang_seconds)
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            self._send_json(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            return True
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._send_json(503, {"error": "unavailable"})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        route = GET_ROUTES.get(url.path)
+        if route is None:
+            self._send_json(404, {"error": "not found"})
+        elif not self._inject_faults():
+            self._send_json(200, route(parse_qs(url.query), self.fixtures))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self._inject_faults():
+            self._send_json(200, build_scan_response(payload, self.fixtures))
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """Start the stub in a daemon thread and return the server; its base URL is
+    f"http://{host}:{server.server_port}/"."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), options)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub TradingView scanner server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--fixtures", help="Serve responses recorded with --record from this directory")
+    parser.add_argument("--record", metavar="DIR", help="Record real responses into DIR and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        print(f"Recorded {record_fixtures(args.record)} symbols into {args.record}")
+        return
+
+    server = start_server(
+        args.host, args.port,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+        fixtures=load_fixtures(args.fixtures) if args.fixtures else None
+    )
+    print(f"Stub scanner listening on http://{args.host}:{server.server_port}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+import alerts
+
+RULES = [
+    {"id": "rsi-70", "type": "rsi_cross", "level": 70, "direction": "above"},
+    {"id": "btc-30", "type": "rsi_cross", "level": 30, "direction": "below", "symbols": ["BTCUSDT.P"]},
+    {"id": "near-s1", "type": "near_level", "level": "s1", "percent": 1.0},
+    {"id": "flip", "type": "recommendation_flip", "to": ["LONG"]},
+]
+SYMBOLS = ["BTCUSDT.P", "ETHUSDT.P"]
+
+def frame(rsi, distance=(5.0, 5.0), recommendation=("NEUTRAL", "NEUTRAL")):
+    return pd.DataFrame({"Symbol": SYMBOLS, "4h RSI": rsi, "Distance to S1 (%)": distance,
+                         "Recommendation": list(recommendation)})
+
+def fired(alert_list):
+    return sorted((alert["rule"], alert["symbol"]) for alert in alert_list)
+
+def test_first_frame_only_sets_the_baseline():
+    engine = alerts.AlertEngine(RULES)
+    assert engine.evaluate(frame([80, 20], [0.5, -0.5], ["LONG", "LONG"]), now=0) == []
+
+def test_fires_on_transitions_only():
+    engine = alerts.AlertEngine(RULES, dedup_seconds=0)
+    engine.evaluate(frame([60, 60]), now=0)
+    assert fired(engine.evaluate(frame([75, 60], [5.0, -0.8]), now=1)) == [("near-s1", "ETHUSDT.P"), ("rsi-70", "BTCUSDT.P")]
+    # Still true: no new alert.
+    assert engine.evaluate(frame([80, 60], [5.0, -0.9]), now=2) == []
+    # Falls back, then crosses again.
+    assert engine.evaluate(frame([65, 60]), now=3) == []
+    assert fired(engine.evaluate(frame([71, 60]), now=4)) == [("rsi-70", "BTCUSDT.P")]
+
+def test_missing_values_keep_the_previous_state():
+    engine = alerts.AlertEngine(RULES, dedup_seconds=0)
+    engine.evaluate(frame([75, 60]), now=0)
+    assert engine.evaluate(frame([np.nan, 60]), now=1) == []
+    # BTC was above 70 before the gap, so staying there is not a crossing.
+    assert engine.evaluate(frame([75, 60]), now=2) == []
+
+def test_symbol_scoped_rules():
+    engine = alerts.AlertEngine(RULES, dedup_seconds=0)
+    engine.evaluate(frame([50, 50]), now=0)
+    assert fired(engine.evaluate(frame([25, 25]), now=1)) == [("btc-30", "BTCUSDT.P")]
+
+def test_recommendation_flip_fires_only_into_listed_labels():
+    engine = alerts.AlertEngine(RULES, dedup_seconds=0)
+    engine.evaluate(frame([50, 50], recommendation=("NEUTRAL", "LONG")), now=0)
+    assert fired(engine.evaluate(frame([50, 50], recommendation=("LONG", "SHORT")), now=1)) == [("flip", "BTCUSDT.P")]
+    assert engine.evaluate(frame([50, 50], recommendation=("LONG", "SHORT")), now=2) == []
+
+def test_dedup_window_per_rule_and_symbol():
+    engine = alerts.AlertEngine(RULES, dedup_seconds=100)
+    engine.evaluate(frame([60, 60]), now=0)
+    assert fired(engine.evaluate(frame([75, 60]), now=10)) == [("rsi-70", "BTCUSDT.P")]
+    engine.evaluate(frame([60, 60]), now=20)
+    # A second crossing inside the window is suppressed; another symbol is not.
+    assert fired(engine.evaluate(frame([75, 75]), now=30)) == [("rsi-70", "ETHUSDT.P")]
+    engine.evaluate(frame([60, 60]), now=40)
+    assert fired(engine.evaluate(frame([75, 60]), now=111)) == [("rsi-70", "BTCUSDT.P")]
+
+def test_state_survives_save_and_reordered_rules(tmp_path):
+    engine = alerts.AlertEngine(RULES, dedup_seconds=100)
+    engine.evaluate(frame([60, 60]), now=0)
+    engine.evaluate(frame([75, 60]), now=10)
+    path = str(tmp_path / "state.npz")
+    engine.save(path)
+
+    restored = alerts.AlertEngine.load(list(reversed(RULES)), path, dedup_seconds=100)
+    assert restored.evaluate(frame([75, 60]), now=20) == []
+    restored.evaluate(frame([60, 60]), now=30)
+    # Still inside the dedup window of the alert sent before the restart.
+    assert restored.evaluate(frame([75, 60]), now=40) == []
+    assert fired(restored.evaluate(frame([60, 75]), now=50)) == [("rsi-70", "ETHUSDT.P")]
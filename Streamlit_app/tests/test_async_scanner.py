@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+from aiohttp import web
+
+import async_scanner
+
+def refresh_against(statuses):
+    """Run a one-chunk refresh against a server answering with `statuses` in turn; returns
+    (result, number of requests)."""
+    requests = []
+
+    async def scan(request):
+        status = statuses[min(len(requests), len(statuses) - 1)]
+        requests.append(status)
+        if status != 200:
+            return web.Response(status=status)
+        return web.json_response({"data": [{"s": "BYBIT:BTCUSDT", "d": [55.0]}]})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/crypto/scan", scan)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await async_scanner.refresh(["BTCUSDT"], "BYBIT", "crypto", "4h", ["RSI"],
+                                               base_url=f"http://127.0.0.1:{port}/")
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run()), len(requests)
+
+def test_client_errors_are_not_retried():
+    for status in (400, 401, 404):
+        result, requests = refresh_against([status])
+        assert requests == 1
+        assert result.stale == ["BTCUSDT"]
+        assert sum(result.errors.values()) == 1
+
+def test_retry_statuses_are_retried(monkeypatch):
+    monkeypatch.setattr(async_scanner, "backoff_delay", lambda attempt, retry_after=None: 0)
+    result, requests = refresh_against([503, 429, 200])
+    assert requests == 3
+    assert result.results == {"BTCUSDT": {"RSI": 55.0}}
+    assert result.errors == {}
+
+def test_scanner_session_reuses_connections():
+    peers = []
+
+    async def scan(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"data": [{"s": "BYBIT:BTCUSDT", "d": [55.0]}]})
+
+    async def start():
+        app = web.Application()
+        app.router.add_post("/crypto/scan", scan)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]
+
+    # The server runs on a loop of its own, like the scanner's, so both can serve at once.
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runner, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    scanner = async_scanner.ScannerSession()
+    try:
+        for _ in range(3):
+            result = scanner.refresh(["BTCUSDT"], "BYBIT", "crypto", "4h", ["RSI"], base_url=f"http://127.0.0.1:{port}/")
+            assert result.results == {"BTCUSDT": {"RSI": 55.0}}
+    finally:
+        scanner.close()
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    assert len(peers) == 3
+    assert len(set(peers)) == 1
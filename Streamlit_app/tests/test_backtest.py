@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import backtest
+import grid_engine
+
+def bars(*rows):
+    """(open, high, low, close) arrays from one tuple per bar."""
+    return tuple(np.array(column, dtype=np.float64) for column in zip(*rows))
+
+def run(candles, direction, entry, step, count, stop, target, fee_rate=0.0):
+    result = backtest.backtest_grid(*candles, entry, step, count, stop, target,
+                                    direction=direction, capital=1000.0, fee_rate=fee_rate)
+    return {key: value[0] for key, value in result.items()}
+
+def test_long_round_trip_waits_for_the_next_bar():
+    candles = bars((101, 102, 99.5, 100), (100, 101.5, 100, 101))
+    result = run(candles, grid_engine.LONG, 100.0, 1.0, 1, 90.0, 200.0, fee_rate=0.001)
+
+    # The level bought on bar 0 is not sold on bar 0 even though its high reached 101.
+    assert result["fills"] == 2
+    assert result["round_trips"] == 1
+    assert result["realized_profit"] == pytest.approx(10.0)
+    assert result["fees"] == pytest.approx(10 * 100 * 0.001 + 10 * 101 * 0.001)
+    assert result["open_levels"] == 0
+
+def test_long_gap_fills_at_the_open():
+    candles = bars((98, 98.5, 97, 98.5),)
+    result = run(candles, grid_engine.LONG, 100.0, 1.0, 1, 90.0, 200.0)
+
+    # Bought at the 98 open rather than the 100 level, then marked to market at the close.
+    assert result["fills"] == 1
+    assert result["unrealized_profit"] == pytest.approx(1000.0 / 98 * 0.5)
+    assert result["open_levels"] == 1
+
+def test_short_round_trip_profits_from_a_fall():
+    candles = bars((99, 100.5, 99, 100), (100, 100, 98.5, 99))
+    result = run(candles, grid_engine.SHORT, 100.0, 1.0, 1, 110.0, 0.0)
+
+    assert result["fills"] == 2
+    assert result["round_trips"] == 1
+    assert result["realized_profit"] == pytest.approx(10.0)
+    assert not result["stopped"]
+
+def test_short_stop_loss_fills_at_the_gapped_open():
+    candles = bars((99, 100.5, 99, 100), (112, 113, 111, 112))
+    result = run(candles, grid_engine.SHORT, 100.0, 1.0, 1, 110.0, 0.0)
+
+    # Opened short at 100 and gapped above the 110 stop: closed at the 112 open.
+    assert result["stopped"]
+    assert result["finished_at"] == 1
+    assert result["realized_profit"] == pytest.approx(-120.0)
+    assert result["open_levels"] == 0
+
+def test_short_matches_long_on_negated_prices():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, 300))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, 300))
+    entry, step, count, stop, target = [100.0, 105.0], [1.0, 2.5], [10, 5], [120.0, 130.0], [90.0, 80.0]
+
+    short = backtest.backtest_grid(open_, high, low, close, entry, step, count, stop, target,
+                                   direction=grid_engine.SHORT, fee_rate=0.001)
+    # Negating prices swaps high and low and turns the SHORT grid into a LONG one.
+    long = backtest.backtest_grid(-open_, -low, -high, -close, np.negative(entry), step, count,
+                                  np.negative(stop), np.negative(target), direction=grid_engine.LONG, fee_rate=0.001)
+    for key in ("fills", "round_trips", "net_profit", "fees", "max_drawdown", "stopped", "finished_at"):
+        np.testing.assert_allclose(short[key], long[key], err_msg=key)
+    assert short["fills"].min() > 0
+
+def test_neutral_and_empty_grids_never_trade():
+    candles = bars((101, 102, 95, 100), (100, 106, 99, 105))
+    result = backtest.backtest_grid(*candles, [100.0, 100.0], [1.0, 0.0], [5, 5], [90.0, 90.0], [110.0, 110.0],
+                                    direction=[grid_engine.NEUTRAL, grid_engine.LONG])
+    np.testing.assert_array_equal(result["fills"], [0, 0])
+    np.testing.assert_array_equal(result["net_profit"], [0.0, 0.0])
@@ -0,0 +1,39 @@
+import numpy as np
+
+import indicators
+
+def random_walk(bars, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    spread = np.abs(rng.normal(0, 0.005, bars))
+    return close * (1 + spread), close * (1 - spread), close
+
+def padded(rows, bars):
+    """Right-aligned rows with NaN on the left, as CandleStore.load_matrix returns them."""
+    matrix = np.full((len(rows), bars), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, bars - len(row):] = row
+    return matrix
+
+def test_padded_rows_match_1d():
+    histories = [random_walk(bars, seed) for seed, bars in enumerate((120, 40, 16, 15, 5))]
+    high, low, close = (padded([history[i] for history in histories], 120) for i in range(3))
+
+    rsi = indicators.rsi(close)
+    atr = indicators.atr(high, low, close)
+    for row, (h, l, c) in enumerate(histories):
+        tail = slice(120 - len(c), None)
+        np.testing.assert_allclose(rsi[row, tail], indicators.rsi(c), equal_nan=True)
+        np.testing.assert_allclose(atr[row, tail], indicators.atr(h, l, c), equal_nan=True)
+        assert np.isnan(rsi[row, :tail.start]).all()
+
+def test_rma_seed_is_simple_mean():
+    values = np.arange(1.0, 21.0)
+    result = indicators.rma(values, 5)
+    assert np.isnan(result[:4]).all()
+    assert result[4] == values[:5].mean()
+    assert np.isclose(result[5], result[4] + (values[5] - result[4]) / 5)
+
+def test_short_history_is_all_nan():
+    assert np.isnan(indicators.rma(np.ones(3), 5)).all()
+    assert np.isnan(indicators.rma(padded([np.ones(3)], 10), 5)).all()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from rsi_index import RsiIndex
+
+def snapshot():
+    return pd.DataFrame({
+        "Symbol": ["A", "B", "C", "D", "E", "F"],
+        "4h RSI": [30.0, 70.0, np.nan, 30.0, 50.0, 70.0],
+        "1h RSI": [10.0, 20.0, 30.0, 40.0, np.nan, 60.0],
+    })
+
+def test_count_includes_both_bounds_and_skips_nan():
+    index = RsiIndex(snapshot())
+    assert index.columns == ["4h RSI", "1h RSI"]
+    assert index.count("4h RSI", 30, 70) == 5
+    assert index.count("4h RSI", 30, 30) == 2
+    assert index.count("4h RSI", 30.000001, 69.999999) == 1
+    assert index.count("4h RSI", 0, 100) == 5
+    assert index.count("4h RSI", 70, 30) == 0
+    assert len(index.between("4h RSI", 70, 30)) == 0
+
+def test_between_is_sorted_by_value():
+    index = RsiIndex(snapshot())
+    # Ties keep frame order ascending, so descending lists them last-row first.
+    np.testing.assert_array_equal(index.between("4h RSI", 30, 70, descending=False), [0, 3, 4, 1, 5])
+    np.testing.assert_array_equal(index.between("4h RSI", 30, 70), [5, 1, 4, 3, 0])
+
+def test_top_n_at_the_boundaries():
+    index = RsiIndex(snapshot())
+    np.testing.assert_array_equal(index.lowest("1h RSI", 2), [0, 1])
+    np.testing.assert_array_equal(index.highest("1h RSI", 2), [5, 3])
+    assert len(index.highest("1h RSI", 0)) == 0
+    assert len(index.lowest("1h RSI", 0)) == 0
+    # Asking for more rows than have values returns every non-NaN row, never a NaN one.
+    np.testing.assert_array_equal(index.highest("1h RSI", 10), [5, 3, 2, 1, 0])
+    np.testing.assert_array_equal(index.lowest("4h RSI", 10), [0, 3, 4, 1, 5])
+
+def test_screen_matches_a_mask():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"4h RSI": rng.uniform(0, 100, 500), "1h RSI": rng.uniform(0, 100, 500)})
+    df.loc[rng.choice(500, 50), "1h RSI"] = np.nan
+    index = RsiIndex(df)
+    ranges = {"4h RSI": (20, 60), "1h RSI": (40, 45)}
+    mask = df["4h RSI"].between(20, 60) & df["1h RSI"].between(40, 45)
+    np.testing.assert_array_equal(index.screen(ranges), np.flatnonzero(mask))
+    np.testing.assert_array_equal(index.screen({}), np.arange(500))
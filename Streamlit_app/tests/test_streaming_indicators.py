@@ -0,0 +1,65 @@
+import numpy as np
+
+import bybit_stream
+import candle_store
+import indicators
+import streaming_indicators
+
+STEP_MS = 4 * 60 * 60 * 1000
+
+def candles(bars, seed, start=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    return {
+        "timestamp": (np.arange(bars, dtype=np.int64) + start) * STEP_MS,
+        "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+        "volume": rng.uniform(1, 10, bars),
+    }
+
+def part(history, rows):
+    return {column: values[rows] for column, values in history.items()}
+
+def kline(symbol, history, i, confirm=True):
+    return {"topic": f"kline.240.{symbol}", "data": [{
+        "start": int(history["timestamp"][i]), "open": history["open"][i], "high": history["high"][i],
+        "low": history["low"][i], "close": history["close"][i], "volume": history["volume"][i], "confirm": confirm,
+    }]}
+
+def test_seed_matches_batch_rsi(tmp_path):
+    store = candle_store.CandleStore(str(tmp_path))
+    a, b = candles(60, 1), candles(20, 2, start=40)
+    store.append("AAAUSDT.P", "4h", a)
+    store.append("BBBUSDT.P", "4h", b)
+
+    streaming = streaming_indicators.StreamingIndicators(["AAAUSDT.P", "BBBUSDT.P", "CCCUSDT.P"]).seed(store)
+    rsi = streaming.rsi.value()
+    assert np.isclose(rsi[0], indicators.rsi(a["close"])[-1])
+    assert np.isclose(rsi[1], indicators.rsi(b["close"])[-1])
+    assert np.isnan(rsi[2])
+
+def test_restore_catches_up_and_stream_skips_seen_candles(tmp_path):
+    store = candle_store.CandleStore(str(tmp_path / "candles"))
+    path = str(tmp_path / "state.npz")
+    history = candles(80, 3)
+    store.append("AAAUSDT.P", "4h", part(history, slice(0, 50)))
+    streaming_indicators.open_indicators(["AAAUSDT.P"], "4h", store, path)
+
+    # Candles stored while "down" are replayed once on restore, then the stream continues.
+    store.append("AAAUSDT.P", "4h", part(history, slice(50, 70)))
+    restored = streaming_indicators.open_indicators(["AAAUSDT.P"], "4h", store, path)
+    state = bybit_stream.MarketState()
+    restored.listen(state, path, save_delay=60)
+    for i in (68, 69, 70, 71):
+        state.handle_message(kline("AAAUSDT", history, i))
+    state.handle_message(kline("AAAUSDT", history, 72, confirm=False))
+    state.handle_message({"topic": "kline.1.AAAUSDT", "data": kline("AAAUSDT", history, 72)["data"]})
+
+    assert restored.last_start[0] == history["timestamp"][71]
+    assert np.isclose(restored.rsi.value()[0], indicators.rsi(history["close"][:72])[-1])
+    assert np.isclose(restored.atr.value()[0], indicators.atr(history["high"][:72], history["low"][:72], history["close"][:72])[-1])
+
+def test_row_accepts_bybit_and_tradingview_symbols():
+    streaming = streaming_indicators.StreamingIndicators(["AAAUSDT.P", "BBBUSDT.P"])
+    assert streaming.row("BBBUSDT") == 1
+    assert streaming.row("BYBIT:BBBUSDT.P") == 1
+    assert streaming.row("ZZZUSDT") is None
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+import universe
+
+NOW = datetime(2025, 3, 28, 12, tzinfo=timezone.utc)
+
+def test_clean_symbols_dedups_in_first_seen_order():
+    valid, rejected = universe.clean_symbols(
+        ["ethusdt.p", "BTCUSDT.P", " ETH USDT.P ", "BTCUSDT.PSOLUSDT.P", "ETHUSDT.P"], now=NOW)
+    assert valid == ["ETHUSDT.P", "BTCUSDT.P", "SOLUSDT.P"]
+    assert rejected == []
+
+def test_clean_symbols_rejects_expired_futures():
+    valid, rejected = universe.clean_symbols(
+        ["BTCUSDT-27MAR25.P", "BTCUSDT-28MAR25.P", "ETHUSDT-27JUN25.P", "BTCUSDT-27MAR25.PETHUSDT.P"], now=NOW)
+    # Delivery today still trades; the day before is gone, whether alone or fused.
+    assert valid == ["BTCUSDT-28MAR25.P", "ETHUSDT-27JUN25.P", "ETHUSDT.P"]
+    assert rejected == ["BTCUSDT-27MAR25.P", "BTCUSDT-27MAR25.P"]
+
+def test_clean_symbols_rejects_malformed_entries():
+    valid, rejected = universe.clean_symbols(["BTCUSDT", "BTC/USDT.P", "ADAUSDT.P"], now=NOW)
+    assert valid == ["ADAUSDT.P"]
+    assert rejected == ["BTCUSDT", "BTC/USDT.P"]
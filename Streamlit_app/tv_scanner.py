@@ -0,0 +1,47 @@
+"""TradingView scanner request helpers shared by async_scanner and stub_server.
+
+One scanner request carries many symbols and, through scan_columns, many intervals; the
+refresh itself lives in async_scanner.
+"""
+from tradingview_ta import TradingView, __version__
+
+# Configuration
+CHUNK_SIZE = 200
+REQUEST_TIMEOUT = 15
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+HEADERS = {"User-Agent": "tradingview_ta/{}".format(__version__)}
+# Column suffix TradingView's scanner uses for each candle interval; daily has none.
+INTERVAL_SUFFIXES = {
+    "1m": "|1", "5m": "|5", "15m": "|15", "30m": "|30",
+    "1h": "|60", "2h": "|120", "4h": "|240",
+    "1d": "", "1W": "|1W", "1M": "|1M",
+}
+
+def scan_url(screener, base_url=None):
+    return f"{base_url or TradingView.scan_url}{screener.lower()}/scan"
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def scan_columns(indicators, interval):
+    """Return (columns, keys) for a scanner request.
+
+    A single interval keys results by indicator name, as TradingView.data does. A list of
+    intervals requests every indicator on every interval in the same call and keys the
+    results as "<interval> <indicator>", e.g. "4h RSI".
+    """
+    if isinstance(interval, str):
+        return [indicator + INTERVAL_SUFFIXES[interval] for indicator in indicators], list(indicators)
+    pairs = [(indicator + INTERVAL_SUFFIXES[item], f"{item} {indicator}") for item in interval for indicator in indicators]
+    return [column for column, _ in pairs], [key for _, key in pairs]
+
+def scan_payload(tickers, columns):
+    return {"symbols": {"tickers": [ticker.upper() for ticker in tickers], "query": {"types": []}}, "columns": columns}
+
+def parse_scan_response(payload, indicators):
+    results = {}
+    for row in payload.get("data") or []:
+        symbol = row["s"].split(":", 1)[-1]
+        results[symbol] = dict(zip(indicators, row["d"]))
+    return results
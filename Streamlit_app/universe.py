@@ -0,0 +1,313 @@
+"""Symbol universe for the screeners.
+
+The universe is resolved from Bybit's instruments-info endpoint (or a cached JSON copy of
+it when offline): live contracts only, filtered by tags such as "perpetual", "usdt" or
+"usdc" and a minimum 24h turnover, then persisted so startup just reads the result:
+
+    python universe.py --tags linear perpetual usdt --min-turnover 1000000
+    python universe.py --offline
+
+Until a universe has been resolved, the hand-curated CURATED_SYMBOLS list is used after
+the same cleanup: whitespace removed, fused entries split, duplicates and expired dated
+futures dropped.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import requests
+
+import atomic_file
+import indicator_cache
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+exchange = "BYBIT"
+screener = "crypto"
+BYBIT_API = os.environ.get("BYBIT_API_URL", "https://api.bybit.com")
+CATEGORY = "linear"
+PAGE_LIMIT = 1000
+REQUEST_TIMEOUT = 10
+INSTRUMENTS_PATH = os.path.join(indicator_cache.CACHE_DIR, "instruments.json")
+UNIVERSE_PATH = os.environ.get("CRYPTO_UNIVERSE_PATH", os.path.join(indicator_cache.CACHE_DIR, "universe.json"))
+INSTRUMENTS_MAX_AGE = 24 * 60 * 60
+DEFAULT_TAGS = ("linear", "perpetual", "usdt")
+MIN_TURNOVER = 0.0
+
+# TradingView tickers: an upper-case base, an optional "-DDMMMYY" delivery date, then ".P".
+SYMBOL_PATTERN = re.compile(r"^[0-9A-Z]+(?:-(\d{2}[A-Z]{3}\d{2}))?\.P$")
+FUSED_PATTERN = re.compile(r"[0-9A-Z-]+?\.P")
+
+# Hand-curated list, used until a universe has been resolved from Bybit
+CURATED_SYMBOLS = [
+    "10000LADYSUSDT.P", "10000NFTUSDT.P", "1000BONKUSDT.P", "1000BTTUSDT.P", "1000BEERUSDT.P",
+    "1000FLOKIUSDT.P", "1000LUNCUSDT.P", "1000PEPEUSDT.P", "1000XECUSDT.P", "1000000MOGUSDT.P",
+    "1INCHUSDT.P", "AAVEUSDT.P", "ACHUSDT.P", "ADAUSDT.P", "AGLDUSDT.P", "AVAILUSDT.P",
+    "AKROUSDT.P", "ALGOUSDT.P", "ALICEUSDT.P", "ALPACAUSDT.P", "1000APUUSDT.P", "1CATUSDT.P",
+    "ALPHAUSDT.P", "AMBUSDT.P", "ANKRUSDT.P", "APEUSDT.P", "API3USDT.P", "A8USDT.P",
+    "APTUSDT.P", "ARUSDT.P", "ARBUSDT.P", "ARKUSDT.P", "DOP1USDT.P", "1000RATSUSDT.P",
+    "ARKMUSDT.P", "ARPAUSDT.P", "ASTRUSDT.P", "ATAUSDT.P", "ATOMUSDT.P",
+    "AUCTIONUSDT.P", "AUDIOUSDT.P", "AVAXUSDT.P", "AXSUSDT.P", "BADGERUSDT.P",
+    "BAKEUSDT.P", "BALUSDT.P", "BANDUSDT.P", "BATUSDT.P", "BCHUSDT.P",
+    "BELUSDT.P", "BICOUSDT.P", "BIGTIMEUSDT.P", "BLURUSDT.P", "BLZUSDT.P", "CETUSUSDT.P",
+    "BTCUSDT.P", "C98USDT.P", "CEEKUSDT.P", "CELOUSDT.P", "CELRUSDT.P", "CFXUSDT.P",
+    "CHRUSDT.P", "CHZUSDT.P", "CKBUSDT.P", "COMBOUSDT.P", "COMPUSDT.P", "DRIFTUSDT.P",
+    "COREUSDT.P", "COTIUSDT.P", "CROUSDT.P", "CRVUSDT.P", "CTCUSDT.P", "DEGENUSDT.P",
+    "CTKUSDT.P", "CTSIUSDT.P", "CVCUSDT.P", "CVXUSDT.P", "CYBERUSDT.P", "DARUSDT.P",
+    "DASHUSDT.P", "DENTUSDT.P", "DGBUSDT.P", "DODOUSDT.P", "DOGEUSDT.P", "DOTUSDT.P",
+    "DUSKUSDT.P", "DYDXUSDT.P", "EDUUSDT.P", "EGLDUSDT.P", "ENJUSDT.P", "ENSUSDT.P",
+    "EOSUSDT.P", "ETCUSDT.P", "ETHUSDT.P", "ETHWUSDT.P", "FILUSDT.P", "DOGUSDT.P", "FIREUSDT.P",
+    "FITFIUSDT.P", "FLOWUSDT.P", "FLRUSDT.P", "FORTHUSDT.P", "FRONTUSDT.P", "FTMUSDT.P",
+    "FXSUSDT.P", "GALAUSDT.P", "GFTUSDT.P", "GLMUSDT.P", "BENDOGUSDT.P", "L3USDT.P",
+    "GLMRUSDT.P", "GMTUSDT.P", "GMXUSDT.P", "GRTUSDT.P", "GTCUSDT.P", "HBARUSDT.P",
+    "HFTUSDT.P", "HIFIUSDT.P", "HIGHUSDT.P", "HNTUSDT.P", "PENGUSDT.P", "1000000PEIPEIUSDT.P",
+    "HOOKUSDT.P", "HOTUSDT.P", "ICPUSDT.P", "ICXUSDT.P", "IDUSDT.P", "IDEXUSDT.P",
+    "ILVUSDT.P", "IMXUSDT.P", "INJUSDT.P", "IOSTUSDT.P", "IOTAUSDT.P", "IOTXUSDT.P",
+    "JASMYUSDT.P", "JOEUSDT.P", "JSTUSDT.P", "KASUSDT.P", "KAVAUSDT.P", "KDAUSDT.P",
+    "KEYUSDT.P", "KLAYUSDT.P", "KNCUSDT.P", "KSMUSDT.P", "LDOUSDT.P", "LEVERUSDT.P",
+    "LINAUSDT.P", "LINKUSDT.P", "LITUSDT.P", "LOOKSUSDT.P", "LOOMUSDT.P", "LPTUSDT.P", "LAIUSDT.P",
+    "LQTYUSDT.P", "LRCUSDT.P", "LTCUSDT.P", "LUNA2USDT.P", "MAGICUSDT.P", "MOTHERUSDT.P", "MYRIAUSDT.P",
+    "MANAUSDT.P", "MASKUSDT.P", "MATICUSDT.P", "MAVUSDT.P", "MDTUSDT.P", "POPCATUSDT.P", "MANEKIUSDT.P",
+    "MINAUSDT.P", "MKRUSDT.P", "MNTUSDT.P", "MTLUSDT.P", "NEARUSDT.P", "PIXFIUSDT.P",
+    "NEOUSDT.P", "NKNUSDT.P", "NMRUSDT.P", "NTRNUSDT.P", "NEIROETHUSDT.P", "OGUSDT.P",
+    "OGNUSDT.P", "OMGUSDT.P", "ONEUSDT.P", "ONTUSDT.P", "OPUSDT.P", "ORBSUSDT.P", "ORDERUSDT.P",
+    "ORDIUSDT.P", "OXTUSDT.P", "PAXGUSDT.P", "PENDLEUSDT.P", "PEOPLEUSDT.P", "PERPUSDT.P",
+    "PHBUSDT.P", "PROMUSDT.P", "PONKEUSDT.P", "QNTUSDT.P", "QTUMUSDT.P", "RADUSDT.P", "RDNTUSDT.P",
+    "REEFUSDT.P", "RENUSDT.P", "REQUSDT.P", "RLCUSDT.P", "ROSEUSDT.P", "SCAUSDT.P", "SAGAUSDT.P",
+    "RPLUSDT.P", "RSRUSDT.P", "RSS3USDT.P", "RUNEUSDT.P", "RVNUSDT.P", "SUNDOGUSDT.P", "SAFEUSDT.P",
+    "SANDUSDT.P", "SCUSDT.P", "SCRTUSDT.P", "SEIUSDT.P", "SFPUSDT.P", "SHIB1000USDT.P", "SILLYUSDT.P",
+    "SKLUSDT.P", "SLPUSDT.P", "SNXUSDT.P", "SOLUSDT.P", "SPELLUSDT.P", "SSVUSDT.P", "PRCLUSDT.P",
+    "STGUSDT.P", "STMXUSDT.P", "STORJUSDT.P", "STPTUSDT.P", "STXUSDT.P", "SUIUSDT.P", "SLFUSDT.P",
+    "SUNUSDT.P", "SUSHIUSDT.P", "SWEATUSDT.P", "SXPUSDT.P", "UXLINKUSDT.P", "PIRATEUSDT.P",
+    "TUSDT.P", "THETAUSDT.P", "TLMUSDT.P", "TOMIUSDT.P", "TONUSDT.P", "STRKUSDT.P",
+    "TRBUSDT.P", "TRUUSDT.P", "TRXUSDT.P", "TWTUSDT.P", "UMAUSDT.P", "UNFIUSDT.P",
+    "UNIUSDT.P", "USDCUSDT.P", "VETUSDT.P", "VGXUSDT.P", "VRAUSDT.P",
+    "WAVESUSDT.P", "WAXPUSDT.P", "WLDUSDT.P", "WOOUSDT.P", "XCNUSDT.P", "ZCXUSDT.P",
+    "XEMUSDT.P", "XLMUSDT.P", "XMRUSDT.P", "XNOUSDT.P", "XRPUSDT.P", "XTZUSDT.P", "ZBCNUSDT.P",
+    "XVGUSDT.P", "XVSUSDT.P", "YFIUSDT.P", "YGGUSDT.P", "ZECUSDT.P", "ZENUSDT.P", "ZILUSDT.P", "ZRXUSDT.P",
+    "10000000AIDOGEUSDT.P", "1000000BABYDOGEUSDT.P", "1000000CHEEMSUSDT.P",
+    "10000COQUSDT.P", "10000ELONUSDT.P", "10000QUBICUSDT.P", "10000SATSUSDT.P", "10000WENUSDT.P",
+    "10000WHYUSDT.P", "1000BONKPERP.P", "1000CATSUSDT.P", "1000CATUSDT.P",
+    "1000MUMUUSDT.P", "1000NEIROCTOUSDT.P", "1000PEPEPERP.P",
+    "1000TOSHIUSDT.P", "1000TURBOUSDT.P", "1000XUSDT.P",
+    "ACEUSDT.P", "ACTUSDT.P", "ACXUSDT.P", "AERGOUSDT.P", "AEROUSDT.P", "AEVOPERP.P",
+    "AEVOUSDT.P", "AGIUSDT.P", "AI16ZUSDT.P", "AIOZUSDT.P", "AIUSDT.P", "AIXBTUSDT.P", "AKTUSDT.P", "ALCHUSDT.P",
+    "ALEOUSDT.P", "ALTUSDT.P", "ALUUSDT.P",
+    "ANIMEUSDT.P", "ARBPERP.P", "ARCUSDT.P",
+    "ATHUSDT.P",
+    "AVAAIUSDT.P", "AVAUSDT.P", "AXLUSDT.P", "B3USDT.P",
+    "BANANAUSDT.P", "BANUSDT.P", "BBUSDT.P", "BEAMUSDT.P",
+    "BERAUSDT.P", "BILLYUSDT.P", "BIOUSDT.P", "BLASTUSDT.P", "BLUEUSDT.P",
+    "BNBPERP.P", "BNBUSDT.P", "BNTUSDT.P", "BNXUSDT.P", "BOBAUSDT.P", "BOMEUSDT.P", "BRETTUSDT.P", "BROCCOLIUSDT.P", "BSVUSDT.P",
+    "BSWUSDT.P", "BTC-07MAR25.P", "BTC-21FEB25.P", "BTC-25APR25.P", "BTC-26DEC25.P", "BTC-26SEP25.P", "BTC-27JUN25.P",
+    "BTC-28FEB25.P", "BTC-28MAR25.P", "BTCPERP.P", "BUZZUSDT.P", "CAKEUSDT.P", "CARVUSDT.P",
+    "CATIUSDT.P", "CGPTUSDT.P", "CHESSUSDT.P", "CHILLGUYUSDT.P",
+    "CLOUDUSDT.P", "COOKIEUSDT.P", "COOKUSDT.P",
+    "COSUSDT.P", "COWUSDT.P",
+    "DATAUSDT.P", "DBRUSDT.P", "DEEPUSDT.P",
+    "DEXEUSDT.P", "DOGEPERP.P", "DOGSUSDT.P", "DOTPERP.P",
+    "DUCKUSDT.P", "DYMUSDT.P", "EIGENUSDT.P", "ENAPERP.P",
+    "ENAUSDT.P", "ETCPERP.P", "ETH-07MAR25.P", "ETH-21FEB25.P",
+    "ETH-25APR25.P", "ETH-26DEC25.P", "ETH-26SEP25.P", "ETH-27JUN25.P", "ETH-28FEB25.P", "ETH-28MAR25.P", "ETHBTCUSDT.P",
+    "ETHFIPERP.P", "ETHFIUSDT.P", "ETHPERP.P", "FARTCOINUSDT.P", "FBUSDT.P", "FDUSDUSDT.P",
+    "FIDAUSDT.P", "FIOUSDT.P", "FLMUSDT.P", "FLOCKUSDT.P", "FLUXUSDT.P",
+    "FOXYUSDT.P", "FTNUSDT.P", "FUELUSDT.P", "FUSDT.P", "FWOGUSDT.P", "GASUSDT.P",
+    "GEMSUSDT.P", "GIGAUSDT.P", "GMEUSDT.P", "GNOUSDT.P", "GOATUSDT.P",
+    "GODSUSDT.P", "GOMININGUSDT.P", "GRASSUSDT.P", "GRIFFAINUSDT.P", "GUSDT.P",
+    "HEIUSDT.P", "HIPPOUSDT.P", "HIVEUSDT.P", "HMSTRUSDT.P",
+    "HPOS10IUSDT.P", "HYPEUSDT.P",
+    "IOUSDT.P", "IPUSDT.P", "JAILSTOOLUSDT.P",
+    "JELLYJELLYUSDT.P", "JTOUSDT.P", "JUPUSDT.P", "JUSDT.P", "KAIAUSDT.P",
+    "KMNOUSDT.P", "KOMAUSDT.P",
+    "LINKPERP.P", "LISTAUSDT.P", "LSKUSDT.P",
+    "LUCEUSDT.P", "LUMIAUSDT.P", "MAJORUSDT.P",
+    "MANTAUSDT.P", "MASAUSDT.P", "MAVIAUSDT.P", "MAXUSDT.P", "MBLUSDT.P", "MBOXUSDT.P",
+    "MELANIAUSDT.P", "MEMEFIUSDT.P", "MEMEUSDT.P", "MERLUSDT.P", "METISUSDT.P", "MEUSDT.P", "MEWUSDT.P", "MICHIUSDT.P",
+    "MNTPERP.P", "MOBILEUSDT.P", "MOCAUSDT.P", "MONUSDT.P", "MOODENGUSDT.P",
+    "MORPHOUSDT.P", "MOVEUSDT.P", "MOVRUSDT.P", "MVLUSDT.P", "MYROUSDT.P",
+    "NCUSDT.P", "NFPUSDT.P", "NOTPERP.P", "NOTUSDT.P",
+    "NSUSDT.P", "NULSUSDT.P", "NYANUSDT.P", "OLUSDT.P", "OMNIUSDT.P",
+    "OMUSDT.P", "ONDOPERP.P", "ONDOUSDT.P", "ONGUSDT.P", "OPPERP.P",
+    "ORCAUSDT.P", "ORDIPERP.P", "OSMOUSDT.P", "PEAQUSDT.P",
+    "PENGUUSDT.P", "PHAUSDT.P", "PIPPINUSDT.P",
+    "PIXELUSDT.P", "PLUMEUSDT.P", "PNUTUSDT.P", "POLPERP.P", "POLUSDT.P", "POLYXUSDT.P", "POPCATPERP.P",
+    "PORTALUSDT.P", "POWRUSDT.P", "PRIMEUSDT.P", "PROSUSDT.P", "PUFFERUSDT.P",
+    "PYRUSDT.P", "PYTHUSDT.P", "QIUSDT.P", "QUICKUSDT.P", "RAREUSDT.P", "RAYDIUMUSDT.P",
+    "RENDERUSDT.P", "REXUSDT.P", "REZUSDT.P", "RIFSOLUSDT.P", "RIFUSDT.P",
+    "RONINUSDT.P",
+    "SCRUSDT.P", "SDUSDT.P", "SENDUSDT.P",
+    "SHELLUSDT.P", "SHIB1000PERP.P", "SLERFUSDT.P", "SNTUSDT.P",
+    "SOL-07MAR25.P", "SOL-21FEB25.P", "SOL-28FEB25.P", "SOL-28MAR25.P", "SOLAYERUSDT.P", "SOLOUSDT.P", "SOLPERP.P",
+    "SOLUSDT-04APR25.P", "SOLUSDT-11APR25.P", "SOLVUSDT.P", "SONICUSDT.P", "SPECUSDT.P", "SPXUSDT.P",
+    "STEEMUSDT.P", "STRKPERP.P",
+    "SUIPERP.P", "SUPERUSDT.P", "SUSDT.P", "SWARMSUSDT.P",
+    "SWELLUSDT.P", "SYNUSDT.P", "SYSUSDT.P", "TAIKOUSDT.P", "TAIUSDT.P", "TAOUSDT.P", "THEUSDT.P",
+    "TIAPERP.P", "TIAUSDT.P", "TNSRUSDT.P", "TOKENUSDT.P", "TONPERP.P", "TROYUSDT.P",
+    "TRUMPUSDT.P", "TSTBSCUSDT.P", "UROUSDT.P",
+    "USDEUSDT.P", "USTCUSDT.P", "USUALUSDT.P", "VANAUSDT.P", "VANRYUSDT.P"
+]
+
+def delivery_date(symbol):
+    match = SYMBOL_PATTERN.match(symbol)
+    if not match or not match.group(1):
+        return None
+    return datetime.strptime(match.group(1), "%d%b%y").replace(tzinfo=timezone.utc)
+
+def clean_symbols(candidates, now=None):
+    """Return (valid symbols in first-seen order, rejected entries) for a hand-written list.
+
+    Whitespace is removed and entries fused by a missing comma are split before
+    validation; duplicates and dated futures past their delivery day are dropped.
+    """
+    now = now or datetime.now(timezone.utc)
+    valid, rejected = [], []
+    for candidate in candidates:
+        compact = re.sub(r"\s+", "", candidate).upper()
+        pieces = FUSED_PATTERN.findall(compact) if compact.count(".P") > 1 else [compact]
+        for symbol in pieces:
+            if not SYMBOL_PATTERN.match(symbol):
+                rejected.append(candidate)
+                continue
+            delivery = delivery_date(symbol)
+            if delivery is not None and delivery.date() < now.date():
+                rejected.append(symbol)
+                continue
+            valid.append(symbol)
+    return list(dict.fromkeys(valid)), rejected
+
+def _get_pages(session, url, params, base_url):
+    rows, cursor = [], None
+    while True:
+        page_params = dict(params, cursor=cursor) if cursor else params
+        response = session.get(f"{base_url}{url}", params=page_params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("retCode") != 0:
+            raise ValueError(f"Bybit error for {url}: {payload.get('retMsg')}")
+        rows.extend(payload["result"]["list"])
+        cursor = payload["result"].get("nextPageCursor")
+        if not cursor:
+            return rows
+
+def fetch_instruments(session=None, base_url=BYBIT_API):
+    """Download every instrument and its 24h turnover for CATEGORY."""
+    session = session or requests.Session()
+    instruments = _get_pages(session, "/v5/market/instruments-info", {"category": CATEGORY, "limit": PAGE_LIMIT}, base_url)
+    tickers = _get_pages(session, "/v5/market/tickers", {"category": CATEGORY}, base_url)
+    return {
+        "fetched_at": time.time(),
+        "category": CATEGORY,
+        "instruments": instruments,
+        "turnover": {ticker["symbol"]: float(ticker.get("turnover24h") or 0) for ticker in tickers},
+    }
+
+def _write_json(data, path):
+    with atomic_file.open_replacing(path) as f:
+        json.dump(data, f)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def load_instruments(path=INSTRUMENTS_PATH, max_age=INSTRUMENTS_MAX_AGE, offline=False, base_url=BYBIT_API):
+    """Instrument data from the cached copy when fresh enough, otherwise from Bybit.
+
+    A stale copy is still used when Bybit cannot be reached.
+    """
+    cached = _read_json(path)
+    if offline or (cached and time.time() - cached.get("fetched_at", 0) < max_age):
+        return cached
+    try:
+        data = fetch_instruments(base_url=base_url)
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("Could not download instruments, using the cached copy: %s", e)
+        return cached
+    _write_json(data, path)
+    return data
+
+def instrument_tags(instrument, category=CATEGORY):
+    tags = {category}
+    contract_type = instrument.get("contractType", "")
+    if contract_type.endswith("Perpetual"):
+        tags.add("perpetual")
+    elif contract_type.endswith("Futures"):
+        tags.add("futures")
+    if instrument.get("settleCoin"):
+        tags.add(instrument["settleCoin"].lower())
+    return tags
+
+def resolve(data, tags=DEFAULT_TAGS, min_turnover=MIN_TURNOVER, now=None):
+    """TradingView tickers for every live instrument carrying all `tags` and enough turnover."""
+    now_ms = (now or datetime.now(timezone.utc)).timestamp() * 1000
+    required = set(tags)
+    turnover = data.get("turnover", {})
+    symbols = []
+    for instrument in data.get("instruments", []):
+        if instrument.get("status") != "Trading":
+            continue
+        delivery = int(instrument.get("deliveryTime") or 0)
+        if delivery and delivery <= now_ms:
+            continue
+        if not required <= instrument_tags(instrument, data.get("category", CATEGORY)):
+            continue
+        if turnover.get(instrument["symbol"], 0.0) < min_turnover:
+            continue
+        symbols.append(f"{instrument['symbol']}.P")
+    return sorted(dict.fromkeys(symbols))
+
+def resolve_universe(tags=DEFAULT_TAGS, min_turnover=MIN_TURNOVER, offline=False, path=UNIVERSE_PATH,
+                     instruments_path=INSTRUMENTS_PATH, base_url=BYBIT_API):
+    """Resolve the universe from instrument data and persist it; returns the symbols."""
+    data = load_instruments(instruments_path, offline=offline, base_url=base_url)
+    if data is None:
+        raise ValueError("No instrument data: Bybit is unreachable and there is no cached copy")
+    symbols = resolve(data, tags, min_turnover)
+    _write_json({
+        "resolved_at": datetime.now(timezone.utc).isoformat(),
+        "instruments_fetched_at": data.get("fetched_at"),
+        "tags": list(tags),
+        "min_turnover": min_turnover,
+        "symbols": symbols,
+    }, path)
+    return symbols
+
+def load_symbols(path=UNIVERSE_PATH, now=None):
+    """The persisted universe, or the cleaned curated list when none has been resolved."""
+    resolved = _read_json(path)
+    if resolved and resolved.get("symbols"):
+        # Dated futures in a persisted universe expire while it sits on disk.
+        return clean_symbols(resolved["symbols"], now)[0]
+    return clean_symbols(CURATED_SYMBOLS, now)[0]
+
+symbols = load_symbols()
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve and persist the symbol universe from Bybit instruments")
+    parser.add_argument("--tags", nargs="+", default=list(DEFAULT_TAGS), help="Required tags, e.g. linear perpetual usdc")
+    parser.add_argument("--min-turnover", type=float, default=MIN_TURNOVER, help="Minimum 24h turnover in quote currency")
+    parser.add_argument("--offline", action="store_true", help="Only use the cached instruments copy")
+    parser.add_argument("--check-curated", action="store_true", help="Report problems in CURATED_SYMBOLS and exit")
+    args = parser.parse_args()
+
+    metrics.configure_logging()
+    if args.check_curated:
+        valid, rejected = clean_symbols(CURATED_SYMBOLS)
+        print(f"{len(valid)} valid, {len(CURATED_SYMBOLS) - len(valid) - len(rejected)} duplicates, {len(rejected)} rejected")
+        for entry in rejected:
+            print(f"  rejected: {entry!r}")
+        return
+
+    resolved = resolve_universe(args.tags, args.min_turnover, args.offline)
+    logger.info("Resolved %d symbols with tags %s into %s", len(resolved), ", ".join(args.tags), UNIVERSE_PATH)
+
+if __name__ == "__main__":
+    main()